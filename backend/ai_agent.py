@@ -1,29 +1,255 @@
-import os
+import copy
 import json
+import time
+import asyncio
+import contextvars
 import requests
-from typing import Dict, Any, List, Optional
-from dotenv import load_dotenv
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, AsyncIterator, Iterator, List, Optional, Tuple
 import logging
-
-load_dotenv()
+from logging_config import truncate
+from metrics import (
+    ai_request_duration_seconds, ai_config_fallbacks_total, ai_config_validations_total, ai_config_repairs_total,
+    ai_config_batch_size, ai_config_source_total
+)
+from circuit_breaker import CircuitBreaker
+from json_stream import IncrementalObjectParser
+from difficulty_engine import difficulty_engine, adaptive_policy
+from rate_limiter import ai_scheduler, INTERACTIVE
+from config_schema import FALLBACK_CONFIG, ConfigRepairError, validate_config, validate_batch, validate_member, extract_json_object
+from settings import Settings, get_settings
 
 logger = logging.getLogger(__name__)
 
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-GEMINI_API_URL = "https://generativelanguage.googleapis.com/v1beta/models/gemini-1.5-flash:generateContent"
+settings = get_settings()
 
-class AIAgent:
-    def __init__(self):
-        self.api_key = GEMINI_API_KEY
-        self.api_url = GEMINI_API_URL
+GEMINI_API_KEY = settings.gemini_api_key
+# Overridable so benchmarks can point at a local stand-in (benchmarks/ai_standin.py)
+GEMINI_API_URL = settings.gemini_api_url
+# Stream responses (streamGenerateContent, SSE) so level_config can be used before the rest arrives
+GEMINI_STREAMING = settings.gemini_streaming
 
-    def generate_game_config(self, child_profile: Dict[str, Any], previous_sessions: List[Dict[str, Any]]) -> Dict[str, Any]:
-        """Generate personalized game configuration using Gemini API."""
-        if not self.api_key:
-            logger.error("Gemini API key not set.")
-            return self._fallback_config()
+# Upper bound on a single Gemini call; the breaker adapts the actual timeout below this
+GEMINI_TIMEOUT_SECONDS = settings.gemini_timeout_seconds
+GEMINI_CONNECT_TIMEOUT_SECONDS = 3.0
+
+# Circuit breaker around the provider: trip at this failure ratio, probe again after the reset delay
+AI_BREAKER_FAILURE_RATE = settings.ai_breaker_failure_rate
+AI_BREAKER_RESET_SECONDS = settings.ai_breaker_reset_seconds
+AI_MIN_TIMEOUT_SECONDS = settings.ai_min_timeout_seconds
+
+# Provider calls in flight at once; they wait on the network, so this exceeds the default executor size
+AI_MAX_CONCURRENCY = settings.ai_max_concurrency
+
+# How long a connecting child waits for a generated config before getting the local one
+AI_CONFIG_DEADLINE_SECONDS = settings.ai_config_deadline_seconds
+
+# Batch config requests from children starting together into one provider call (1 disables).
+# A batch is sent once it is full or the window since its first request has passed.
+AI_BATCH_MAX_SIZE = settings.ai_batch_max_size
+AI_BATCH_WINDOW_SECONDS = settings.ai_batch_window_seconds
+
+# Rough token cost of a config call for the rate limiter: fixed prompt text plus the generated JSON
+PROMPT_OVERHEAD_TOKENS = 350
+OUTPUT_TOKENS_PER_CONFIG = 250
+
+# Provider errors that mean it is unhealthy; bad output from a healthy provider does not count
+BREAKER_FAILURE_REASONS = {"error", "timeout"}
+
+# Provider errors raised before any request is sent; there is no upstream latency to record
+LOCAL_FAILURE_REASONS = {"no_api_key"}
+
+# "gemini" (default) or "local" for the rule-based generator
+AI_PROVIDER = settings.ai_provider
+
+class AIProviderError(Exception):
+    """A provider could not produce a config; `reason` labels the fallback metric."""
+
+    def __init__(self, reason: str, message: str):
+        super().__init__(message)
+        self.reason = reason
+
+class AIProvider(ABC):
+    """Produces a game config for a child from their profile and session history."""
+    name = "base"
+
+    @abstractmethod
+    def generate_config(self, child_profile: Dict[str, Any], previous_sessions: List[Dict[str, Any]],
+                        timeout: Optional[float] = None) -> Dict[str, Any]:
+        """The full config; raises AIProviderError if none could be produced."""
+
+    def stream_config(self, child_profile: Dict[str, Any], previous_sessions: List[Dict[str, Any]],
+                      timeout: Optional[float] = None) -> Iterator[Tuple[str, Any]]:
+        """Yield top-level (key, value) members of the config as they become available."""
+        yield from self.generate_config(child_profile, previous_sessions, timeout).items()
+
+    def generate_configs(self, requests: List[Tuple[Dict[str, Any], List[Dict[str, Any]]]],
+                         timeout: Optional[float] = None) -> List[Optional[Dict[str, Any]]]:
+        """One config per (child_profile, previous_sessions); None where the provider produced none."""
+        return [self.generate_config(profile, sessions, timeout) for profile, sessions in requests]
+
+class GeminiProvider(AIProvider):
+    """Gemini generateContent over HTTP, reusing one pooled session."""
+    name = "gemini"
+
+    def __init__(self, api_key: Optional[str] = GEMINI_API_KEY, api_url: str = GEMINI_API_URL,
+                 timeout: float = GEMINI_TIMEOUT_SECONDS, streaming: bool = GEMINI_STREAMING):
+        self.api_key = api_key
+        self.api_url = api_url
+        self.stream_url = api_url.replace(":generateContent", ":streamGenerateContent") + "?alt=sse"
+        self.timeout = timeout
+        self.streaming = streaming
+        self.http = requests.Session()
+        # One pooled connection per concurrent call
+        self.http.mount("https://", requests.adapters.HTTPAdapter(pool_maxsize=AI_MAX_CONCURRENCY))
+        self.http.mount("http://", requests.adapters.HTTPAdapter(pool_maxsize=AI_MAX_CONCURRENCY))
+
+    def generate_config(self, child_profile: Dict[str, Any], previous_sessions: List[Dict[str, Any]],
+                        timeout: Optional[float] = None) -> Dict[str, Any]:
+        text = self._generate_text(build_prompt(child_profile, previous_sessions), timeout)
+        try:
+            return parse_config_text(text)
+        except ConfigRepairError as e:
+            ai_config_validations_total.labels("rejected").inc()
+            raise AIProviderError("invalid_json", f"Gemini response not valid JSON: {e}; raw text: {truncate(text)}")
+
+    def generate_configs(self, requests: List[Tuple[Dict[str, Any], List[Dict[str, Any]]]],
+                         timeout: Optional[float] = None) -> List[Optional[Dict[str, Any]]]:
+        """Generate configs for several children with a single call."""
+        if len(requests) == 1:
+            return [self.generate_config(*requests[0], timeout)]
+        text = self._generate_text(build_batch_prompt(requests), timeout)
+        try:
+            results = validate_batch(text, len(requests))
+        except ConfigRepairError as e:
+            ai_config_validations_total.labels("rejected").inc()
+            raise AIProviderError("invalid_json", f"Gemini batch response not valid JSON: {e}; raw text: {truncate(text)}")
+        configs = []
+        for result in results:
+            if result is None:
+                ai_config_validations_total.labels("rejected").inc()
+                configs.append(None)
+            else:
+                record_validation(result[1])
+                configs.append(result[0])
+        return configs
+
+    def _generate_text(self, prompt: str, timeout: Optional[float] = None) -> str:
+        """Call generateContent and return the text of the first candidate."""
+        headers, data = self._request(prompt)
+        timeout = timeout or self.timeout
+        try:
+            response = self.http.post(
+                self.api_url, headers=headers, json=data,
+                timeout=(min(GEMINI_CONNECT_TIMEOUT_SECONDS, timeout), timeout)
+            )
+            response.raise_for_status()
+            result = response.json()
+        except requests.Timeout:
+            raise AIProviderError("timeout", f"Gemini API timed out after {timeout:.1f}s")
+        except Exception as e:
+            raise AIProviderError("error", f"Gemini API error: {e}")
+
+        # Raw responses are large; only log a truncated copy when debugging
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Gemini API response: {truncate(result)}")
 
-        prompt = self._build_prompt(child_profile, previous_sessions)
+        # Gemini returns a list of candidates, each with content.parts[0].text
+        if not result.get("candidates"):
+            raise AIProviderError("no_candidates", f"Gemini response has no candidates: {truncate(result)}")
+
+        text = result["candidates"][0]["content"]["parts"][0]["text"]
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Gemini generated text: {truncate(text)}")
+        return text
+
+    def stream_config(self, child_profile: Dict[str, Any], previous_sessions: List[Dict[str, Any]],
+                      timeout: Optional[float] = None) -> Iterator[Tuple[str, Any]]:
+        """Stream the response over SSE, yielding each top-level member once its JSON closes.
+
+        `timeout` bounds the whole stream, not just each read. Members are
+        repaired and validated as they are yielded; if the text stops parsing part-way, the
+        rest of the stream is collected and salvaged once it ends, and any
+        member still missing is filled from the defaults.
+        """
+        if not self.streaming:
+            yield from super().stream_config(child_profile, previous_sessions, timeout)
+            return
+
+        headers, data = self._request(build_prompt(child_profile, previous_sessions))
+        timeout = timeout or self.timeout
+        deadline = time.monotonic() + timeout
+        parser = IncrementalObjectParser()
+        text_parts: List[str] = []
+        repairs: List[str] = []
+        emitted = set()
+        try:
+            with self.http.post(
+                self.stream_url, headers=headers, json=data, stream=True,
+                timeout=(min(GEMINI_CONNECT_TIMEOUT_SECONDS, timeout), timeout)
+            ) as response:
+                response.raise_for_status()
+                for line in response.iter_lines(decode_unicode=True):
+                    if time.monotonic() > deadline:
+                        raise requests.Timeout()
+                    if not line or not line.startswith("data:"):
+                        continue
+                    chunk = json.loads(line[5:])
+                    for candidate in chunk.get("candidates", [])[:1]:
+                        for part in candidate.get("content", {}).get("parts", []):
+                            text = part.get("text", "")
+                            text_parts.append(text)
+                            if parser is None:
+                                continue
+                            try:
+                                members = parser.feed(text)
+                            except ValueError:
+                                # Malformed member; salvage from the full text once the stream ends
+                                parser = None
+                                continue
+                            for key, value in members:
+                                emitted.add(key)
+                                yield key, validate_member(key, value, repairs)
+        except requests.Timeout:
+            raise AIProviderError("timeout", f"Gemini stream timed out after {timeout:.1f}s")
+        except (requests.RequestException, ConnectionError) as e:
+            raise AIProviderError("error", f"Gemini API error: {e}")
+        except ValueError as e:
+            raise AIProviderError("invalid_json", f"Gemini stream not valid JSON: {e}")
+
+        if parser is not None:
+            try:
+                parser.close()
+            except ValueError:
+                # The stream ended inside the object, so its trailing member never closed
+                repairs.append("json:truncated")
+                parser = None
+        if parser is None:
+            text = "".join(text_parts)
+            try:
+                salvaged = extract_json_object(text)
+            except ConfigRepairError as e:
+                if not emitted:
+                    ai_config_validations_total.labels("rejected").inc()
+                    raise AIProviderError("invalid_json", f"Gemini stream not valid JSON: {e}; raw text: {truncate(text)}")
+                salvaged = {}
+            else:
+                repairs.append("json:extracted")
+            for key, value in salvaged.items():
+                if key not in emitted:
+                    emitted.add(key)
+                    yield key, validate_member(key, value, repairs)
+        for key, value in FALLBACK_CONFIG.items():
+            if key not in emitted:
+                repairs.append(f"{key}:missing")
+                yield key, copy.deepcopy(value)
+        record_validation(repairs)
+
+    def _request(self, prompt: str):
+        """Headers and body for a generateContent call."""
+        if not self.api_key:
+            raise AIProviderError("no_api_key", "Gemini API key not set.")
         headers = {
             "Content-Type": "application/json",
             "X-goog-api-key": self.api_key
@@ -33,48 +259,22 @@ class AIAgent:
                 {"parts": [{"text": prompt}]}
             ]
         }
-        try:
-            response = requests.post(self.api_url, headers=headers, json=data, timeout=20)
-            response.raise_for_status()
-            result = response.json()
-            
-            # Log the raw response for debugging
-            logger.info(f"Gemini API response: {result}")
-            
-            # Gemini returns a list of candidates, each with content.parts[0].text
-            if "candidates" in result and len(result["candidates"]) > 0:
-                text = result["candidates"][0]["content"]["parts"][0]["text"]
-                logger.info(f"Gemini generated text: {text}")
-                
-                # Expecting JSON in the response (might be wrapped in markdown)
-                try:
-                    # Clean the text - remove markdown code blocks if present
-                    cleaned_text = text.strip()
-                    if cleaned_text.startswith("```json"):
-                        cleaned_text = cleaned_text[7:]  # Remove ```json
-                    if cleaned_text.startswith("```"):
-                        cleaned_text = cleaned_text[3:]   # Remove ```
-                    if cleaned_text.endswith("```"):
-                        cleaned_text = cleaned_text[:-3]  # Remove ```
-                    cleaned_text = cleaned_text.strip()
-                    
-                    config = json.loads(cleaned_text)
-                    logger.info(f"Successfully parsed Gemini config: {config}")
-                    return config
-                except Exception as e:
-                    logger.error(f"Gemini response not valid JSON: {e}")
-                    logger.error(f"Raw text from Gemini: {text}")
-                    logger.error(f"Cleaned text: {cleaned_text}")
-                    return self._fallback_config()
-            else:
-                logger.error(f"Gemini response has no candidates: {result}")
-                return self._fallback_config()
-        except Exception as e:
-            logger.error(f"Gemini API error: {e}")
-            return self._fallback_config()
+        return headers, data
 
-    def _build_prompt(self, child_profile, previous_sessions):
-        return f"""You are an expert in adaptive game design for autism assessment. Generate a personalized game configuration in JSON format.
+class RuleBasedProvider(AIProvider):
+    """Deterministic local generator backed by the difficulty engine.
+
+    Needs no network, so it doubles as the provider for offline load tests.
+    """
+    name = "local"
+
+    def generate_config(self, child_profile: Dict[str, Any], previous_sessions: List[Dict[str, Any]],
+                        timeout: Optional[float] = None) -> Dict[str, Any]:
+        config, _, _ = difficulty_engine.next_config(child_profile, previous_sessions)
+        return config
+
+def build_prompt(child_profile: Dict[str, Any], previous_sessions: List[Dict[str, Any]]) -> str:
+    return f"""You are an expert in adaptive game design for autism assessment. Generate a personalized game configuration in JSON format.
 
 Child Profile: {json.dumps(child_profile)}
 Previous Sessions: {json.dumps(previous_sessions)}
@@ -97,24 +297,449 @@ Generate a JSON configuration with this exact structure:
 
 Adapt the configuration based on the child's age, special interests, and previous session performance. Return ONLY the JSON, no other text."""
 
+def build_batch_prompt(requests: List[Tuple[Dict[str, Any], List[Dict[str, Any]]]]) -> str:
+    children = [
+        {"child": index, "profile": profile, "previous_sessions": sessions}
+        for index, (profile, sessions) in enumerate(requests)
+    ]
+    return f"""You are an expert in adaptive game design for autism assessment. Generate a personalized game configuration for each child below.
+
+Number of children: {len(children)}
+Children: {json.dumps(children)}
+
+Return a JSON object with one entry per child in "configs", each tagged with the child's index:
+{{
+  "configs": [
+    {{
+      "child": 0,
+      "level_config": {{
+        "difficulty": 2,
+        "shapes": ["circle", "square", "triangle"],
+        "colors": ["red", "blue", "green"],
+        "sounds": true,
+        "animation_speed": 1.0,
+        "surprise_elements": ["color_change", "size_change"]
+      }},
+      "assessment_focus": ["attention", "motor_skills", "pattern_recognition"],
+      "session_duration": 10,
+      "break_intervals": 3,
+      "motivation_elements": ["celebration_sounds", "progress_indicators"]
+    }}
+  ]
+}}
+
+Adapt each configuration to that child's age, special interests, and previous session performance. Return ONLY the JSON, no other text."""
+
+def estimate_tokens(requests: List[Tuple[Dict[str, Any], List[Dict[str, Any]]]]) -> int:
+    """Approximate tokens (about 4 characters each) a call for these children will use."""
+    chars = sum(len(json.dumps(profile, default=str)) + len(json.dumps(sessions, default=str))
+                for profile, sessions in requests)
+    return PROMPT_OVERHEAD_TOKENS + chars // 4 + OUTPUT_TOKENS_PER_CONFIG * len(requests)
+
+def parse_config_text(text: str) -> Dict[str, Any]:
+    """Parse model output into a valid config, repairing it where possible.
+
+    Raises ConfigRepairError when no JSON object can be recovered.
+    """
+    config, repairs = validate_config(text)
+    record_validation(repairs)
+    return config
+
+def record_validation(repairs: List[str]):
+    """Count a provider config as valid or repaired, and each repair applied."""
+    if not repairs:
+        ai_config_validations_total.labels("valid").inc()
+        return
+    ai_config_validations_total.labels("repaired").inc()
+    for repair in repairs:
+        ai_config_repairs_total.labels(repair).inc()
+    logger.info(f"Repaired AI config: {', '.join(repairs)}")
+
+PROVIDERS = {
+    GeminiProvider.name: GeminiProvider,
+    RuleBasedProvider.name: RuleBasedProvider,
+}
+
+def create_ai_provider(settings: Settings = settings) -> AIProvider:
+    """Build the provider selected by AI_PROVIDER."""
+    logger.info(f"AI provider: {settings.ai_provider}")
+    if settings.ai_provider == GeminiProvider.name:
+        return GeminiProvider(settings.gemini_api_key, settings.gemini_api_url,
+                              settings.gemini_timeout_seconds, settings.gemini_streaming)
+    return PROVIDERS[settings.ai_provider]()
+
+def create_ai_breaker(provider: AIProvider, settings: Settings = settings) -> CircuitBreaker:
+    """Build the breaker guarding `provider`."""
+    return CircuitBreaker(
+        f"ai_{provider.name}",
+        failure_threshold=settings.ai_breaker_failure_rate,
+        reset_timeout=settings.ai_breaker_reset_seconds,
+        min_timeout=settings.ai_min_timeout_seconds,
+        max_timeout=settings.gemini_timeout_seconds
+    )
+
+# Threads for blocking provider calls, kept apart from the default executor
+ai_executor = ThreadPoolExecutor(max_workers=AI_MAX_CONCURRENCY, thread_name_prefix="ai")
+
+_ai_provider: Optional[AIProvider] = None
+_ai_breaker: Optional[CircuitBreaker] = None
+
+def get_ai_provider() -> AIProvider:
+    """The global AI provider, created on first use so importing this module opens no HTTP session."""
+    global _ai_provider
+    if _ai_provider is None:
+        _ai_provider = create_ai_provider()
+    return _ai_provider
+
+def get_ai_breaker() -> CircuitBreaker:
+    """The global breaker guarding the AI provider."""
+    global _ai_breaker
+    if _ai_breaker is None:
+        _ai_breaker = create_ai_breaker(get_ai_provider())
+    return _ai_breaker
+
+def __getattr__(name):
+    # The module-level provider and breaker are created on first access
+    if name == "ai_provider":
+        return get_ai_provider()
+    if name == "ai_breaker":
+        return get_ai_breaker()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+class AIAgent:
+    def __init__(self, provider: Optional[AIProvider] = None, breaker: Optional[CircuitBreaker] = None,
+                 settings: Optional[Settings] = None):
+        # Without explicit settings the agent shares the global provider and breaker
+        if settings is None:
+            self.provider = provider or get_ai_provider()
+            self.breaker = breaker or get_ai_breaker()
+        else:
+            self.provider = provider or create_ai_provider(settings)
+            self.breaker = breaker or create_ai_breaker(self.provider, settings)
+        self.fallback_provider = RuleBasedProvider()
+
+    def generate_game_config(self, child_profile: Dict[str, Any], previous_sessions: List[Dict[str, Any]],
+                             deadline: Optional[float] = None, admitted: bool = False) -> Dict[str, Any]:
+        """Generate personalized game configuration, falling back to the local generator on failure.
+
+        `deadline` is a time.monotonic() value; the provider call is cut off
+        in time to meet it. While the breaker is open the provider is not
+        called at all. `admitted` means the caller already passed the
+        breaker's allow_request().
+        """
+        timeout = self.breaker.timeout(deadline)
+        if timeout <= 0:
+            ai_config_fallbacks_total.labels("deadline").inc()
+            if admitted:
+                self.breaker.release()
+            return self._fallback_for(child_profile, previous_sessions)
+        if not admitted and not self.breaker.allow_request():
+            ai_config_fallbacks_total.labels("circuit_open").inc()
+            return self._fallback_for(child_profile, previous_sessions)
+
+        started = self._start_call()
+        try:
+            config = self.provider.generate_config(child_profile, previous_sessions, timeout=timeout)
+        except AIProviderError as e:
+            logger.error(str(e))
+            self._record_call(started, e.reason)
+            return self._fallback_for(child_profile, previous_sessions)
+        except Exception as e:
+            logger.error(f"AI provider {self.provider.name} failed: {e}")
+            self._record_call(started, "error")
+            return self._fallback_for(child_profile, previous_sessions)
+
+        logger.info(f"Generated config with {self.provider.name} (keys: {sorted(config)})")
+        self._record_call(started, "success")
+        return config
+
+    def stream_game_config(self, child_profile: Dict[str, Any], previous_sessions: List[Dict[str, Any]],
+                           deadline: Optional[float] = None, admitted: bool = False) -> Iterator[Tuple[str, Any]]:
+        """Yield config members as the provider produces them.
+
+        If the provider fails part-way, the members it never produced are
+        filled in from the local generator, so the consumer always ends up
+        with a complete config.
+        """
+        timeout = self.breaker.timeout(deadline)
+        if timeout <= 0:
+            ai_config_fallbacks_total.labels("deadline").inc()
+            if admitted:
+                self.breaker.release()
+            yield from self._fallback_for(child_profile, previous_sessions).items()
+            return
+        if not admitted and not self.breaker.allow_request():
+            ai_config_fallbacks_total.labels("circuit_open").inc()
+            yield from self._fallback_for(child_profile, previous_sessions).items()
+            return
+
+        emitted = set()
+        started = self._start_call()
+        try:
+            for key, value in self.provider.stream_config(child_profile, previous_sessions, timeout=timeout):
+                emitted.add(key)
+                yield key, value
+        except AIProviderError as e:
+            logger.error(str(e))
+            self._record_call(started, e.reason)
+        except Exception as e:
+            logger.error(f"AI provider {self.provider.name} failed: {e}")
+            self._record_call(started, "error")
+        else:
+            self._record_call(started, "success")
+            return
+
+        for key, value in self._fallback_for(child_profile, previous_sessions).items():
+            if key not in emitted:
+                yield key, value
+
+    def generate_game_configs(self, requests: List[Tuple[Dict[str, Any], List[Dict[str, Any]]]],
+                              deadline: Optional[float] = None, admitted: bool = False) -> List[Dict[str, Any]]:
+        """Generate configs for several (child_profile, previous_sessions) pairs in one provider call.
+
+        Children the provider left out, or whose entry could not be
+        repaired, get the local config; a failed call falls back for all.
+        """
+        ai_config_batch_size.observe(len(requests))
+        timeout = self.breaker.timeout(deadline)
+        reason = None
+        if timeout <= 0:
+            reason = "deadline"
+            if admitted:
+                self.breaker.release()
+        elif not admitted and not self.breaker.allow_request():
+            reason = "circuit_open"
+        if reason:
+            ai_config_fallbacks_total.labels(reason).inc(len(requests))
+            return [self._fallback_for(profile, sessions) for profile, sessions in requests]
+
+        started = self._start_call()
+        try:
+            configs = self.provider.generate_configs(requests, timeout=timeout)
+        except AIProviderError as e:
+            logger.error(str(e))
+            configs, outcome = [None] * len(requests), e.reason
+        except Exception as e:
+            logger.error(f"AI provider {self.provider.name} failed: {e}")
+            configs, outcome = [None] * len(requests), "error"
+        else:
+            outcome = "success"
+        self._record_call(started, outcome, fallbacks=len(requests))
+
+        results = []
+        for (profile, sessions), config in zip(requests, configs):
+            if config is None:
+                if outcome == "success":
+                    ai_config_fallbacks_total.labels("batch_missing").inc()
+                config = self._fallback_for(profile, sessions)
+            results.append(config)
+        logger.info(f"Generated {len(requests)} configs in one {self.provider.name} call ({outcome})")
+        return results
+
+    def _fallback_for(self, child_profile: Dict[str, Any], previous_sessions: List[Dict[str, Any]]) -> Dict[str, Any]:
+        try:
+            return self.fallback_provider.generate_config(child_profile, previous_sessions)
+        except Exception as e:
+            logger.error(f"Local config generation failed: {e}")
+            return self._fallback_config()
+
+    def _start_call(self) -> Tuple[float, float]:
+        """Start times for _record_call: a perf_counter reading and the breaker clock."""
+        return time.perf_counter(), self.breaker.clock()
+
+    def _record_call(self, started: Tuple[float, float], outcome: str, fallbacks: int = 1):
+        """Record latency by outcome and feed the breaker; anything but success means `fallbacks` configs were served from the fallback.
+
+        Only a successful answer counts as a success for the breaker. Bad output
+        and local errors leave it untouched, apart from freeing a half-open
+        probe slot.
+        """
+        elapsed = time.perf_counter() - started[0]
+        if outcome not in LOCAL_FAILURE_REASONS:
+            ai_request_duration_seconds.labels(self.provider.name, outcome).observe(elapsed)
+        if outcome == "success":
+            self.breaker.record_success(elapsed, started[1])
+        elif outcome in BREAKER_FAILURE_REASONS:
+            self.breaker.record_failure(started[1])
+        else:
+            self.breaker.release()
+        if outcome != "success":
+            ai_config_fallbacks_total.labels(outcome).inc(fallbacks)
+
+    def _build_prompt(self, child_profile, previous_sessions):
+        return build_prompt(child_profile, previous_sessions)
+
     def _fallback_config(self):
-        return {
-            "level_config": {
-                "difficulty": 2,
-                "shapes": ["circle", "square", "triangle"],
-                "colors": ["red", "blue", "green"],
-                "sounds": True,
-                "animation_speed": 1.0,
-                "surprise_elements": ["color_change", "size_change"]
-            },
-            "assessment_focus": ["attention", "motor_skills", "pattern_recognition"],
-            "session_duration": 10,
-            "break_intervals": 3,
-            "motivation_elements": ["celebration_sounds", "progress_indicators"]
-        }
+        return copy.deepcopy(FALLBACK_CONFIG)
+
+class ConfigBatcher:
+    """Collects config requests from children starting together and serves them with one provider call.
+
+    A batch is sent once it holds `max_size` requests or `window` seconds
+    after its first request, whichever comes first, and runs against the
+    earliest deadline in the batch. Quota is taken per owner, so one
+    clinic's children cannot ride along on another clinic's share.
+    """
+
+    def __init__(self, max_size: int = AI_BATCH_MAX_SIZE, window: float = AI_BATCH_WINDOW_SECONDS,
+                 agent: Optional[AIAgent] = None):
+        self.max_size = max_size
+        self.window = window
+        self.agent = agent
+        self.pending: List[Tuple[Dict[str, Any], List[Dict[str, Any]], Optional[float], int, Optional[str], asyncio.Future]] = []
+        self.timer: Optional[asyncio.TimerHandle] = None
+        self.tasks = set()
+
+    async def submit(self, child_profile: Dict[str, Any], previous_sessions: List[Dict[str, Any]],
+                     deadline: Optional[float] = None, priority: int = INTERACTIVE,
+                     owner: Optional[str] = None) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.pending.append((child_profile, previous_sessions, deadline, priority, owner, future))
+        if len(self.pending) >= self.max_size:
+            self._flush()
+        elif self.timer is None:
+            self.timer = loop.call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self):
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        batch, self.pending = self.pending, []
+        if batch:
+            task = asyncio.ensure_future(self._run(batch))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+
+    async def _run(self, batch):
+        agent = self.agent or AIAgent()
+        try:
+            configs = await self._generate(agent, batch)
+        except Exception as e:
+            logger.error(f"Batched config generation failed: {e}")
+            configs = [agent._fallback_for(profile, sessions) for profile, sessions, *_ in batch]
+        for (*_, future), config in zip(batch, configs):
+            # The waiting child may have disconnected
+            if not future.done():
+                future.set_result(config)
 
-def generate_game_config(child_profile: Dict[str, Any], previous_sessions: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+    async def _generate(self, agent: AIAgent, batch) -> List[Dict[str, Any]]:
+        """Configs for a batch, in order; requests without breaker or quota clearance get the local config."""
+        # An open breaker needs no quota
+        if not agent.breaker.allow_request():
+            ai_config_fallbacks_total.labels("circuit_open").inc(len(batch))
+            return [agent._fallback_for(profile, sessions) for profile, sessions, *_ in batch]
+
+        by_owner: Dict[Optional[str], List[int]] = {}
+        for index, item in enumerate(batch):
+            by_owner.setdefault(item[4], []).append(index)
+
+        async def acquire(indexes: List[int]) -> bool:
+            items = [batch[index] for index in indexes]
+            deadlines = [item[2] for item in items if item[2] is not None]
+            return await ai_scheduler.acquire(
+                estimate_tokens([(item[0], item[1]) for item in items]), min(item[3] for item in items),
+                items[0][4], min(deadlines) if deadlines else None
+            )
+
+        owners = list(by_owner.values())
+        granted = await asyncio.gather(*(acquire(indexes) for indexes in owners))
+        admitted = sorted(index for indexes, ok in zip(owners, granted) if ok for index in indexes)
+
+        configs: List[Optional[Dict[str, Any]]] = [None] * len(batch)
+        if admitted:
+            requests = [(batch[index][0], batch[index][1]) for index in admitted]
+            deadlines = [batch[index][2] for index in admitted if batch[index][2] is not None]
+            loop = asyncio.get_running_loop()
+            results = await loop.run_in_executor(
+                ai_executor, contextvars.copy_context().run, agent.generate_game_configs,
+                requests, min(deadlines) if deadlines else None, True
+            )
+            for index, config in zip(admitted, results):
+                configs[index] = config
+        else:
+            agent.breaker.release()
+
+        if len(admitted) < len(batch):
+            ai_config_fallbacks_total.labels("rate_limited").inc(len(batch) - len(admitted))
+        return [
+            config if config is not None else agent._fallback_for(profile, sessions)
+            for config, (profile, sessions, *_) in zip(configs, batch)
+        ]
+
+# Global batcher used when AI_BATCH_MAX_SIZE > 1
+config_batcher = ConfigBatcher()
+
+def engine_config(child_profile: Dict[str, Any], previous_sessions: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """The difficulty engine's config when the adaptive policy can skip the LLM, else None."""
+    decision = adaptive_policy.decide(child_profile, previous_sessions)
+    ai_config_source_total.labels("llm" if decision.use_llm else "engine", decision.reason).inc()
+    if decision.use_llm:
+        return None
+    logger.info(f"Config for child {child_profile.get('id')} from difficulty engine (confidence {decision.confidence})")
+    return decision.config
+
+def generate_game_config(child_profile: Dict[str, Any], previous_sessions: Optional[List[Dict[str, Any]]] = None,
+                         deadline: Optional[float] = None) -> Dict[str, Any]:
     if previous_sessions is None:
         previous_sessions = []
+    config = engine_config(child_profile, previous_sessions)
+    if config is not None:
+        return config
     agent = AIAgent()
-    return agent.generate_game_config(child_profile, previous_sessions)
\ No newline at end of file
+    return agent.generate_game_config(child_profile, previous_sessions, deadline)
+
+async def stream_game_config(child_profile: Dict[str, Any], previous_sessions: Optional[List[Dict[str, Any]]] = None,
+                             deadline: Optional[float] = None, priority: int = INTERACTIVE,
+                             owner: Optional[str] = None) -> AsyncIterator[Tuple[str, Any]]:
+    """Async view of AIAgent.stream_game_config; the blocking stream runs in a worker thread.
+
+    The difficulty engine answers first when the adaptive policy allows it.
+    Provider calls then pass the circuit breaker and wait for quota in the
+    AI scheduler, queued by `priority` and shared fairly between owners (the
+    clinic user); if none is free before the deadline the local config is
+    served. With batching
+    enabled the request joins the current batch instead, and the whole
+    config is yielded once the batch returns.
+    """
+    previous_sessions = previous_sessions or []
+    config = engine_config(child_profile, previous_sessions)
+    agent = AIAgent()
+    if config is None and AI_BATCH_MAX_SIZE > 1:
+        config = await config_batcher.submit(child_profile, previous_sessions, deadline, priority, owner)
+    elif config is None:
+        # Check the breaker first so an open circuit does not use up quota
+        if not agent.breaker.allow_request():
+            ai_config_fallbacks_total.labels("circuit_open").inc()
+            config = agent._fallback_for(child_profile, previous_sessions)
+        elif not await ai_scheduler.acquire(
+            estimate_tokens([(child_profile, previous_sessions)]), priority, owner, deadline
+        ):
+            agent.breaker.release()
+            ai_config_fallbacks_total.labels("rate_limited").inc()
+            config = agent._fallback_for(child_profile, previous_sessions)
+    if config is not None:
+        for item in config.items():
+            yield item
+        return
+
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    finished = object()
+
+    def produce():
+        try:
+            for item in agent.stream_game_config(child_profile, previous_sessions, deadline, admitted=True):
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+        finally:
+            loop.call_soon_threadsafe(queue.put_nowait, finished)
+
+    producer = loop.run_in_executor(ai_executor, contextvars.copy_context().run, produce)
+    while True:
+        item = await queue.get()
+        if item is finished:
+            break
+        yield item
+    # Surface any error raised in the worker thread
+    await producer
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""LLM calls avoided by the difficulty engine fast path, and what a decision costs.
+
+Simulates a clinic population: each child plays a run of sessions whose
+errors, reaction times and abandons follow a seeded random walk around the
+child's skill. Before every session the adaptive policy decides between the
+engine's config and an LLM call; previously every session called the LLM.
+
+    python benchmarks/adaptive_policy.py --children 200 --sessions 12
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from difficulty_engine import AdaptivePolicy, DifficultyEngine
+
+def simulate_histories(children, sessions, seed):
+    """One list of session dicts (oldest first) per child."""
+    rng = random.Random(seed)
+    histories = []
+    for _ in range(children):
+        skill = rng.uniform(1, 5)
+        reaction = rng.uniform(0.8, 2.5)
+        history = []
+        level = 2
+        for _ in range(sessions):
+            gap = level - skill
+            errors = max(0, int(rng.gauss(2 + 2 * gap, 1.5)))
+            reaction *= rng.uniform(0.85, 1.1) + 0.05 * gap
+            history.append({
+                "level": level,
+                "errors": errors,
+                "reaction_time": round(reaction, 3),
+                "abandoned": rng.random() < 0.05 + max(0.0, 0.1 * gap)
+            })
+            skill += rng.uniform(0, 0.15)
+            level = min(5, max(1, level + (1 if errors <= 1 else -1 if errors >= 5 else 0)))
+        histories.append({"age": rng.randint(3, 11), "special_interest": rng.choice(["purple", "trains", "blue", ""]),
+                          "history": history})
+    return histories
+
+def run_policy(policy, children):
+    decisions = {}
+    llm_calls = total = 0
+    started = time.perf_counter()
+    for child in children:
+        profile = {"age": child["age"], "special_interest": child["special_interest"]}
+        for count in range(len(child["history"])):
+            decision = policy.decide(profile, child["history"][:count])
+            decisions[decision.reason] = decisions.get(decision.reason, 0) + 1
+            llm_calls += decision.use_llm
+            total += 1
+    elapsed = time.perf_counter() - started
+    return {
+        "sessions": total,
+        "llm_calls": llm_calls,
+        "llm_calls_avoided": total - llm_calls,
+        "avoided_ratio": round((total - llm_calls) / total, 3),
+        "reasons": decisions,
+        "decide_us": round(elapsed / total * 1e6, 2)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure LLM calls avoided by the difficulty engine")
+    parser.add_argument("--children", type=int, default=200)
+    parser.add_argument("--sessions", type=int, default=12, help="sessions per child")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    children = simulate_histories(args.children, args.sessions, args.seed)
+    engine = DifficultyEngine()
+    policies = {
+        "llm_always (before)": AdaptivePolicy(engine, mode="off"),
+        "fast_path min_confidence=0.6 llm_every=5 (default)": AdaptivePolicy(engine, min_confidence=0.6, llm_every=5),
+        "fast_path min_confidence=0.6 llm_every=0": AdaptivePolicy(engine, min_confidence=0.6, llm_every=0),
+        "fast_path min_confidence=0.9 llm_every=5": AdaptivePolicy(engine, min_confidence=0.9, llm_every=5),
+    }
+    print(json.dumps({
+        "benchmark": "adaptive_policy",
+        "children": args.children,
+        "sessions_per_child": args.sessions,
+        "results": {name: run_policy(policy, children) for name, policy in policies.items()}
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()
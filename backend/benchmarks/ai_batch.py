@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""Upstream calls and per-child config latency for a burst of children, batched vs one call each.
+
+A clinic's morning block starts many sessions within a few hundred
+milliseconds. This replays such a burst against the local Gemini stand-in,
+once with a provider call per child and once through ConfigBatcher. The
+stand-in enforces a per-minute request quota (--rate-limit); children whose
+call is throttled get the local fallback config:
+
+    python benchmarks/ai_batch.py --children 24 --batch-size 8 --window-ms 150 --rate-limit 15
+
+Batched output is longer, so each batched call takes longer to generate;
+the report shows both sides of that trade.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import random
+import sys
+import time
+
+from ai_standin import start_standin
+from ws_load import percentiles
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+with contextlib.redirect_stdout(sys.stderr):
+    import ai_agent
+    from circuit_breaker import CircuitBreaker
+    from config_schema import GameConfig
+    from metrics import ai_config_fallbacks_total
+
+def fallbacks():
+    return sum(child.value for child in ai_config_fallbacks_total.children.values())
+
+async def burst(children, spread, generate):
+    """Start `children` requests spread uniformly over `spread` seconds; returns per-child latencies."""
+    rng = random.Random(0)
+    offsets = sorted(rng.uniform(0, spread) for _ in range(children))
+
+    async def one(index, offset):
+        await asyncio.sleep(offset)
+        started = time.perf_counter()
+        profile = {"age": 4 + index % 7, "special_interest": "shapes"}
+        config = await generate(profile, [], time.monotonic() + ai_agent.AI_CONFIG_DEADLINE_SECONDS)
+        GameConfig.model_validate(config)
+        return time.perf_counter() - started
+
+    return await asyncio.gather(*(one(index, offset) for index, offset in enumerate(offsets)))
+
+def run(args, batched):
+    server, state, url = start_standin(latency=args.latency, chunk_delay=args.chunk_delay, rate_limit=args.rate_limit)
+    provider = ai_agent.GeminiProvider("standin", url, timeout=10.0, streaming=False)
+    agent = ai_agent.AIAgent(provider, CircuitBreaker(f"bench_batch_{batched}", max_timeout=10.0))
+
+    async def unbatched(profile, sessions, deadline):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(ai_agent.ai_executor, agent.generate_game_config, profile, sessions, deadline)
+
+    async def main():
+        generate = unbatched
+        if batched:
+            generate = ai_agent.ConfigBatcher(args.batch_size, args.window_ms / 1000, agent).submit
+        return await burst(args.children, args.spread, generate)
+
+    before = fallbacks()
+    started = time.perf_counter()
+    latencies = asyncio.run(main())
+    result = {
+        "upstream_calls": state.served + state.failed + state.throttled,
+        "throttled": state.throttled,
+        "total_seconds": round(time.perf_counter() - started, 3),
+        "latency": percentiles(latencies),
+        "fallbacks": int(fallbacks() - before)
+    }
+    server.shutdown()
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare batched and per-child config generation")
+    parser.add_argument("--children", type=int, default=24)
+    parser.add_argument("--spread", type=float, default=0.3, help="seconds over which the children arrive")
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--window-ms", type=float, default=150)
+    parser.add_argument("--latency", type=float, default=0.6, help="stand-in time to first token")
+    parser.add_argument("--chunk-delay", type=float, default=0.01, help="stand-in generation time per 32 chars")
+    parser.add_argument("--rate-limit", type=int, default=15, help="stand-in requests per minute (0: unlimited)")
+    args = parser.parse_args()
+    logging.disable(logging.ERROR)
+
+    print(json.dumps({
+        "benchmark": "ai_batch",
+        "children": args.children,
+        "batch_size": args.batch_size,
+        "window_ms": args.window_ms,
+        "rate_limit_rpm": args.rate_limit,
+        "results": {"per_child": run(args, False), "batched": run(args, True)}
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""Config-generation latency per child while the AI provider is down or hanging.
+
+Runs AIAgent against the local Gemini stand-in in outage mode and reports
+per-call latency with the circuit breaker against a breaker that never trips
+(the previous behaviour, where every call waited out the full timeout):
+
+    python benchmarks/ai_outage.py --calls 30 --mode hang
+"""
+import argparse
+import contextlib
+import json
+import logging
+import os
+import sys
+import time
+
+from ai_standin import start_standin
+from ws_load import percentiles
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+with contextlib.redirect_stdout(sys.stderr):
+    import ai_agent
+    from circuit_breaker import CircuitBreaker
+
+def run(agent, calls, deadline_seconds):
+    latencies = []
+    for _ in range(calls):
+        started = time.perf_counter()
+        agent.generate_game_config({"age": 6, "special_interest": "shapes"}, [], time.monotonic() + deadline_seconds)
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure config latency during a provider outage")
+    parser.add_argument("--calls", type=int, default=30)
+    parser.add_argument("--mode", choices=["hang", "error"], default="hang",
+                        help="hang: responses slower than any timeout; error: every request fails with 503")
+    parser.add_argument("--timeout", type=float, default=3.0, help="max per-call timeout (GEMINI_TIMEOUT_SECONDS)")
+    parser.add_argument("--deadline", type=float, default=ai_agent.AI_CONFIG_DEADLINE_SECONDS)
+    args = parser.parse_args()
+    logging.disable(logging.ERROR)
+
+    latency, error_rate = (60.0, 0.0) if args.mode == "hang" else (0.0, 1.0)
+    server, state, url = start_standin(latency=latency, error_rate=error_rate)
+    provider = ai_agent.GeminiProvider("standin", url, timeout=args.timeout)
+
+    results = {}
+    for name, breaker in (
+        ("without_breaker", CircuitBreaker("bench_never_trips", failure_threshold=2.0, max_timeout=args.timeout)),
+        ("with_breaker", CircuitBreaker("bench", max_timeout=args.timeout)),
+    ):
+        agent = ai_agent.AIAgent(provider, breaker)
+        started = time.perf_counter()
+        latencies = run(agent, args.calls, args.deadline)
+        results[name] = {
+            "total_seconds": round(time.perf_counter() - started, 3),
+            "latency": percentiles(latencies),
+            "final_state": breaker.state
+        }
+    server.shutdown()
+
+    print(json.dumps({"benchmark": "ai_outage", "mode": args.mode, "calls": args.calls, "results": results}, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""Config throughput under an upstream quota, with and without the AI scheduler.
+
+Replays overlapping clinics against the Gemini stand-in, which answers 429
+once its quota is used up. Time is compressed: the quota covers --period
+seconds instead of a minute, and the scheduler uses the same period.
+
+  - interactive: children connecting over --duration seconds, split unevenly
+    between clinics (one clinic sends most of them)
+  - background: a burst of prefetch requests at the start, with a long deadline
+
+Without the scheduler the burst turns into 429s, the breaker opens, and
+children get the fallback. With it, requests wait for quota inside their
+deadline, and the report shows calls admitted per period, queue waits by
+priority, and each clinic's share:
+
+    python benchmarks/ai_rate_limit.py --quota 10 --period 5 --children 50
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import random
+import sys
+import time
+
+from ai_standin import start_standin
+from ws_load import percentiles
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+with contextlib.redirect_stdout(sys.stderr):
+    import ai_agent
+    from circuit_breaker import CircuitBreaker
+    from rate_limiter import AIScheduler, INTERACTIVE, BACKGROUND
+
+CLINICS = (("clinic_a", 0.6), ("clinic_b", 0.25), ("clinic_c", 0.15))
+
+class RecordingAgent(ai_agent.AIAgent):
+    """Notes which children were served the fallback."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fell_back = set()
+
+    def _fallback_for(self, child_profile, previous_sessions):
+        self.fell_back.add(child_profile["id"])
+        return super()._fallback_for(child_profile, previous_sessions)
+
+def workload(args):
+    rng = random.Random(args.seed)
+    requests = []
+    for index in range(args.children):
+        clinic = rng.choices([name for name, _ in CLINICS], [weight for _, weight in CLINICS])[0]
+        requests.append((rng.uniform(0, args.duration), f"child-{index}", clinic, INTERACTIVE, args.deadline))
+    for index in range(args.background):
+        requests.append((0.0, f"prefetch-{index}", "clinic_a", BACKGROUND, args.background_deadline))
+    return sorted(requests)
+
+def run(args, scheduled):
+    server, state, url = start_standin(latency=args.latency, rate_limit=args.quota, rate_window=args.period)
+    provider = ai_agent.GeminiProvider("standin", url, timeout=5.0, streaming=False)
+    agent = RecordingAgent(provider, CircuitBreaker(f"bench_rate_{scheduled}", reset_timeout=args.period))
+    scheduler = AIScheduler(args.quota if scheduled else 0, period=args.period)
+    admitted = []
+    waits = {INTERACTIVE: [], BACKGROUND: []}
+    served = {}
+
+    async def one(offset, child_id, clinic, priority, deadline_seconds):
+        await asyncio.sleep(offset)
+        started = time.monotonic()
+        deadline = started + deadline_seconds
+        profile = {"id": child_id, "age": 6}
+        if not await scheduler.acquire(ai_agent.estimate_tokens([(profile, [])]), priority, clinic, deadline):
+            agent._fallback_for(profile, [])
+            return
+        waits[priority].append(time.monotonic() - started)
+        admitted.append(time.monotonic() - run_started)
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(ai_agent.ai_executor, agent.generate_game_config, profile, [], deadline)
+        if priority == INTERACTIVE and child_id not in agent.fell_back:
+            served[clinic] = served.get(clinic, 0) + 1
+
+    async def main():
+        await asyncio.gather(*(one(*request) for request in workload(args)))
+
+    run_started = time.monotonic()
+    asyncio.run(main())
+    elapsed = time.monotonic() - run_started
+    server.shutdown()
+
+    requests = workload(args)
+    interactive = [r for r in requests if r[3] == INTERACTIVE]
+    periods = int(elapsed // args.period) + 1
+    per_period = [sum(1 for t in admitted if int(t // args.period) == p) for p in range(periods)]
+    return {
+        "upstream_calls": state.served + state.failed + state.throttled,
+        "upstream_429": state.throttled,
+        "configs_from_ai": state.served,
+        "interactive_fallbacks": sum(1 for r in interactive if r[1] in agent.fell_back),
+        "background_fallbacks": sum(1 for r in requests if r[3] == BACKGROUND and r[1] in agent.fell_back),
+        "admitted_per_period": per_period,
+        "queue_wait_ms": {
+            "interactive": percentiles(waits[INTERACTIVE]),
+            "background": percentiles(waits[BACKGROUND])
+        },
+        "served_by_clinic": {
+            name: {"children": sum(1 for r in interactive if r[2] == name), "served_by_ai": served.get(name, 0)}
+            for name, _ in CLINICS
+        },
+        "elapsed_seconds": round(elapsed, 2)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare config throughput under a quota with and without the scheduler")
+    parser.add_argument("--quota", type=int, default=10, help="stand-in requests allowed per period")
+    parser.add_argument("--period", type=float, default=5.0, help="seconds the quota covers (a minute, compressed)")
+    parser.add_argument("--children", type=int, default=50, help="interactive requests")
+    parser.add_argument("--background", type=int, default=15, help="prefetch requests sent at the start")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds over which children connect")
+    parser.add_argument("--deadline", type=float, default=8.0, help="interactive deadline in seconds")
+    parser.add_argument("--background-deadline", type=float, default=30.0)
+    parser.add_argument("--latency", type=float, default=0.3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    logging.disable(logging.ERROR)
+
+    print(json.dumps({
+        "benchmark": "ai_rate_limit",
+        "quota": f"{args.quota} requests / {args.period}s",
+        "children": args.children,
+        "background": args.background,
+        "results": {"without_scheduler": run(args, False), "with_scheduler": run(args, True)}
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""Local stand-in for the Gemini generateContent API.
+
+Replays recorded responses in order, with configurable latency and error
+rate, so the config path and the whole WebSocket flow can be load-tested
+without network access:
+
+    python benchmarks/ai_standin.py --port 8765 --latency 0.8 --jitter 0.4 --error-rate 0.05
+
+streamGenerateContent?alt=sse is served too: the recorded text is split into
+--chunk-chars pieces sent as SSE events --chunk-delay seconds apart, after
+the initial latency. Unary responses wait for the same total generation time.
+
+Batched prompts ("Number of children: N") are answered with one
+{"configs": [...]} object built from the next N recordings, so longer
+batched output also takes proportionally longer to generate.
+
+Point the backend at it with:
+
+    AI_PROVIDER=gemini GEMINI_API_KEY=standin \
+    GEMINI_API_URL=http://127.0.0.1:8765/v1beta/models/gemini-1.5-flash:generateContent
+
+--rate-limit answers 429 once more than that many requests arrived in the
+last minute (--rate-window seconds), like a per-key quota. Latency and failures come from a seeded RNG, so runs are repeatable.
+"""
+import argparse
+import json
+import os
+import random
+import re
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_RECORDINGS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "recordings", "gemini_generate.json")
+
+class StandinState:
+    """Recorded responses plus the knobs shared by all handler threads."""
+
+    def __init__(self, responses, latency=0.0, jitter=0.0, error_rate=0.0, seed=0, chunk_chars=32, chunk_delay=0.0,
+                 rate_limit=0, rate_window=60.0):
+        self.responses = responses
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.chunk_chars = chunk_chars
+        self.chunk_delay = chunk_delay
+        self.rate_limit = rate_limit  # requests per rate_window seconds, 0 for unlimited
+        self.rate_window = rate_window
+        self.request_times = deque()
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.served = 0
+        self.failed = 0
+        self.throttled = 0
+
+    def next_reply(self, children=1):
+        """Return (delay_seconds, status, body) for the next request, covering `children` configs."""
+        with self.lock:
+            now = time.monotonic()
+            while self.request_times and now - self.request_times[0] >= self.rate_window:
+                self.request_times.popleft()
+            if self.rate_limit and len(self.request_times) >= self.rate_limit:
+                self.throttled += 1
+                return 0.0, 429, {"error": {"code": 429, "message": "Quota exceeded.", "status": "RESOURCE_EXHAUSTED"}}
+            self.request_times.append(now)
+            delay = max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter))
+            if self.random.random() < self.error_rate:
+                self.failed += 1
+                return delay, 503, {"error": {"code": 503, "message": "The model is overloaded.", "status": "UNAVAILABLE"}}
+            responses = [self.responses[(self.served + i) % len(self.responses)] for i in range(children)]
+            self.served += 1
+            if children == 1:
+                return delay, 200, responses[0]
+            return delay, 200, batched_response(responses)
+
+def response_text(response):
+    return response["candidates"][0]["content"]["parts"][0]["text"]
+
+def batched_response(responses):
+    """Combine recorded single-config responses into one batched response."""
+    configs = []
+    for index, response in enumerate(responses):
+        text = response_text(response).strip().strip("`")
+        config = json.loads(text[4:] if text.startswith("json") else text)
+        configs.append({"child": index, **config})
+    text = json.dumps({"configs": configs}, indent=2)
+    return {"candidates": [{"content": {"parts": [{"text": text}], "role": "model"}}]}
+
+def children_in(request_body):
+    """Number of children a batched prompt asks for (1 for a single-child prompt)."""
+    match = re.search(rb"Number of children: (\d+)", request_body)
+    return int(match.group(1)) if match else 1
+
+def make_handler(state):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            request_body = self.rfile.read(length)
+            streaming = ":streamGenerateContent" in self.path
+            if not streaming and ":generateContent" not in self.path:
+                self._reply(404, {"error": {"code": 404, "message": "Not found"}})
+                return
+            delay, status, body = state.next_reply(children_in(request_body))
+            time.sleep(delay)
+            if streaming and status == 200:
+                self._stream(body)
+                return
+            if status == 200 and state.chunk_delay:
+                # A unary response only arrives once the whole text has been generated
+                text = response_text(body)
+                time.sleep(state.chunk_delay * -(-len(text) // state.chunk_chars))
+            self._reply(status, body)
+
+        def _stream(self, body):
+            text = response_text(body)
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.close_connection = True
+            for start in range(0, len(text), state.chunk_chars):
+                chunk = {"candidates": [{"content": {"parts": [{"text": text[start:start + state.chunk_chars]}], "role": "model"}}]}
+                self.wfile.write(f"data: {json.dumps(chunk)}\r\n\r\n".encode())
+                self.wfile.flush()
+                if state.chunk_delay:
+                    time.sleep(state.chunk_delay)
+
+        def _reply(self, status, body):
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            try:
+                self.wfile.write(payload)
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # the client gave up waiting
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+def load_recordings(path=DEFAULT_RECORDINGS):
+    with open(path) as f:
+        return json.load(f)["responses"]
+
+def start_standin(port=0, recordings=DEFAULT_RECORDINGS, latency=0.0, jitter=0.0, error_rate=0.0, seed=0,
+                  chunk_chars=32, chunk_delay=0.0, rate_limit=0, rate_window=60.0):
+    """Serve in a background thread; returns (server, state, generateContent url)."""
+    state = StandinState(load_recordings(recordings), latency, jitter, error_rate, seed, chunk_chars, chunk_delay,
+                         rate_limit, rate_window)
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(state))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/v1beta/models/gemini-1.5-flash:generateContent"
+    return server, state, url
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded Gemini responses locally")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--recordings", default=DEFAULT_RECORDINGS, help="JSON file with a 'responses' list")
+    parser.add_argument("--latency", type=float, default=0.0, help="mean response delay in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="uniform +/- jitter on the delay in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 503")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chunk-chars", type=int, default=32, help="characters per streamed SSE event")
+    parser.add_argument("--chunk-delay", type=float, default=0.0, help="seconds between streamed events")
+    parser.add_argument("--rate-limit", type=int, default=0, help="requests per minute before answering 429 (0: no limit)")
+    parser.add_argument("--rate-window", type=float, default=60.0, help="seconds the --rate-limit quota covers")
+    args = parser.parse_args()
+
+    server, state, url = start_standin(args.port, args.recordings, args.latency, args.jitter, args.error_rate,
+                                       args.seed, args.chunk_chars, args.chunk_delay, args.rate_limit, args.rate_window)
+    print(f"Gemini stand-in listening at {url}", flush=True)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+        print(json.dumps({"served": state.served, "failed": state.failed, "throttled": state.throttled}))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""Fallback rate and validation cost for imperfect AI config output.
+
+Builds a corpus of model responses with the defects seen in practice (prose
+around the JSON, trailing commas, truncation, out-of-range values, missing
+fields, loose types, unknown shapes) and compares:
+
+  before: strip code fences + json.loads; any parse error means the
+          fallback, anything that parses is served unchecked
+  after:  config_schema.validate_config (fast path, then repair)
+
+It then replays the same corpus through the Gemini stand-in, streamed and
+unary, to count fallbacks end to end:
+
+    python benchmarks/config_repair.py --iterations 2000
+"""
+import argparse
+import contextlib
+import json
+import logging
+import os
+import re
+import sys
+import tempfile
+import time
+
+from ai_standin import start_standin, load_recordings
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+with contextlib.redirect_stdout(sys.stderr):
+    import ai_agent
+    from circuit_breaker import CircuitBreaker
+    from config_schema import GameConfig, ConfigRepairError, validate_config
+    from metrics import ai_config_fallbacks_total
+
+def build_corpus():
+    """(name, text) pairs derived from a recorded clean response."""
+    clean = load_recordings()[0]["candidates"][0]["content"]["parts"][0]["text"]
+    body = clean.strip().strip("`")[len("json"):].strip()
+
+    def variant(**changes):
+        data = json.loads(body)
+        for key, value in changes.items():
+            if key == "level":
+                data["level_config"].update(value)
+            elif value is None:
+                data.pop(key)
+            else:
+                data[key] = value
+        return json.dumps(data, indent=2)
+
+    return [
+        ("clean", clean),
+        ("prose_wrapped", "Here is the personalized configuration:\n" + body + "\nLet me know if you need changes!"),
+        ("trailing_commas", re.sub(r"(\]|\d|true)\n", r"\1,\n", body)),
+        ("truncated", body[:int(len(body) * 0.7)]),
+        ("out_of_range", variant(level={"difficulty": 9, "animation_speed": 5}, session_duration=90)),
+        ("missing_fields", variant(session_duration=None, motivation_elements=None)),
+        ("loose_types", variant(level={"difficulty": "medium", "sounds": "yes", "shapes": "circles, star"})),
+        ("unknown_shapes", variant(level={"shapes": ["hexagon", "circle", "Triangle"]})),
+        ("refusal", "I'm sorry, I can't generate that configuration."),
+    ]
+
+def old_parse(text):
+    cleaned = text.strip()
+    if cleaned.startswith("```json"):
+        cleaned = cleaned[7:]
+    if cleaned.startswith("```"):
+        cleaned = cleaned[3:]
+    if cleaned.endswith("```"):
+        cleaned = cleaned[:-3]
+    return json.loads(cleaned.strip())
+
+def classify(corpus):
+    results = {}
+    for name, text in corpus:
+        try:
+            config = old_parse(text)
+            try:
+                GameConfig.model_validate(config)
+                before = "valid"
+            except Exception:
+                before = "served_invalid"
+        except ValueError:
+            before = "fallback"
+        try:
+            _, repairs = validate_config(text)
+            after = "repaired" if repairs else "valid"
+        except ConfigRepairError:
+            after = "fallback"
+        results[name] = {"before": before, "after": after}
+    return results
+
+def time_validation(corpus, iterations):
+    timings = {}
+    for name, text in corpus:
+        started = time.perf_counter()
+        for _ in range(iterations):
+            try:
+                validate_config(text)
+            except ConfigRepairError:
+                pass
+        timings[name] = round((time.perf_counter() - started) / iterations * 1e6, 1)
+    return timings
+
+def fallbacks():
+    return sum(child.value for child in ai_config_fallbacks_total.children.values())
+
+def end_to_end(corpus, rounds):
+    recordings = {"responses": [
+        {"candidates": [{"content": {"parts": [{"text": text}], "role": "model"}}]} for _, text in corpus
+    ]}
+    with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as f:
+        json.dump(recordings, f)
+    results = {}
+    try:
+        for streaming in (False, True):
+            server, state, url = start_standin(recordings=f.name, chunk_chars=48)
+            provider = ai_agent.GeminiProvider("standin", url, timeout=5.0, streaming=streaming)
+            agent = ai_agent.AIAgent(provider, CircuitBreaker(f"bench_repair_{streaming}", failure_threshold=2.0))
+            calls = len(corpus) * rounds
+            before = fallbacks()
+            for _ in range(calls):
+                config = dict(agent.stream_game_config({"age": 6}, []))
+                GameConfig.model_validate(config)
+            results["streamed" if streaming else "unary"] = {"calls": calls, "fallbacks": int(fallbacks() - before)}
+            server.shutdown()
+    finally:
+        os.unlink(f.name)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure config validation and repair")
+    parser.add_argument("--iterations", type=int, default=2000, help="validations per corpus entry for timing")
+    parser.add_argument("--rounds", type=int, default=3, help="passes over the corpus through the stand-in")
+    args = parser.parse_args()
+    logging.disable(logging.ERROR)
+
+    corpus = build_corpus()
+    cases = classify(corpus)
+    summary = {
+        side: {outcome: sum(1 for case in cases.values() if case[side] == outcome)
+               for outcome in ("valid", "repaired", "served_invalid", "fallback")}
+        for side in ("before", "after")
+    }
+    print(json.dumps({
+        "benchmark": "config_repair",
+        "corpus": len(corpus),
+        "cases": cases,
+        "summary": summary,
+        "validate_us": time_validation(corpus, args.iterations),
+        "end_to_end": end_to_end(corpus, args.rounds)
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()
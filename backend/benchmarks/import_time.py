@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""Backend import time and time to first served request.
+
+Runs `python -X importtime -c "import main"` in fresh interpreters and
+reports the median total and the modules with the largest cumulative
+import time, then starts uvicorn and measures how long it takes until GET /
+answers (import, lifespan startup and socket bind):
+
+    python benchmarks/import_time.py --runs 5 --top 15
+
+The database is an in-memory SQLite URL, so no connection is involved.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+from ws_load import BACKEND_DIR, free_port, git_revision
+
+def import_profile():
+    """One `-X importtime` run: {module: cumulative_us} for main and the modules it imports directly."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=BACKEND_DIR, env=dict(os.environ), capture_output=True, text=True, check=True
+    )
+    # Children are listed before their parent, two columns deeper
+    entries = []
+    for line in result.stderr.splitlines():
+        fields = line[len("import time:"):].split("|")
+        if not line.startswith("import time:") or len(fields) != 3 or not fields[0].strip().isdigit():
+            continue
+        name = fields[2].rstrip()
+        entries.append((len(name) - len(name.lstrip()), name.strip(), int(fields[1])))
+    modules = {}
+    for index, (indent, name, cumulative_us) in enumerate(entries):
+        if name != "main":
+            continue
+        modules["main"] = cumulative_us
+        for child_indent, child, child_us in reversed(entries[:index]):
+            if child_indent <= indent:
+                break
+            if child_indent == indent + 2:
+                modules[child] = child_us
+    return modules, {name for _, name, _ in entries}
+
+def time_to_ready(timeout=30.0):
+    """Seconds from spawning uvicorn until GET / returns 200."""
+    port = free_port()
+    started = time.monotonic()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=dict(os.environ), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        while time.monotonic() - started < timeout:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=1) as response:
+                    if response.status == 200:
+                        return time.monotonic() - started
+            except OSError:
+                time.sleep(0.01)
+        raise RuntimeError("Backend did not start")
+    finally:
+        server.terminate()
+        server.wait()
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure backend import time and time to first request")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="modules to list, by cumulative import time")
+    parser.add_argument("--skip-server", action="store_true", help="only measure imports")
+    args = parser.parse_args()
+    os.environ["DATABASE_URL"] = "sqlite://"
+
+    profiles = [import_profile() for _ in range(args.runs)]
+    runs = [modules for modules, _ in profiles]
+    loaded = profiles[0][1]
+    top = sorted(
+        ((name, statistics.median(run[name] for run in runs if name in run) / 1000) for name in runs[0] if name != "main"),
+        key=lambda item: item[1], reverse=True
+    )[:args.top]
+
+    report = {
+        "benchmark": "import_time",
+        "revision": git_revision(),
+        "runs": args.runs,
+        "import_main_ms": round(statistics.median(run["main"] for run in runs) / 1000, 1),
+        "top_imports_ms": {name: round(ms, 1) for name, ms in top},
+        # Client libraries that should only load once a gateway or provider is actually used
+        "deferred_modules_loaded": sorted(name for name in ("httpx", "redis") if name in loaded)
+    }
+    if not args.skip_server:
+        report["time_to_ready_ms"] = round(statistics.median(time_to_ready() for _ in range(args.runs)) * 1000, 1)
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
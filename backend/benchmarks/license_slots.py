@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""Concurrency check for license-slot accounting in POST /children/create.
+
+Starts the backend with several worker processes against a local database,
+fires many concurrent child creations for one user whose license has a fixed
+number of slots, and verifies the license was never oversubscribed:
+
+    python benchmarks/license_slots.py --slots 25 --requests 200 --workers 4
+
+Exits non-zero if more children were created than the license allows, or if
+used_slots disagrees with the number of children. Prints a JSON report with
+status counts and request throughput.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+from ws_load import BACKEND_DIR, free_port, git_revision, percentiles, use_sqlite_uuid_columns, wait_for_server
+
+def seed_user(slots):
+    """Create a user whose license has `slots` slots; returns (user_id, email)."""
+    if os.environ["DATABASE_URL"].startswith("sqlite"):
+        use_sqlite_uuid_columns()
+    with contextlib.redirect_stdout(sys.stderr):
+        import database
+        from models import User, LicenseUsage
+
+    database.engine.echo = False
+    database.Base.metadata.create_all(bind=database.engine)
+
+    db = database.SessionLocal()
+    try:
+        email = f"slots-{uuid.uuid4().hex[:8]}@example.com"
+        user = User(email=email, password="x", role="doctor")
+        db.add(user)
+        db.flush()
+        db.add(LicenseUsage(user_id=user.id, role="doctor", total_slots=slots, used_slots=0))
+        db.commit()
+        return user.id, email
+    finally:
+        db.close()
+
+def count_usage(user_id):
+    """Return (used_slots, children) for the user after the run."""
+    import database
+    from models import LicenseUsage, ChildProfile
+
+    db = database.SessionLocal()
+    try:
+        license_usage = db.query(LicenseUsage).filter(LicenseUsage.user_id == user_id).first()
+        children = db.query(ChildProfile).filter(ChildProfile.user_id == user_id).count()
+        return license_usage.used_slots, children
+    finally:
+        db.close()
+
+async def hammer(port, token, requests, concurrency):
+    import httpx
+    statuses = {}
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=60) as client:
+        async def create(i):
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.post("/children/create", headers=headers, json={
+                    "name": f"Child {i}",
+                    "age": 6,
+                    "gender": "other",
+                    "special_interest": "shapes"
+                })
+                latencies.append(time.perf_counter() - started)
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(create(i) for i in range(requests)))
+        elapsed = time.perf_counter() - started
+
+    return statuses, latencies, elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description="Hammer /children/create and check slot accounting")
+    parser.add_argument("--slots", type=int, default=25, help="license slots for the test user")
+    parser.add_argument("--requests", type=int, default=200, help="total create requests")
+    parser.add_argument("--concurrency", type=int, default=50, help="requests in flight at once")
+    parser.add_argument("--workers", type=int, default=4, help="uvicorn worker processes")
+    parser.add_argument("--database-url", default=None, help="defaults to a temporary SQLite file")
+    args = parser.parse_args()
+
+    tmpdir = tempfile.TemporaryDirectory()
+    database_url = args.database_url or f"sqlite:///{os.path.join(tmpdir.name, 'slots.db')}"
+    os.environ["DATABASE_URL"] = database_url
+    port = free_port()
+
+    user_id, email = seed_user(args.slots)
+    from auth import create_access_token
+    token = create_access_token({"email": email})
+
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(args.workers), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env=dict(os.environ),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+    try:
+        asyncio.run(wait_for_server(port))
+        statuses, latencies, elapsed = asyncio.run(hammer(port, token, args.requests, args.concurrency))
+    finally:
+        server.terminate()
+        server.wait()
+
+    used_slots, children = count_usage(user_id)
+    tmpdir.cleanup()
+
+    oversubscribed = children > args.slots or used_slots != children
+    report = {
+        "benchmark": "license_slots",
+        "revision": git_revision(),
+        "config": {
+            "slots": args.slots,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "workers": args.workers,
+            "database": database_url.split(":", 1)[0]
+        },
+        "statuses": {str(code): count for code, count in sorted(statuses.items())},
+        "used_slots": used_slots,
+        "children_created": children,
+        "oversubscribed": oversubscribed,
+        "requests_per_second": round(args.requests / elapsed, 1),
+        "latency": percentiles(latencies)
+    }
+    print(json.dumps(report, indent=2))
+    sys.exit(1 if oversubscribed else 0)
+
+if __name__ == "__main__":
+    main()
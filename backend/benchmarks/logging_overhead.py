@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""Caller-side cost of per-message logging on the WebSocket path.
+
+Compares the previous pattern (synchronous stream handler, every control
+message logged at INFO with its full payload) against logging_config
+(queue-backed writer, sampled per-message records, truncated payloads):
+
+    python benchmarks/logging_overhead.py --messages 20000
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import logging_config
+
+MESSAGE = {
+    "type": "control_command",
+    "control": {"action": "adjust_settings", "settings": {"shapes": ["circle", "square", "triangle"] * 20}},
+    "timestamp": "2024-01-01T09:00:00"
+}
+
+def legacy(logger, messages):
+    for i in range(messages):
+        logger.info(f"Control command received for child-{i % 50}: {MESSAGE}")
+
+def current(logger, messages):
+    for i in range(messages):
+        if logging_config.should_log(logger, logging.DEBUG, "ws.control_command"):
+            logger.debug(f"Control command received for child-{i % 50}: {logging_config.summarize(MESSAGE['control'])}")
+
+def timed(fn, logger, messages):
+    started = time.perf_counter()
+    fn(logger, messages)
+    return round((time.perf_counter() - started) * 1000, 2)
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure logging overhead on the message path")
+    parser.add_argument("--messages", type=int, default=20000)
+    args = parser.parse_args()
+
+    devnull = open(os.devnull, "w")
+    root = logging.getLogger()
+
+    # Previous setup: basicConfig(level=INFO) writing synchronously
+    root.handlers = [logging.StreamHandler(devnull)]
+    root.setLevel(logging.INFO)
+    legacy_ms = timed(legacy, logging.getLogger("bench"), args.messages)
+
+    # Current setup at the default INFO level and with DEBUG enabled (sampled)
+    root.handlers = []
+    listener = logging_config.setup_logging(level="INFO")
+    listener.handlers = (logging.StreamHandler(devnull),)
+    info_ms = timed(current, logging.getLogger("bench"), args.messages)
+    root.setLevel(logging.DEBUG)
+    debug_ms = timed(current, logging.getLogger("bench"), args.messages)
+    logging_config.stop_logging()
+
+    print(json.dumps({
+        "benchmark": "logging_overhead",
+        "messages": args.messages,
+        "legacy_ms": legacy_ms,
+        "current_info_ms": info_ms,
+        "current_debug_sampled_ms": debug_ms
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""Query-count check for GET /user/profile.
+
+Seeds a user with a license and several children in a temporary SQLite
+database (or --database-url), calls the endpoint in-process and asserts the
+whole request costs exactly one SQL round-trip:
+
+    python benchmarks/profile_queries.py
+"""
+import argparse
+import contextlib
+import json
+import os
+import sys
+import tempfile
+import uuid
+
+from ws_load import use_sqlite_uuid_columns
+
+EXPECTED_QUERIES = 1
+
+def main():
+    parser = argparse.ArgumentParser(description="Count SQL statements issued by /user/profile")
+    parser.add_argument("--children", type=int, default=5)
+    parser.add_argument("--database-url", default=None, help="defaults to a temporary SQLite file")
+    args = parser.parse_args()
+
+    tmpdir = tempfile.TemporaryDirectory()
+    os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{os.path.join(tmpdir.name, 'profile.db')}"
+    if os.environ["DATABASE_URL"].startswith("sqlite"):
+        use_sqlite_uuid_columns()
+
+    with contextlib.redirect_stdout(sys.stderr):
+        import database
+        import main as app_module
+        from auth import create_access_token
+        from models import User, LicenseUsage, ChildProfile
+    from fastapi.testclient import TestClient
+    from sqlalchemy import event
+
+    database.engine.echo = False
+    database.Base.metadata.create_all(bind=database.engine)
+
+    db = database.SessionLocal()
+    email = f"profile-{uuid.uuid4().hex[:8]}@example.com"
+    user = User(email=email, password="x", role="parent")
+    db.add(user)
+    db.flush()
+    db.add(LicenseUsage(user_id=user.id, role="parent", total_slots=10, used_slots=args.children))
+    for i in range(args.children):
+        db.add(ChildProfile(user_id=user.id, name=f"Child {i}", age=6, gender="other"))
+    db.commit()
+    db.close()
+
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    client = TestClient(app_module.app)
+    headers = {"Authorization": f"Bearer {create_access_token({'email': email})}"}
+
+    event.listen(database.engine, "before_cursor_execute", record)
+    response = client.get("/user/profile", headers=headers)
+    event.remove(database.engine, "before_cursor_execute", record)
+    tmpdir.cleanup()
+
+    body = response.json()
+    ok = (
+        response.status_code == 200
+        and len(body["children"]) == args.children
+        and body["license"]["total_slots"] == 10
+        and len(statements) == EXPECTED_QUERIES
+    )
+    print(json.dumps({
+        "benchmark": "profile_queries",
+        "status_code": response.status_code,
+        "queries": len(statements),
+        "expected_queries": EXPECTED_QUERIES,
+        "ok": ok
+    }, indent=2))
+    if not ok:
+        for statement in statements:
+            print(statement, file=sys.stderr)
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""Micro-benchmark for JSON serialization on the hot paths.
+
+1. A /reports/{child_id} payload with 5k sessions: the previous path (str(uuid)
+   and .isoformat() per row, jsonable_encoder, stdlib json) against the shared
+   serializer encoding raw UUID/datetime values.
+2. 1k GameManager broadcasts to a handful of caretakers with each serializer.
+
+    python benchmarks/serialization.py
+"""
+import asyncio
+import json
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder
+
+import serialization
+from game_manager import GameManager
+
+SESSIONS = 5000
+BROADCASTS = 1000
+CARETAKERS = 5
+REPEAT = 5
+
+def build_sessions():
+    started = datetime(2024, 1, 1, 9, 0, 0)
+    return [
+        {
+            "id": uuid.uuid4(),
+            "level": i % 5 + 1,
+            "completion_time": 42.5 + i % 7,
+            "errors": i % 4,
+            "reaction_time": 1.25 + (i % 10) / 10,
+            "surprise_triggered": "color_change",
+            "abandoned": i % 13 == 0,
+            "created_at": started + timedelta(minutes=i)
+        }
+        for i in range(SESSIONS)
+    ]
+
+def legacy_reports(sessions):
+    """Previous path: per-row string conversion, jsonable_encoder, stdlib json."""
+    payload = {
+        "child": {"id": str(uuid.uuid4()), "name": "Bench", "age": 6, "diagnosis_status": "unconfirmed"},
+        "sessions": [
+            {**session, "id": str(session["id"]), "created_at": session["created_at"].isoformat()}
+            for session in sessions
+        ],
+        "reports": []
+    }
+    return json.dumps(jsonable_encoder(payload), separators=(",", ":")).encode()
+
+def fast_reports(sessions):
+    """New path: raw UUID/datetime values through the shared serializer."""
+    payload = {
+        "child": {"id": uuid.uuid4(), "name": "Bench", "age": 6, "diagnosis_status": "unconfirmed"},
+        "sessions": sessions,
+        "reports": []
+    }
+    return serialization.dumps(payload)
+
+def best_of(fn, *args):
+    timings = []
+    for _ in range(REPEAT):
+        started = time.perf_counter()
+        fn(*args)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+class NullSocket:
+    async def send_text(self, text):
+        pass
+
+async def broadcast_run():
+    manager = GameManager()
+    for _ in range(CARETAKERS):
+        await manager.add_connection("bench-child", NullSocket(), "caretaker")
+    message = {
+        "type": "game_event",
+        "session_id": str(uuid.uuid4()),
+        "child_id": "bench-child",
+        "event": {"type": "correct_match", "shape": {"id": 3, "shape": "circle", "color": "red"}, "reactionTime": 812},
+        "timestamp": datetime.utcnow().isoformat()
+    }
+    started = time.perf_counter()
+    for _ in range(BROADCASTS):
+        await manager.broadcast_to_caretakers("bench-child", message)
+    return time.perf_counter() - started
+
+if __name__ == "__main__":
+    import logging
+    logging.disable(logging.INFO)
+
+    sessions = build_sessions()
+    results = {
+        "reports_5k": {
+            "legacy_ms": round(best_of(legacy_reports, sessions) * 1000, 2),
+        },
+        "broadcast_1k": {}
+    }
+    for name in serialization.SERIALIZERS:
+        serialization.set_serializer(name)
+        results["reports_5k"][f"{name}_ms"] = round(best_of(fast_reports, sessions) * 1000, 2)
+        results["broadcast_1k"][f"{name}_ms"] = round(min(asyncio.run(broadcast_run()) for _ in range(REPEAT)) * 1000, 2)
+
+    print(json.dumps({"benchmark": "serialization", "results": results}, indent=2))
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""Memory benchmark: bytes per in-memory game session, legacy dicts vs GameSession."""
+import os
+import sys
+import time
+import uuid
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from game_manager import GameSession
+
+SESSIONS = 200
+EVENTS_PER_SESSION = 2000
+
+CONFIG = {
+    "level_config": {"difficulty": 2, "shapes": ["circle", "square"], "colors": ["red", "blue"]},
+    "session_duration": 10
+}
+
+def make_event(i):
+    return {"type": "drag", "shape": {"id": i % 8}, "x": i % 640, "y": i % 480}
+
+def build_legacy_session(child_id):
+    """The dict-based layout GameManager used before GameSession."""
+    session = {
+        "session_id": str(uuid.uuid4()),
+        "child_id": child_id,
+        "config": CONFIG,
+        "started_at": datetime.utcnow().isoformat(),
+        "events": [],
+        "status": "active"
+    }
+    for i in range(EVENTS_PER_SESSION):
+        event = make_event(i)
+        event["timestamp"] = datetime.utcnow().isoformat()
+        session["events"].append(event)
+    return session
+
+def build_compact_session(child_id):
+    session = GameSession(
+        session_id=str(uuid.uuid4()),
+        child_id=child_id,
+        config=CONFIG,
+        started_at=time.monotonic()
+    )
+    for i in range(EVENTS_PER_SESSION):
+        session.events.append(time.monotonic(), make_event(i))
+    return session
+
+def measure(builder):
+    """Return bytes allocated per session by builder."""
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    sessions = [builder(f"child-{i}") for i in range(SESSIONS)]
+    current = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del sessions
+    return (current - baseline) / SESSIONS
+
+if __name__ == "__main__":
+    legacy = measure(build_legacy_session)
+    compact = measure(build_compact_session)
+    print(f"Sessions: {SESSIONS}, events per session: {EVENTS_PER_SESSION}")
+    print(f"Legacy dict session:  {legacy:,.0f} bytes/session")
+    print(f"Compact GameSession:  {compact:,.0f} bytes/session")
+    print(f"Reduction:            {(1 - compact / legacy) * 100:.1f}%")
@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+"""Load generator for the /ws/{child_id} real-time path.
+
+Starts the backend in a subprocess against a local database, connects
+simulated children and caretakers, and prints a JSON report:
+
+    python benchmarks/ws_load.py --children 50 --caretakers 2 --messages 200 > run.json
+
+Game configs come from the rule-based local provider by default, or from the
+Gemini provider talking to the local stand-in (benchmarks/ai_standin.py) with
+--ai standin --ai-latency 0.8 --ai-error-rate 0.05. Neither needs network.
+
+Metrics reported (all latencies in milliseconds):
+- connect:    child connect -> session_start received (time to first playable shape)
+- config:     child connect -> complete config (session_start, plus config_update when streamed)
+- round_trip: caretaker control_command -> child -> game_event back at the caretaker
+- fan_out:    child game_event -> delivery at each caretaker
+- memory:     server RSS growth per open connection
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+def percentiles(samples):
+    """Summarize latency samples (seconds) as milliseconds."""
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+
+    def pick(q):
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 3)
+
+    return {
+        "count": len(ordered),
+        "mean": round(sum(ordered) / len(ordered) * 1000, 3),
+        "p50": pick(0.50),
+        "p95": pick(0.95),
+        "p99": pick(0.99),
+        "max": round(ordered[-1] * 1000, 3)
+    }
+
+def use_sqlite_uuid_columns():
+    """Let the PostgreSQL UUID columns be created on SQLite for local runs."""
+    from sqlalchemy.dialects.postgresql import UUID
+    from sqlalchemy.ext.compiler import compiles
+
+    @compiles(UUID, "sqlite")
+    def compile_uuid(type_, compiler, **kw):
+        return "CHAR(32)"
+
+def seed_database(children):
+    """Create tables plus one user owning `children` child profiles; returns child ids."""
+    if os.environ["DATABASE_URL"].startswith("sqlite"):
+        use_sqlite_uuid_columns()
+    # Keep stdout clean for the JSON report
+    with contextlib.redirect_stdout(sys.stderr):
+        import database
+        from models import User, ChildProfile
+
+    database.engine.echo = False
+    database.Base.metadata.create_all(bind=database.engine)
+
+    db = database.SessionLocal()
+    try:
+        user = User(email=f"loadtest-{uuid.uuid4().hex[:8]}@example.com", password="x", role="doctor")
+        db.add(user)
+        db.flush()
+        child_ids = []
+        for i in range(children):
+            child = ChildProfile(
+                id=uuid.uuid4(),
+                user_id=user.id,
+                name=f"Load Child {i}",
+                age=6,
+                gender="other",
+                special_interest="shapes"
+            )
+            db.add(child)
+            child_ids.append(str(child.id))
+        db.commit()
+        return child_ids
+    finally:
+        db.close()
+
+def serve(port):
+    """Run the backend (subprocess entry point); the AI provider comes from the environment."""
+    import logging
+    if os.environ["DATABASE_URL"].startswith("sqlite"):
+        use_sqlite_uuid_columns()
+
+    import uvicorn
+    import database
+    import main
+    database.engine.echo = False
+    logging.getLogger().setLevel(logging.WARNING)
+    uvicorn.run(main.app, host="127.0.0.1", port=port, log_level="warning")
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def rss_bytes(pid):
+    """Resident set size of a process, from /proc (Linux only)."""
+    try:
+        with open(f"/proc/{pid}/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        return None
+
+async def wait_for_server(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            _, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.close()
+            return
+        except OSError:
+            await asyncio.sleep(0.1)
+    raise RuntimeError("Backend did not start")
+
+async def receive_until(ws, message_type):
+    while True:
+        message = json.loads(await ws.recv())
+        if message.get("type") == message_type:
+            return message
+
+async def run_child(url, child_id, results):
+    """Connect a child and time how long until its session starts and its config is complete."""
+    import websockets
+    started = time.perf_counter()
+    ws = await websockets.connect(f"{url}/ws/{child_id}?type=child", max_size=None)
+    message = await receive_until(ws, "session_start")
+    results["connect"].append(time.perf_counter() - started)
+    # A streamed config starts with level_config alone; the rest follows as config_update
+    if set(message.get("config", {})) == {"level_config"}:
+        await receive_until(ws, "config_update")
+    results["config"].append(time.perf_counter() - started)
+    return ws
+
+async def child_loop(ws):
+    """Answer caretaker probes with a game_event echo until the socket closes."""
+    try:
+        async for raw in ws:
+            message = json.loads(raw)
+            if message.get("type") == "ping":
+                await ws.send(json.dumps({"type": "pong"}))
+            elif message.get("type") == "control_command" and "probe_id" in message.get("control", {}):
+                control = message["control"]
+                await ws.send(json.dumps({
+                    "type": "game_event",
+                    "event": {"type": "probe_echo", "probe_id": control["probe_id"], "sent_at": control["sent_at"]}
+                }))
+    except Exception:
+        pass
+
+async def caretaker_loop(ws, results, pending_probes):
+    """Record fan-out and round-trip latencies for messages reaching a caretaker."""
+    try:
+        async for raw in ws:
+            received = time.perf_counter()
+            message = json.loads(raw)
+            if message.get("type") == "ping":
+                await ws.send(json.dumps({"type": "pong"}))
+            elif message.get("type") == "game_event":
+                event = message.get("event", {})
+                if event.get("type") == "tap":
+                    results["fan_out"].append(received - event["sent_at"])
+                elif event.get("type") == "probe_echo" and event["probe_id"] in pending_probes:
+                    pending_probes.discard(event["probe_id"])
+                    results["round_trip"].append(received - event["sent_at"])
+    except Exception:
+        pass
+
+async def drive(args, child_ids, server_pid):
+    import websockets
+    url = f"ws://127.0.0.1:{args.port}"
+    results = {"connect": [], "config": [], "round_trip": [], "fan_out": [], "connect_errors": 0}
+
+    rss_before = rss_bytes(server_pid)
+
+    # Children connect concurrently, as a morning block of sessions would
+    child_sockets = await asyncio.gather(
+        *(run_child(url, child_id, results) for child_id in child_ids),
+        return_exceptions=True
+    )
+    connected = [(cid, ws) for cid, ws in zip(child_ids, child_sockets) if not isinstance(ws, Exception)]
+    results["connect_errors"] = len(child_ids) - len(connected)
+
+    caretakers = {}
+    for child_id, _ in connected:
+        caretakers[child_id] = []
+        for _ in range(args.caretakers):
+            ws = await websockets.connect(f"{url}/ws/{child_id}?type=caretaker", max_size=None)
+            await receive_until(ws, "connection_confirmed")
+            caretakers[child_id].append(ws)
+
+    rss_after = rss_bytes(server_pid)
+    connection_count = len(connected) * (1 + args.caretakers)
+
+    pending_probes = set()
+    listeners = [asyncio.create_task(child_loop(ws)) for _, ws in connected]
+    listeners += [
+        asyncio.create_task(caretaker_loop(ws, results, pending_probes))
+        for group in caretakers.values() for ws in group
+    ]
+
+    interval = 1.0 / args.rate if args.rate > 0 else 0
+
+    async def child_traffic(child_ws, child_caretakers):
+        for i in range(args.messages):
+            await child_ws.send(json.dumps({
+                "type": "game_event",
+                "event": {"type": "tap", "sent_at": time.perf_counter()}
+            }))
+            if child_caretakers and i % args.probe_every == 0:
+                probe_id = uuid.uuid4().hex
+                pending_probes.add(probe_id)
+                await child_caretakers[0].send(json.dumps({
+                    "type": "control_command",
+                    "control": {"action": "probe", "probe_id": probe_id, "sent_at": time.perf_counter()}
+                }))
+            if interval:
+                await asyncio.sleep(interval)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(child_traffic(ws, caretakers[cid]) for cid, ws in connected))
+    # Give in-flight messages a moment to land before closing
+    await asyncio.sleep(args.drain)
+    elapsed = time.perf_counter() - started
+
+    for task in listeners:
+        task.cancel()
+    for _, ws in connected:
+        await ws.close()
+    for group in caretakers.values():
+        for ws in group:
+            await ws.close()
+
+    memory = {"rss_before": rss_before, "rss_after": rss_after, "connections": connection_count}
+    if rss_before is not None and rss_after is not None and connection_count:
+        memory["bytes_per_connection"] = round((rss_after - rss_before) / connection_count)
+
+    return {
+        "connect": percentiles(results["connect"]),
+        "config": percentiles(results["config"]),
+        "connect_errors": results["connect_errors"],
+        "round_trip": percentiles(results["round_trip"]),
+        "round_trip_lost": len(pending_probes),
+        "fan_out": percentiles(results["fan_out"]),
+        "messages_sent": len(connected) * args.messages,
+        "duration_seconds": round(elapsed, 3),
+        "memory": memory
+    }
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the /ws/{child_id} endpoint")
+    parser.add_argument("--children", type=int, default=20, help="simulated children")
+    parser.add_argument("--caretakers", type=int, default=2, help="caretakers per child")
+    parser.add_argument("--messages", type=int, default=100, help="game events sent per child")
+    parser.add_argument("--rate", type=float, default=20, help="game events per second per child (0 = unthrottled)")
+    parser.add_argument("--probe-every", type=int, default=10, help="send a round-trip probe every N events")
+    parser.add_argument("--ai", choices=["local", "standin"], default="local",
+                        help="rule-based local provider, or Gemini provider against the local stand-in")
+    parser.add_argument("--ai-latency", type=float, default=0.0, help="mean stand-in response delay in seconds")
+    parser.add_argument("--ai-jitter", type=float, default=0.0, help="stand-in delay jitter in seconds")
+    parser.add_argument("--ai-error-rate", type=float, default=0.0, help="fraction of stand-in requests that fail")
+    parser.add_argument("--ai-chunk-delay", type=float, default=0.0, help="stand-in delay between streamed chunks")
+    parser.add_argument("--no-ai-stream", action="store_true", help="use unary generateContent instead of streaming")
+    parser.add_argument("--drain", type=float, default=1.0, help="seconds to wait for in-flight messages")
+    parser.add_argument("--database-url", default=None, help="defaults to a temporary SQLite file")
+    parser.add_argument("--port", type=int, default=None)
+    parser.add_argument("--output", default=None, help="write the JSON report here instead of stdout")
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.port)
+        return
+
+    tmpdir = tempfile.TemporaryDirectory()
+    database_url = args.database_url or f"sqlite:///{os.path.join(tmpdir.name, 'loadtest.db')}"
+    os.environ["DATABASE_URL"] = database_url
+    args.port = args.port or free_port()
+
+    child_ids = seed_database(args.children)
+
+    env = dict(os.environ)
+    standin = None
+    if args.ai == "standin":
+        from ai_standin import start_standin
+        standin, standin_state, standin_url = start_standin(
+            latency=args.ai_latency, jitter=args.ai_jitter, error_rate=args.ai_error_rate,
+            chunk_delay=args.ai_chunk_delay
+        )
+        env.update(AI_PROVIDER="gemini", GEMINI_API_KEY="standin", GEMINI_API_URL=standin_url,
+                   GEMINI_STREAMING="false" if args.no_ai_stream else "true")
+    else:
+        env["AI_PROVIDER"] = "local"
+
+    server = subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), "--serve", "--port", str(args.port)],
+        cwd=BACKEND_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL
+    )
+    try:
+        asyncio.run(wait_for_server(args.port))
+        metrics = asyncio.run(drive(args, child_ids, server.pid))
+    finally:
+        server.terminate()
+        server.wait()
+        tmpdir.cleanup()
+        if standin is not None:
+            standin.shutdown()
+            metrics_ai = {"served": standin_state.served, "failed": standin_state.failed}
+
+    report = {
+        "benchmark": "ws_load",
+        "revision": git_revision(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "config": {
+            "children": args.children,
+            "caretakers_per_child": args.caretakers,
+            "messages_per_child": args.messages,
+            "rate": args.rate,
+            "ai": args.ai,
+            "ai_latency": args.ai_latency,
+            "ai_error_rate": args.ai_error_rate,
+            "ai_chunk_delay": args.ai_chunk_delay,
+            "ai_stream": not args.no_ai_stream,
+            "database": database_url.split(":", 1)[0]
+        },
+        "metrics": metrics
+    }
+    if standin is not None:
+        report["standin"] = metrics_ai
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Any, Dict, Iterable, Optional, Set
+from fastapi import Request, Response
+from serialization import dumps
+from settings import Settings, get_settings
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+# Default lifetime of a cached response, in seconds
+DEFAULT_TTL_SECONDS = settings.response_cache_ttl
+
+# Upper bound on entries held by the in-memory backend
+MAX_MEMORY_ENTRIES = settings.response_cache_max_entries
+
+# How long to wait for Redis at startup before falling back to memory
+REDIS_CONNECT_TIMEOUT_SECONDS = 2.0
+
+@dataclass(slots=True)
+class CacheEntry:
+    """A serialized response body with its validators."""
+    body: bytes
+    etag: str
+    last_modified: float
+
+class MemoryCacheBackend:
+    """Per-process LRU cache. Invalidation only reaches the current worker."""
+
+    def __init__(self, max_entries: int = MAX_MEMORY_ENTRIES):
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (entry, expires_at, tags)
+        self.tags: Dict[str, Set[str]] = {}
+
+    async def get(self, key: str) -> Optional[CacheEntry]:
+        item = self.entries.get(key)
+        if item is None:
+            return None
+        entry, expires_at, _ = item
+        if expires_at < time.monotonic():
+            self._remove(key)
+            return None
+        self.entries.move_to_end(key)
+        return entry
+
+    async def set(self, key: str, entry: CacheEntry, tags: Iterable[str], ttl: int):
+        # Replacing an entry drops it from the tags it had before
+        self._remove(key)
+        tags = tuple(tags)
+        self.entries[key] = (entry, time.monotonic() + ttl, tags)
+        for tag in tags:
+            self.tags.setdefault(tag, set()).add(key)
+        while len(self.entries) > self.max_entries:
+            self._remove(next(iter(self.entries)))
+
+    async def invalidate(self, tag: str) -> int:
+        keys = list(self.tags.get(tag, ()))
+        return sum(1 for key in keys if self._remove(key))
+
+    def _remove(self, key: str) -> bool:
+        """Drop an entry and its tag references; False if it was not cached."""
+        item = self.entries.pop(key, None)
+        if item is None:
+            return False
+        for tag in item[2]:
+            keys = self.tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.tags[tag]
+        return True
+
+class RedisCacheBackend:
+    """Redis-backed cache shared by all workers; tags are Redis sets of keys."""
+
+    def __init__(self, host: str, port: int = 6379, password: Optional[str] = None, prefix: str = "respcache:",
+                 connect_timeout: float = REDIS_CONNECT_TIMEOUT_SECONDS):
+        import redis
+        import redis.asyncio as aioredis
+        # Connections are lazy, so ping now; an unreachable server raises here and
+        # create_response_cache falls back to memory instead of failing every request
+        probe = redis.Redis(host=host, port=port, password=password or None, socket_connect_timeout=connect_timeout)
+        try:
+            probe.ping()
+        finally:
+            probe.close()
+        self.client = aioredis.Redis(host=host, port=port, password=password or None,
+                                     socket_connect_timeout=connect_timeout)
+        self.prefix = prefix
+
+    async def get(self, key: str) -> Optional[CacheEntry]:
+        values = await self.client.hmget(self.prefix + key, "body", "etag", "last_modified")
+        if values[0] is None:
+            return None
+        return CacheEntry(body=values[0], etag=values[1].decode(), last_modified=float(values[2]))
+
+    async def set(self, key: str, entry: CacheEntry, tags: Iterable[str], ttl: int):
+        pipe = self.client.pipeline()
+        pipe.hset(self.prefix + key, mapping={
+            "body": entry.body,
+            "etag": entry.etag,
+            "last_modified": entry.last_modified
+        })
+        pipe.expire(self.prefix + key, ttl)
+        for tag in tags:
+            pipe.sadd(self.prefix + "tag:" + tag, self.prefix + key)
+            pipe.expire(self.prefix + "tag:" + tag, ttl)
+        await pipe.execute()
+
+    async def invalidate(self, tag: str) -> int:
+        tag_key = self.prefix + "tag:" + tag
+        keys = await self.client.smembers(tag_key)
+        await self.client.delete(tag_key, *keys)
+        return len(keys)
+
+class ResponseCache:
+    """Caches serialized JSON responses per user and resource.
+
+    Entries are tagged with the resources they depend on (e.g. "user:<id>",
+    "child:<id>") and dropped by invalidate() when those resources change.
+    Hits are served straight from the stored bytes with ETag/Last-Modified,
+    and matching conditional requests get a 304.
+    """
+
+    def __init__(self, backend=None, ttl: int = DEFAULT_TTL_SECONDS):
+        self.backend = backend or MemoryCacheBackend()
+        self.ttl = ttl
+
+    async def get(self, key: str) -> Optional[CacheEntry]:
+        try:
+            return await self.backend.get(key)
+        except Exception as e:
+            logger.warning(f"Response cache read failed for {key}: {str(e)}")
+            return None
+
+    async def set(self, key: str, data: Any, tags: Iterable[str]) -> CacheEntry:
+        """Serialize data once and store it; returns the entry to respond with."""
+        # UUIDs and datetimes are encoded natively by the shared serializer
+        body = dumps(data)
+        entry = CacheEntry(
+            body=body,
+            etag=f'"{hashlib.sha1(body).hexdigest()}"',
+            last_modified=float(int(time.time()))
+        )
+        try:
+            await self.backend.set(key, entry, list(tags), self.ttl)
+        except Exception as e:
+            logger.warning(f"Response cache write failed for {key}: {str(e)}")
+        return entry
+
+    async def invalidate(self, *tags: str):
+        """Drop every entry tagged with any of the given resources."""
+        for tag in tags:
+            try:
+                removed = await self.backend.invalidate(tag)
+                logger.debug(f"Invalidated {removed} cached responses for {tag}")
+            except Exception as e:
+                logger.warning(f"Response cache invalidation failed for {tag}: {str(e)}")
+
+    @staticmethod
+    def respond(request: Request, entry: CacheEntry) -> Response:
+        """Build a 200 or 304 response for the entry, honoring conditional headers."""
+        headers = {
+            "ETag": entry.etag,
+            "Last-Modified": formatdate(entry.last_modified, usegmt=True),
+            "Cache-Control": "private, no-cache"
+        }
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None:
+            if entry.etag in [tag.strip() for tag in if_none_match.split(",")]:
+                return Response(status_code=304, headers=headers)
+        elif request.headers.get("if-modified-since"):
+            try:
+                since = parsedate_to_datetime(request.headers["if-modified-since"]).timestamp()
+                if entry.last_modified <= since:
+                    return Response(status_code=304, headers=headers)
+            except (TypeError, ValueError):
+                pass
+        return Response(content=entry.body, media_type="application/json", headers=headers)
+
+def create_response_cache(settings: Settings = settings) -> ResponseCache:
+    """Use Redis when REDIS_HOST is configured, otherwise an in-process cache."""
+    if settings.redis_host:
+        try:
+            backend = RedisCacheBackend(settings.redis_host, settings.redis_port, settings.redis_password)
+            logger.info(f"Response cache using Redis at {settings.redis_host}")
+            return ResponseCache(backend, settings.response_cache_ttl)
+        except Exception as e:
+            logger.error(f"Redis response cache unavailable, using memory: {str(e)}")
+    return ResponseCache(MemoryCacheBackend(settings.response_cache_max_entries), settings.response_cache_ttl)
+
+_response_cache: Optional[ResponseCache] = None
+_response_cache_lock = threading.Lock()
+
+def get_response_cache() -> ResponseCache:
+    """The global response cache, created on first use so importing this module never contacts Redis."""
+    global _response_cache
+    if _response_cache is None:
+        with _response_cache_lock:
+            if _response_cache is None:
+                _response_cache = create_response_cache()
+    return _response_cache
+
+def __getattr__(name):
+    # `from cache import response_cache` keeps working and creates the cache on first access
+    if name == "response_cache":
+        return get_response_cache()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
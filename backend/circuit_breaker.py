@@ -0,0 +1,138 @@
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Optional
+from metrics import circuit_breaker_state, circuit_breaker_transitions_total, circuit_breaker_timeout_seconds
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Gauge encoding of each state
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+# Every breaker by name, for the state gauges
+breakers: Dict[str, "CircuitBreaker"] = {}
+
+class CircuitBreaker:
+    """Failure-rate circuit breaker with an adaptive call timeout.
+
+    Closed: calls go through; once at least `minimum_calls` of the last
+    `window_size` calls are recorded and the failure ratio reaches
+    `failure_threshold`, the breaker opens. Open: calls are rejected until
+    `reset_timeout` passes, then one probe is let through (half-open). A
+    successful probe closes the breaker; a failed one reopens it with the
+    wait doubled, up to `max_reset_timeout`. Only the probe decides: calls
+    report when they started, and stragglers admitted before the probe
+    cannot close or reopen a half-open breaker.
+
+    timeout() derives the per-call timeout from the p95 of recent successful
+    latencies, bounded by [min_timeout, max_timeout] and by the caller's
+    deadline, so a healthy provider is never cut off and a degraded one
+    cannot hold a caller for the full max_timeout.
+
+    Thread-safe: calls run in worker threads.
+    """
+
+    def __init__(self, name: str, failure_threshold: float = 0.5, minimum_calls: int = 5,
+                 window_size: int = 20, reset_timeout: float = 30.0, max_reset_timeout: float = 300.0,
+                 min_timeout: float = 2.0, max_timeout: float = 20.0, timeout_multiplier: float = 3.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.minimum_calls = minimum_calls
+        self.reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.timeout_multiplier = timeout_multiplier
+        self.clock = clock
+
+        self.state = CLOSED
+        self.outcomes: deque = deque(maxlen=window_size)  # True for success
+        self.latencies: deque = deque(maxlen=50)  # seconds, successful calls only
+        self.opened_at = 0.0
+        self.open_duration = reset_timeout
+        self.probe_started: Optional[float] = None
+        self.lock = threading.Lock()
+        breakers[name] = self
+
+    def allow_request(self) -> bool:
+        """True if a call may be made now; in half-open only one probe is admitted."""
+        with self.lock:
+            now = self.clock()
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN:
+                if now - self.opened_at < self.open_duration:
+                    return False
+                self._transition(HALF_OPEN)
+            # Half-open: one probe at a time; a probe that never reported is replaced
+            if self.probe_started is not None and now - self.probe_started < self.max_timeout:
+                return False
+            self.probe_started = now
+            return True
+
+    def release(self):
+        """Hand back a request admitted by allow_request() that was never made, freeing the half-open probe."""
+        with self.lock:
+            if self.state == HALF_OPEN:
+                self.probe_started = None
+
+    def record_success(self, latency: float, started: Optional[float] = None):
+        """Record a call that got a real answer; `started` is its start time on this breaker's clock."""
+        with self.lock:
+            self.latencies.append(latency)
+            if self.state == HALF_OPEN:
+                if not self._is_probe(started):
+                    return
+                self.outcomes.clear()
+                self.open_duration = self.reset_timeout
+                self._transition(CLOSED)
+            self.outcomes.append(True)
+
+    def record_failure(self, started: Optional[float] = None):
+        """Record a call that failed upstream; `started` is its start time on this breaker's clock."""
+        with self.lock:
+            if self.state == HALF_OPEN:
+                if not self._is_probe(started):
+                    return
+                self.open_duration = min(self.open_duration * 2, self.max_reset_timeout)
+                self._open()
+                return
+            self.outcomes.append(False)
+            if self.state == CLOSED and len(self.outcomes) >= self.minimum_calls:
+                failures = self.outcomes.count(False)
+                if failures / len(self.outcomes) >= self.failure_threshold:
+                    self._open()
+
+    def timeout(self, deadline: Optional[float] = None) -> float:
+        """Seconds the next call may take; 0 or less if the deadline has already passed."""
+        with self.lock:
+            if len(self.latencies) >= self.minimum_calls:
+                ordered = sorted(self.latencies)
+                p95 = ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+                timeout = min(self.max_timeout, max(self.min_timeout, p95 * self.timeout_multiplier))
+            else:
+                timeout = self.max_timeout
+        if deadline is not None:
+            timeout = min(timeout, deadline - self.clock())
+        return timeout
+
+    def _is_probe(self, started: Optional[float]) -> bool:
+        # Only one call is admitted after the probe slot is taken, so anything that started since is the probe
+        return self.probe_started is not None and started is not None and started >= self.probe_started
+
+    def _open(self):
+        self.opened_at = self.clock()
+        self.probe_started = None
+        self._transition(OPEN)
+
+    def _transition(self, state: str):
+        if state != HALF_OPEN:
+            self.probe_started = None
+        self.state = state
+        circuit_breaker_transitions_total.labels(self.name, state).inc()
+
+circuit_breaker_state.set_function(lambda: {(name,): STATE_VALUES[b.state] for name, b in breakers.items()})
+circuit_breaker_timeout_seconds.set_function(lambda: {(name,): b.timeout() for name, b in breakers.items()})
@@ -0,0 +1,319 @@
+import copy
+import json
+import re
+from typing import Annotated, Any, Dict, List, Literal, Optional, Tuple
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter, ValidationError
+
+# Vocabulary the game client can render (frontend GameCanvas)
+SHAPES = ("circle", "square", "triangle", "star", "diamond")
+COLORS = ("red", "blue", "green", "yellow", "purple", "orange", "pink", "cyan", "brown", "gray")
+SURPRISE_ELEMENTS = ("color_change", "size_change", "position_change", "sound_change")
+
+# Words models use for difficulty instead of a level number
+DIFFICULTY_WORDS = {"very easy": 1, "easy": 1, "medium": 2, "moderate": 2, "normal": 2, "hard": 3, "difficult": 3, "expert": 4}
+
+FALLBACK_CONFIG = {
+    "level_config": {
+        "difficulty": 2,
+        "shapes": ["circle", "square", "triangle"],
+        "colors": ["red", "blue", "green"],
+        "sounds": True,
+        "animation_speed": 1.0,
+        "surprise_elements": ["color_change", "size_change"]
+    },
+    "assessment_focus": ["attention", "motor_skills", "pattern_recognition"],
+    "session_duration": 10,
+    "break_intervals": 3,
+    "motivation_elements": ["celebration_sounds", "progress_indicators"]
+}
+
+class LevelConfig(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+
+    difficulty: int = Field(ge=1, le=5)
+    shapes: List[Literal[SHAPES]] = Field(min_length=1)
+    colors: List[Literal[COLORS]] = Field(min_length=1)
+    sounds: bool
+    animation_speed: float = Field(ge=0.25, le=3.0)
+    surprise_elements: List[Literal[SURPRISE_ELEMENTS]]
+
+class GameConfig(BaseModel):
+    """Game config as sent to the child; every field is required after repair."""
+    model_config = ConfigDict(extra="ignore")
+
+    level_config: LevelConfig
+    assessment_focus: List[str] = Field(min_length=1)
+    session_duration: int = Field(ge=3, le=30)  # minutes
+    break_intervals: int = Field(ge=1, le=10)
+    motivation_elements: List[str]
+
+class ConfigRepairError(ValueError):
+    """No usable config could be recovered from the model output."""
+
+# Validators for single top-level members, used when members are streamed one by one
+MEMBER_ADAPTERS = {
+    name: TypeAdapter(Annotated[(field.annotation, *field.metadata)] if field.metadata else field.annotation)
+    for name, field in GameConfig.model_fields.items()
+}
+
+def _clamp(value, low, high):
+    return max(low, min(high, value))
+
+def _number(value) -> Optional[float]:
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        match = re.search(r"-?\d+(\.\d+)?", value)
+        if match:
+            return float(match.group())
+    return None
+
+def _string_list(value) -> Optional[List[str]]:
+    if isinstance(value, str):
+        value = [part for part in re.split(r"[,;/]", value)]
+    if not isinstance(value, list):
+        return None
+    items = [str(item).strip().lower().replace(" ", "_") for item in value if str(item).strip()]
+    return list(dict.fromkeys(items))
+
+def _vocabulary_list(value, vocabulary, default, name, repairs, normalize=lambda item: item):
+    items = _string_list(value)
+    if items is None:
+        repairs.append(f"{name}:default")
+        return list(default)
+    if isinstance(value, str):
+        repairs.append(f"{name}:coerced")
+    known = [normalize(item) for item in items if normalize(item) in vocabulary]
+    if len(known) != len(items):
+        repairs.append(f"{name}:filtered")
+    if not known:
+        # The canvas needs at least one entry to draw anything
+        repairs.append(f"{name}:default")
+        return list(default)
+    return known
+
+def _repair_level_config(value: Any, repairs: List[str]) -> Dict[str, Any]:
+    defaults = FALLBACK_CONFIG["level_config"]
+    if not isinstance(value, dict):
+        repairs.append("level_config:default")
+        return copy.deepcopy(defaults)
+    level = {}
+
+    difficulty = value.get("difficulty")
+    if isinstance(difficulty, str) and difficulty.strip().lower() in DIFFICULTY_WORDS:
+        level["difficulty"] = DIFFICULTY_WORDS[difficulty.strip().lower()]
+        repairs.append("difficulty:word")
+    else:
+        number = _number(difficulty)
+        if number is None:
+            level["difficulty"] = defaults["difficulty"]
+            repairs.append("difficulty:default")
+        else:
+            level["difficulty"] = int(_clamp(round(number), 1, 5))
+            if level["difficulty"] != difficulty:
+                repairs.append("difficulty:clamped")
+
+    level["shapes"] = _vocabulary_list(value.get("shapes"), SHAPES, defaults["shapes"], "shapes", repairs,
+                                       lambda item: item.rstrip("s") if item.rstrip("s") in SHAPES else item)
+    level["colors"] = _vocabulary_list(value.get("colors"), COLORS, defaults["colors"], "colors", repairs,
+                                       lambda item: "gray" if item == "grey" else item)
+    surprises = value.get("surprise_elements")
+    level["surprise_elements"] = [] if surprises == [] else _vocabulary_list(
+        surprises, SURPRISE_ELEMENTS, defaults["surprise_elements"], "surprise_elements", repairs
+    )
+
+    sounds = value.get("sounds")
+    if isinstance(sounds, bool):
+        level["sounds"] = sounds
+    elif isinstance(sounds, str) and sounds.strip().lower() in ("true", "yes", "on", "false", "no", "off"):
+        level["sounds"] = sounds.strip().lower() in ("true", "yes", "on")
+        repairs.append("sounds:coerced")
+    else:
+        level["sounds"] = defaults["sounds"]
+        repairs.append("sounds:default")
+
+    speed = _number(value.get("animation_speed"))
+    if speed is None:
+        level["animation_speed"] = defaults["animation_speed"]
+        repairs.append("animation_speed:default")
+    else:
+        level["animation_speed"] = _clamp(speed, 0.25, 3.0)
+        if level["animation_speed"] != value.get("animation_speed"):
+            repairs.append("animation_speed:clamped")
+    return level
+
+def _repair_int(value, key, low, high, repairs) -> int:
+    number = _number(value)
+    if number is None:
+        repairs.append(f"{key}:default")
+        return FALLBACK_CONFIG[key]
+    repaired = int(_clamp(round(number), low, high))
+    if repaired != value:
+        repairs.append(f"{key}:clamped")
+    return repaired
+
+def _repair_list(value, key, repairs) -> List[str]:
+    items = _string_list(value)
+    if not items:
+        repairs.append(f"{key}:default")
+        return list(FALLBACK_CONFIG[key])
+    if items != value:
+        repairs.append(f"{key}:coerced")
+    return items
+
+def repair_member(key: str, value: Any, repairs: List[str]) -> Any:
+    """Repair a single top-level member (used for streamed configs)."""
+    if key == "level_config":
+        return _repair_level_config(value, repairs)
+    if key == "session_duration":
+        return _repair_int(value, key, 3, 30, repairs)
+    if key == "break_intervals":
+        return _repair_int(value, key, 1, 10, repairs)
+    if key in ("assessment_focus", "motivation_elements"):
+        return _repair_list(value, key, repairs)
+    return value
+
+def validate_member(key: str, value: Any, repairs: List[str]) -> Any:
+    """Repair and validate a single streamed member, using the default if it is still invalid."""
+    value = repair_member(key, value, repairs)
+    adapter = MEMBER_ADAPTERS.get(key)
+    if adapter is None:
+        return value
+    try:
+        return adapter.dump_python(adapter.validate_python(value))
+    except ValidationError:
+        repairs.append(f"{key}:invalid")
+        return copy.deepcopy(FALLBACK_CONFIG[key])
+
+def repair_config(data: Dict[str, Any]) -> Tuple[Dict[str, Any], List[str]]:
+    """Fill missing fields, coerce types and clamp ranges; returns (config, repairs)."""
+    repairs: List[str] = []
+    config = {}
+    for key in FALLBACK_CONFIG:
+        if key in data:
+            config[key] = repair_member(key, data[key], repairs)
+        else:
+            config[key] = copy.deepcopy(FALLBACK_CONFIG[key])
+            repairs.append(f"{key}:missing")
+    return config, repairs
+
+def close_truncated_json(text: str) -> str:
+    """Close strings and brackets left open by a truncated response, dropping a dangling member."""
+    stack = []
+    in_string = escaped = False
+    for char in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "{[":
+            stack.append("}" if char == "{" else "]")
+        elif char in "}]" and stack:
+            stack.pop()
+    if in_string:
+        text += '"'
+    text = re.sub(r'(,\s*"[^"]*"\s*:?\s*|,\s*|:\s*)$', "", text.rstrip())
+    return text + "".join(reversed(stack))
+
+def extract_json_object(text: str) -> Dict[str, Any]:
+    """Pull the first JSON object out of noisy model text.
+
+    Handles markdown fences, prose around the object, trailing commas and
+    output cut off mid-object.
+    """
+    start = text.find("{")
+    if start < 0:
+        raise ConfigRepairError("No JSON object in model output")
+    body = text[start:]
+    end = body.rfind("}")
+    candidates = [body[:end + 1]] if end >= 0 else []
+    candidates.append(close_truncated_json(body.split("```")[0]))
+    for candidate in candidates:
+        for attempt in (candidate, re.sub(r",\s*([}\]])", r"\1", candidate)):
+            try:
+                data = json.loads(attempt)
+            except ValueError:
+                continue
+            if isinstance(data, dict):
+                return data
+    # Truncated mid-member: back off to the last complete member
+    candidate = body.split("```")[0]
+    while "," in candidate:
+        candidate = candidate[:candidate.rfind(",")]
+        try:
+            data = json.loads(re.sub(r",\s*([}\]])", r"\1", close_truncated_json(candidate)))
+            if isinstance(data, dict):
+                return data
+        except ValueError:
+            continue
+    raise ConfigRepairError("Model output is not recoverable JSON")
+
+def validate_config(raw: Any) -> Tuple[Dict[str, Any], List[str]]:
+    """Validate model output (text or dict), repairing it if needed.
+
+    Returns (config, repairs); `repairs` is empty when the output was valid
+    as-is. Raises ConfigRepairError when nothing usable can be recovered.
+    """
+    if isinstance(raw, str):
+        text = raw.strip()
+        if text.startswith("```"):
+            text = text.split("\n", 1)[1] if "\n" in text else text[3:]
+        try:
+            data = json.loads(text.rstrip("`").strip())
+            repairs = []
+        except ValueError:
+            data = extract_json_object(raw)
+            repairs = ["json:extracted"]
+    else:
+        data, repairs = raw, []
+    if not isinstance(data, dict):
+        raise ConfigRepairError("Model output is not a JSON object")
+
+    # Fast path: already valid
+    if not repairs:
+        try:
+            return GameConfig.model_validate(data).model_dump(), []
+        except ValidationError:
+            pass
+    config, field_repairs = repair_config(data)
+    try:
+        return GameConfig.model_validate(config).model_dump(), repairs + field_repairs
+    except ValidationError as e:
+        raise ConfigRepairError(f"Config still invalid after repair: {e.error_count()} errors") from None
+
+def validate_batch(raw: Any, count: int) -> List[Optional[Tuple[Dict[str, Any], List[str]]]]:
+    """Split a batched response ({"configs": [...]}) into one validated config per child.
+
+    Entries are matched on their "child" index, falling back to position.
+    A child whose entry is missing or unusable gets None.
+    """
+    if isinstance(raw, str):
+        try:
+            data = json.loads(raw.strip().strip("`").removeprefix("json"))
+        except ValueError:
+            data = extract_json_object(raw)
+    else:
+        data = raw
+    entries = data.get("configs") if isinstance(data, dict) else data
+    if not isinstance(entries, list):
+        raise ConfigRepairError("Batched output has no configs list")
+
+    results: List[Optional[Tuple[Dict[str, Any], List[str]]]] = [None] * count
+    for position, entry in enumerate(entries):
+        if not isinstance(entry, dict):
+            continue
+        index = entry.get("child", position)
+        if not isinstance(index, int) or not 0 <= index < count or results[index] is not None:
+            continue
+        try:
+            results[index] = validate_config(entry)
+        except ConfigRepairError:
+            continue
+    return results
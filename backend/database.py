@@ -1,30 +1,78 @@
 from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-import os
-from dotenv import load_dotenv
+import logging
+import threading
+from metrics import instrument_engine
+from profiling import PROFILING_ENABLED, capture_queries
+from settings import Settings, get_settings
 
-# Load environment variables
-load_dotenv()
+logger = logging.getLogger(__name__)
 
-# Get Database URL from environment
-DATABASE_URL = os.getenv("DATABASE_URL")
+settings = get_settings()
 
-if not DATABASE_URL:
-    raise ValueError("DATABASE_URL environment variable is required")
+def build_engine(settings: Settings):
+    """Create an instrumented engine with the configured connection pool."""
+    url = make_url(settings.database_url)
+    options = {"echo": settings.sql_echo, "pool_pre_ping": settings.db_pool_pre_ping}
+    # SQLite uses its own single-connection pools, which take none of the sizing options
+    if url.get_backend_name() != "sqlite":
+        options.update(
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout,
+            pool_recycle=settings.db_pool_recycle
+        )
+    logger.info(f"Using database {url.render_as_string(hide_password=True)}")
+    engine = create_engine(url, **options)
+    instrument_engine(engine)
+    if PROFILING_ENABLED:
+        capture_queries(engine)
+    return engine
 
-print(f"Using DATABASE_URL: {DATABASE_URL}")
+_engine = None
+_engine_lock = threading.Lock()
 
-try:
-    # Create SQLAlchemy engine
-    engine = create_engine(DATABASE_URL, echo=True)  # echo=True for debugging
-    print("SUCCESS: Database engine created successfully")
-except Exception as e:
-    print(f"ERROR creating database engine: {e}")
-    raise
+def get_engine():
+    """The SQLAlchemy engine, created on first use so importing this module stays cheap."""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                if not settings.database_url:
+                    raise ValueError("DATABASE_URL environment variable is required")
+                try:
+                    engine = build_engine(settings)
+                    logger.info("Database engine created successfully")
+                except Exception as e:
+                    logger.error(f"Error creating database engine: {e}")
+                    raise
+                SessionLocal.configure(bind=engine)
+                _engine = engine
+    return _engine
+
+def dispose_engine():
+    """Close pooled connections, if the engine was ever created."""
+    if _engine is not None:
+        _engine.dispose()
+
+def __getattr__(name):
+    # `from database import engine` keeps working and creates the engine on first access
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+class LazySessionmaker(sessionmaker):
+    """sessionmaker that binds to the engine the first time a session is opened."""
+
+    def __call__(self, **local_kw):
+        if _engine is None:
+            get_engine()
+        return super().__call__(**local_kw)
 
 # Create SessionLocal class
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = LazySessionmaker(autocommit=False, autoflush=False)
 
 # Create Base class
 Base = declarative_base()
@@ -42,27 +90,27 @@ def init_db():
     # Import models to register them with Base
     try:
         import models  # Direct import for Docker environment
-        print("Models imported successfully")
+        logger.info("Models imported successfully")
     except ImportError as e:
-        print(f"Failed to import models: {e}")
+        logger.error(f"Failed to import models: {e}")
         raise
     
     # Create tables
     try:
-        Base.metadata.create_all(bind=engine)
-        print("Database tables created successfully")
+        Base.metadata.create_all(bind=get_engine())
+        logger.info("Database tables created successfully")
     except Exception as e:
-        print(f"Error creating database tables: {e}")
+        logger.error(f"Error creating database tables: {e}")
         raise
 
 # Test database connection
 def test_connection():
     """Test if database connection works"""
     try:
-        with engine.connect() as connection:
+        with get_engine().connect() as connection:
             result = connection.execute(text("SELECT 1"))
-            print("Database connection test: SUCCESS")
+            logger.info("Database connection test: SUCCESS")
             return True
     except Exception as e:
-        print(f"Database connection test: FAILED - {e}")
+        logger.error(f"Database connection test: FAILED - {e}")
         return False
\ No newline at end of file
@@ -0,0 +1,157 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+from config_schema import FALLBACK_CONFIG, SHAPES, COLORS, SURPRISE_ELEMENTS
+from settings import get_settings
+
+settings = get_settings()
+
+# "fast_path" (default): use the engine's config when it is confident enough; "off": always ask the LLM
+ENGINE_MODE = settings.difficulty_engine_mode
+# Confidence below which the LLM is asked instead
+ENGINE_MIN_CONFIDENCE = settings.difficulty_engine_min_confidence
+# Ask the LLM every Nth session anyway, for variety (0 disables)
+ENGINE_LLM_EVERY = settings.difficulty_engine_llm_every
+
+# Sessions the rollup looks back over
+RECENT_SESSIONS = 3
+
+# Average errors per session that mean a level is too hard / comfortably mastered
+STRUGGLING_ERRORS = 5
+MASTERED_ERRORS = 1
+# Relative change in reaction time, recent vs earlier sessions, that counts as a trend
+REACTION_TREND = 0.2
+
+@dataclass
+class SessionRollup:
+    """Summary of a child's recent sessions."""
+    sessions: int = 0
+    recent: int = 0
+    last_level: Optional[int] = None
+    average_errors: float = 0.0
+    abandoned: int = 0
+    reaction_change: Optional[float] = None  # recent vs earlier mean; negative means faster
+
+@dataclass
+class EngineDecision:
+    """Engine output plus whether the LLM should be asked instead."""
+    config: Dict[str, Any]
+    confidence: float
+    use_llm: bool
+    reason: str
+    signals: Dict[str, int] = field(default_factory=dict)
+
+def _mean(values: List[float]) -> Optional[float]:
+    return sum(values) / len(values) if values else None
+
+def rollup_sessions(previous_sessions: List[Dict[str, Any]], recent: int = RECENT_SESSIONS) -> SessionRollup:
+    """Roll up session logs, oldest first, into the figures the engine works from."""
+    window = previous_sessions[-recent:]
+    rollup = SessionRollup(sessions=len(previous_sessions), recent=len(window))
+    if not window:
+        return rollup
+    level = window[-1].get("level")
+    rollup.last_level = level if isinstance(level, int) else None
+    rollup.average_errors = sum(session.get("errors") or 0 for session in window) / len(window)
+    rollup.abandoned = sum(1 for session in window if session.get("abandoned"))
+
+    recent_reaction = _mean([s["reaction_time"] for s in window if s.get("reaction_time")])
+    earlier = previous_sessions[:-recent][-recent:]
+    earlier_reaction = _mean([s["reaction_time"] for s in earlier if s.get("reaction_time")])
+    if recent_reaction and earlier_reaction:
+        rollup.reaction_change = recent_reaction / earlier_reaction - 1
+    return rollup
+
+class DifficultyEngine:
+    """Deterministic next-level rules over a child's session rollup.
+
+    Each signal votes to ease off (-1), hold (0) or step up (+1): errors,
+    abandoned sessions and the reaction-time trend. The difficulty moves by
+    one step in the direction of the vote; shape and colour count, animation
+    speed and surprise elements follow the difficulty. Confidence grows with
+    the amount of history and drops when the signals disagree.
+    """
+
+    def next_config(self, child_profile: Dict[str, Any], previous_sessions: List[Dict[str, Any]]
+                    ) -> Tuple[Dict[str, Any], float, Dict[str, int]]:
+        """Return (full game config, confidence 0-1, signal votes)."""
+        rollup = rollup_sessions(previous_sessions)
+        age = child_profile.get("age") or 6
+        baseline = 1 if age < 5 else 3 if age >= 9 else 2
+        difficulty = min(5, max(1, rollup.last_level)) if rollup.last_level else baseline
+
+        signals = self._signals(rollup)
+        votes = [vote for vote in signals.values() if vote]
+        struggling = -1 in votes
+        if struggling:
+            difficulty = max(1, difficulty - 1)
+        elif votes:
+            difficulty = min(5, difficulty + 1)
+
+        config = {
+            "level_config": self._level_config(difficulty, struggling, child_profile.get("special_interest")),
+            "assessment_focus": list(FALLBACK_CONFIG["assessment_focus"]),
+            "session_duration": 8 if age < 5 else FALLBACK_CONFIG["session_duration"],
+            "break_intervals": 2 if struggling else FALLBACK_CONFIG["break_intervals"],
+            "motivation_elements": list(FALLBACK_CONFIG["motivation_elements"])
+        }
+
+        history = rollup.recent / RECENT_SESSIONS
+        agreement = 0.5 if (1 in votes and -1 in votes) else 1.0
+        confidence = round(0.3 + 0.7 * history * agreement, 3)
+        return config, confidence, signals
+
+    def _signals(self, rollup: SessionRollup) -> Dict[str, int]:
+        if not rollup.recent:
+            return {}
+        errors = -1 if rollup.average_errors >= STRUGGLING_ERRORS else 1 if rollup.average_errors <= MASTERED_ERRORS else 0
+        signals = {"errors": errors, "abandoned": -1 if rollup.abandoned else 0}
+        if rollup.reaction_change is not None:
+            signals["reaction_time"] = (
+                -1 if rollup.reaction_change >= REACTION_TREND else 1 if rollup.reaction_change <= -REACTION_TREND else 0
+            )
+        return signals
+
+    def _level_config(self, difficulty: int, struggling: bool, special_interest: Optional[str]) -> Dict[str, Any]:
+        shape_count = min(len(SHAPES), difficulty + 1)
+        colors = list(COLORS[:min(len(COLORS), difficulty + 1)])
+        interest = (special_interest or "").strip().lower()
+        if interest in COLORS:
+            colors = [interest] + [color for color in colors if color != interest][:len(colors) - 1]
+        if struggling:
+            surprises = ["color_change"]
+        else:
+            surprises = list(SURPRISE_ELEMENTS[:min(len(SURPRISE_ELEMENTS), max(1, difficulty))])
+        return {
+            "difficulty": difficulty,
+            "shapes": list(SHAPES[:shape_count]),
+            "colors": colors,
+            "sounds": True,
+            "animation_speed": round(0.9 + 0.1 * (difficulty - 1), 2),
+            "surprise_elements": surprises
+        }
+
+class AdaptivePolicy:
+    """Decides whether the engine's config is used or the LLM is asked."""
+
+    def __init__(self, engine: Optional[DifficultyEngine] = None, mode: str = ENGINE_MODE,
+                 min_confidence: float = ENGINE_MIN_CONFIDENCE, llm_every: int = ENGINE_LLM_EVERY):
+        self.engine = engine or DifficultyEngine()
+        self.mode = mode
+        self.min_confidence = min_confidence
+        self.llm_every = llm_every
+
+    def decide(self, child_profile: Dict[str, Any], previous_sessions: List[Dict[str, Any]]) -> EngineDecision:
+        config, confidence, signals = self.engine.next_config(child_profile, previous_sessions)
+        if self.mode == "off":
+            reason = "disabled"
+        elif confidence < self.min_confidence:
+            reason = "low_confidence"
+        elif self.llm_every and previous_sessions and len(previous_sessions) % self.llm_every == 0:
+            reason = "variety"
+        else:
+            return EngineDecision(config, confidence, False, "confident", signals)
+        return EngineDecision(config, confidence, True, reason, signals)
+
+# Global difficulty engine and policy instances
+difficulty_engine = DifficultyEngine()
+adaptive_policy = AdaptivePolicy(difficulty_engine)
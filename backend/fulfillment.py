@@ -0,0 +1,275 @@
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Set
+from sqlalchemy.exc import IntegrityError
+from database import SessionLocal
+from models import PaymentHistory, FulfillmentEvent, LicenseUsage, DiagnosticReport
+from cache import get_response_cache
+from payments import normalize_payment_type, pricing_catalog
+from settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+# Slots granted by a license upgrade, per role
+LICENSE_UPGRADE_SLOTS = {
+    "parent": 25,
+    "doctor": 50
+}
+
+# Retry policy: attempts before giving up, and base of the exponential backoff
+MAX_ATTEMPTS = 5
+RETRY_BASE_SECONDS = 2
+
+# How often the worker polls when it has not been woken by a new event
+POLL_INTERVAL_SECONDS = settings.fulfillment_poll_interval_seconds
+
+class PermanentFulfillmentError(ValueError):
+    """A payment whose effect can never be applied; retrying would not help."""
+
+class FulfillmentQueue:
+    """Outbox of captured payments whose effects still have to be applied.
+    
+    Verifying a payment only inserts a FulfillmentEvent keyed on payment_id;
+    a background worker later upgrades licenses and unlocks reports. Each event
+    is applied and marked done in the same transaction, so retries and
+    duplicate enqueues never apply a payment twice.
+    """
+    
+    def __init__(self, session_factory=SessionLocal):
+        self.session_factory = session_factory
+        self.wakeup = asyncio.Event()
+        self.worker_task: Optional[asyncio.Task] = None
+        # Loop the worker runs on; enqueue() may be called from other threads
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        # Users whose license changed since the worker last invalidated their cached profile
+        self.changed_users: Set[uuid.UUID] = set()
+    
+    def enqueue(self, payment_id: str) -> bool:
+        """Queue fulfillment for a captured payment; returns False if already queued.
+        
+        Raises ValueError if the payment is not a captured payment in the ledger.
+        """
+        db = self.session_factory()
+        try:
+            if db.query(FulfillmentEvent.id).filter(FulfillmentEvent.payment_id == payment_id).first():
+                return False
+            
+            payment = db.query(PaymentHistory).filter(PaymentHistory.payment_id == payment_id).first()
+            if payment is None or payment.status != "completed":
+                raise ValueError(f"Payment {payment_id} is not captured")
+            
+            db.add(FulfillmentEvent(
+                payment_id=payment_id,
+                user_id=payment.user_id,
+                payment_type=payment.payment_type,
+                receipt=payment.receipt,
+                child_id=payment.child_id
+            ))
+            try:
+                db.commit()
+            except IntegrityError:
+                # Another request queued the same payment concurrently
+                db.rollback()
+                return False
+        finally:
+            db.close()
+        
+        self._wake()
+        logger.info(f"Fulfillment queued for payment {payment_id}")
+        return True
+    
+    def _wake(self):
+        """Wake the worker; safe to call from request threads."""
+        if self.loop is None or self.loop.is_closed():
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self.loop:
+            self.wakeup.set()
+        else:
+            self.loop.call_soon_threadsafe(self.wakeup.set)
+    
+    def process_pending(self, limit: int = 50) -> int:
+        """Apply due pending events; returns how many completed successfully."""
+        db = self.session_factory()
+        try:
+            event_ids = [
+                row.id for row in db.query(FulfillmentEvent.id)
+                .filter(FulfillmentEvent.status == "pending", FulfillmentEvent.available_at <= datetime.utcnow())
+                .order_by(FulfillmentEvent.available_at)
+                .limit(limit)
+                .all()
+            ]
+        finally:
+            db.close()
+        
+        return sum(1 for event_id in event_ids if self._process_event(event_id))
+    
+    def drain(self, max_rounds: int = 100) -> int:
+        """Process events until none are due; useful for local runs and tests."""
+        total = 0
+        for _ in range(max_rounds):
+            processed = self.process_pending()
+            total += processed
+            if not processed:
+                break
+        return total
+    
+    def _process_event(self, event_id: uuid.UUID) -> bool:
+        """Apply one event in its own transaction, scheduling a retry on failure."""
+        db = self.session_factory()
+        try:
+            # Row lock so concurrent workers skip events another worker holds
+            event = (
+                db.query(FulfillmentEvent)
+                .filter(FulfillmentEvent.id == event_id, FulfillmentEvent.status == "pending")
+                .with_for_update(skip_locked=True)
+                .first()
+            )
+            if event is None:
+                return False
+            
+            try:
+                self._apply(db, event)
+                event.status = "done"
+                event.processed_at = datetime.utcnow()
+                event.attempts = (event.attempts or 0) + 1
+                db.commit()
+                self.changed_users.add(event.user_id)
+                logger.info(f"Fulfilled payment {event.payment_id} ({event.payment_type})")
+                return True
+            except Exception as e:
+                db.rollback()
+                self._schedule_retry(db, event_id, str(e), permanent=isinstance(e, PermanentFulfillmentError))
+                return False
+        finally:
+            db.close()
+    
+    def _schedule_retry(self, db, event_id: uuid.UUID, error: str, permanent: bool = False):
+        """Record a failed attempt and back off exponentially, giving up after MAX_ATTEMPTS."""
+        event = db.query(FulfillmentEvent).filter(FulfillmentEvent.id == event_id).first()
+        if event is None:
+            return
+        event.attempts = (event.attempts or 0) + 1
+        event.last_error = error
+        if permanent or event.attempts >= MAX_ATTEMPTS:
+            event.status = "failed"
+            logger.error(f"Fulfillment for payment {event.payment_id} failed permanently: {error}")
+        else:
+            event.available_at = datetime.utcnow() + timedelta(seconds=RETRY_BASE_SECONDS ** event.attempts)
+            logger.warning(f"Fulfillment for payment {event.payment_id} failed, retrying: {error}")
+        db.commit()
+    
+    def _apply(self, db, event: FulfillmentEvent):
+        """Apply the effect of a captured payment within the caller's transaction."""
+        # Normalized when the order is created; mapped again for rows recorded before that
+        payment_type = normalize_payment_type(event.payment_type)
+        if payment_type == "license_upgrade":
+            license_usage = self._license_for(db, event.user_id)
+            self._check_paid(db, event, "license_upgrade", license_usage.role)
+            license_usage.total_slots = max(
+                license_usage.total_slots or 0,
+                LICENSE_UPGRADE_SLOTS.get(license_usage.role, license_usage.total_slots or 0)
+            )
+            license_usage.upgraded = True
+            license_usage.last_payment_date = datetime.utcnow()
+        elif payment_type == "premium_subscription":
+            self._check_paid(db, event, "premium_subscription")
+            license_usage = self._license_for(db, event.user_id)
+            license_usage.subscription_type = "premium"
+            license_usage.last_payment_date = datetime.utcnow()
+        elif payment_type == "report_unlock":
+            if event.child_id is None:
+                raise PermanentFulfillmentError(f"Report unlock payment {event.payment_id} has no child")
+            self._check_paid(db, event, "report_unlock")
+            db.query(DiagnosticReport).filter(DiagnosticReport.child_id == event.child_id).update(
+                {"payment_status": "paid"}, synchronize_session=False
+            )
+        else:
+            logger.info(f"No fulfillment needed for payment type {payment_type}")
+    
+    @staticmethod
+    def _check_paid(db, event: FulfillmentEvent, item_type: str, variant: Optional[str] = None):
+        """Refuse payments below the catalog price of what they would grant.
+        
+        Without a variant (the subscription period is not recorded) the
+        cheapest variant's price is required.
+        """
+        payment = db.query(PaymentHistory).filter(PaymentHistory.payment_id == event.payment_id).first()
+        expected = None
+        if payment is not None:
+            if variant is None:
+                expected = pricing_catalog.lowest(item_type, payment.currency)
+            else:
+                expected = pricing_catalog.amount(item_type, variant, payment.currency)
+        if expected is None or payment.amount < expected:
+            raise PermanentFulfillmentError(
+                f"Payment {event.payment_id} does not cover the {event.payment_type} price"
+            )
+    
+    @staticmethod
+    def _license_for(db, user_id: uuid.UUID) -> LicenseUsage:
+        license_usage = db.query(LicenseUsage).filter(LicenseUsage.user_id == user_id).with_for_update().first()
+        if license_usage is None:
+            raise ValueError(f"No license record for user {user_id}")
+        return license_usage
+    
+    def get_status(self) -> Dict[str, Any]:
+        """Count events per status."""
+        db = self.session_factory()
+        try:
+            return {
+                status: db.query(FulfillmentEvent).filter(FulfillmentEvent.status == status).count()
+                for status in ("pending", "done", "failed")
+            }
+        finally:
+            db.close()
+    
+    async def run_worker(self, interval: float = POLL_INTERVAL_SECONDS):
+        """Process events until cancelled, waking early when new events are queued."""
+        while True:
+            try:
+                await asyncio.to_thread(self.drain)
+            except Exception as e:
+                logger.error(f"Fulfillment worker failed: {str(e)}")
+            
+            # Cached profiles show license slots, which upgrades just changed
+            while self.changed_users:
+                await get_response_cache().invalidate(f"user:{self.changed_users.pop()}")
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), timeout=interval)
+            except asyncio.TimeoutError:
+                pass
+            self.wakeup.clear()
+    
+    def start_worker(self, interval: float = POLL_INTERVAL_SECONDS):
+        """Start the background worker if it is not already running."""
+        if self.worker_task and not self.worker_task.done():
+            return
+        # The event belongs to the loop that waits on it; a restarted app runs on a new loop
+        self.wakeup = asyncio.Event()
+        self.loop = asyncio.get_running_loop()
+        self.worker_task = asyncio.create_task(self.run_worker(interval))
+        logger.info("Fulfillment worker started")
+    
+    async def stop_worker(self):
+        """Stop the background worker."""
+        if not self.worker_task:
+            return
+        self.worker_task.cancel()
+        try:
+            await self.worker_task
+        except asyncio.CancelledError:
+            pass
+        self.worker_task = None
+        self.loop = None
+        logger.info("Fulfillment worker stopped")
+
+# Global fulfillment queue instance
+fulfillment_queue = FulfillmentQueue()
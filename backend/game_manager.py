@@ -1,65 +1,225 @@
 import asyncio
-import json
+import heapq
 import logging
-from typing import Dict, List, Any, Optional
+import time
+from array import array
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Any, Optional, Set, Tuple
 from fastapi import WebSocket
+from serialization import dumps, dumps_text, loads
+from logging_config import should_log, summarize
+from metrics import game_broadcast_duration_seconds, game_dropped_sockets_total
+from settings import Settings, get_settings
 from datetime import datetime
 import uuid
 
 logger = logging.getLogger(__name__)
 
+settings = get_settings()
+
+# High-frequency game events that only matter for their latest value; these are
+# merged per shape and flushed to caretakers once per tick instead of per message.
+COALESCED_EVENT_TYPES = {"drag", "drag_move", "shape_drag", "shape_moved", "pointer_move"}
+
+# Default number of coalesced frames flushed to caretakers per second
+DEFAULT_TICK_RATE = settings.game_tick_rate
+
+# Supervisor defaults: how often to sweep, and how long a socket may stay silent
+SUPERVISOR_INTERVAL_SECONDS = settings.game_supervisor_interval_seconds
+IDLE_TIMEOUT_SECONDS = settings.game_idle_timeout_seconds
+
+# Completed sessions are kept in memory this long
+SESSION_RETENTION_HOURS = settings.game_session_retention_hours
+
+# Upper bound on events retained per session; older events are dropped first
+MAX_SESSION_EVENTS = settings.game_max_session_events
+
+# Distinct event types that get an interned code; code 0 means "type kept in payload"
+MAX_EVENT_TYPES = 255
+
+# Offset that turns time.monotonic() readings into wall-clock epoch seconds
+_WALL_CLOCK_OFFSET = time.time() - time.monotonic()
+
+def format_timestamp(monotonic_ts: float) -> str:
+    """Format a monotonic timestamp as an ISO-8601 UTC string for the wire."""
+    return datetime.utcfromtimestamp(_WALL_CLOCK_OFFSET + monotonic_ts).isoformat()
+
+class EventLog:
+    """Bounded, column-oriented store of session events.
+    
+    Timestamps live in a float array, event types are interned to one-byte codes
+    and the remaining fields are kept as compact JSON bytes. Events are decoded
+    back into dicts only when a session is serialized.
+    """
+    __slots__ = ("max_events", "timestamps", "type_codes", "payloads")
+    
+    _type_codes: Dict[str, int] = {}
+    _type_names: List[str] = [""]
+    
+    def __init__(self, max_events: int = MAX_SESSION_EVENTS):
+        self.max_events = max_events
+        self.timestamps = array("d")
+        self.type_codes = array("B")
+        self.payloads: List[bytes] = []
+    
+    def append(self, timestamp: float, event: Dict[str, Any]):
+        """Store an event, dropping the oldest quarter of the log when it is full."""
+        code = self._intern_type(event.get("type"))
+        payload = {key: value for key, value in event.items() if key != "type"} if code else event
+        
+        self.timestamps.append(timestamp)
+        self.type_codes.append(code)
+        self.payloads.append(dumps(payload))
+        
+        if len(self.payloads) > self.max_events:
+            drop = max(len(self.payloads) - self.max_events, self.max_events // 4)
+            del self.timestamps[:drop]
+            del self.type_codes[:drop]
+            del self.payloads[:drop]
+    
+    def __len__(self) -> int:
+        return len(self.payloads)
+    
+    def __iter__(self) -> Iterator[Tuple[float, Dict[str, Any]]]:
+        for timestamp, code, payload in zip(self.timestamps, self.type_codes, self.payloads):
+            event = loads(payload)
+            if code:
+                event = {"type": self._type_names[code], **event}
+            yield timestamp, event
+    
+    @classmethod
+    def _intern_type(cls, event_type: Any) -> int:
+        """Return the shared code for an event type, or 0 if it cannot be interned."""
+        if not isinstance(event_type, str):
+            return 0
+        code = cls._type_codes.get(event_type)
+        if code is None:
+            if len(cls._type_names) > MAX_EVENT_TYPES:
+                return 0
+            code = len(cls._type_names)
+            cls._type_names.append(event_type)
+            cls._type_codes[event_type] = code
+        return code
+
+@dataclass(slots=True)
+class ConnectionGroup:
+    """The child socket and caretaker sockets attached to one child."""
+    child: Optional[WebSocket] = None
+    caretakers: List[WebSocket] = field(default_factory=list)
+    
+    def sockets(self) -> List[WebSocket]:
+        """All sockets in the group, child first."""
+        return ([self.child] if self.child else []) + self.caretakers
+    
+    def is_empty(self) -> bool:
+        """Whether no sockets remain in the group."""
+        return self.child is None and not self.caretakers
+
+@dataclass(slots=True)
+class GameSession:
+    """In-memory state of one game session. Timestamps are time.monotonic() seconds."""
+    session_id: str
+    child_id: str
+    config: Dict[str, Any]
+    started_at: float
+    status: str = "active"
+    ended_at: Optional[float] = None
+    summary: Optional[Dict[str, Any]] = None
+    events: EventLog = field(default_factory=EventLog)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Wire representation, with timestamps formatted as ISO strings."""
+        data = {
+            "session_id": self.session_id,
+            "child_id": self.child_id,
+            "config": self.config,
+            "started_at": format_timestamp(self.started_at),
+            "events": [
+                {**event, "timestamp": format_timestamp(timestamp)}
+                for timestamp, event in self.events
+            ],
+            "status": self.status
+        }
+        if self.ended_at is not None:
+            data["ended_at"] = format_timestamp(self.ended_at)
+            data["summary"] = self.summary
+        return data
+
 class GameManager:
     """Manages WebSocket connections and real-time game communications."""
     
-    def __init__(self):
-        # Store active connections: child_id -> {"child": websocket, "caretakers": [websockets]}
-        self.connections: Dict[str, Dict[str, Any]] = {}
-        # Store game sessions: session_id -> session_data
-        self.active_sessions: Dict[str, Dict[str, Any]] = {}
+    def __init__(self, tick_rate: Optional[float] = None, settings: Settings = settings):
+        if tick_rate is None:
+            tick_rate = settings.game_tick_rate
+        # Store active connections: child_id -> ConnectionGroup
+        self.connections: Dict[str, ConnectionGroup] = {}
+        # Store game sessions: session_id -> GameSession
+        self.active_sessions: Dict[str, GameSession] = {}
+        # Secondary indexes: child_id -> current session_id, status -> session_ids
+        self.child_sessions: Dict[str, str] = {}
+        self.sessions_by_status: Dict[str, Set[str]] = {}
+        # Completed sessions ordered by end time: (ended_at, session_id)
+        self.expiry_heap: List[Tuple[float, str]] = []
+        # Pending coalesced events: child_id -> {shape_key: message}
+        self.pending_frames: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        # Scheduled frame flushes: child_id -> asyncio task
+        self.flush_tasks: Dict[str, asyncio.Task] = {}
+        self.tick_interval = 1.0 / tick_rate if tick_rate > 0 else 0.0
+        # Last time each websocket was heard from (monotonic seconds)
+        self.last_activity: Dict[WebSocket, float] = {}
+        # Background supervisor task (heartbeat, idle reaping, session cleanup) and its defaults
+        self.supervisor_task: Optional[asyncio.Task] = None
+        self.supervisor_interval = settings.game_supervisor_interval_seconds
+        self.idle_timeout = settings.game_idle_timeout_seconds
+        self.session_retention_hours = settings.game_session_retention_hours
         
     async def add_connection(self, child_id: str, websocket: WebSocket, connection_type: str = "child"):
         """Add a WebSocket connection for a child."""
-        if child_id not in self.connections:
-            self.connections[child_id] = {
-                "child": None,
-                "caretakers": []
-            }
+        group = self.connections.setdefault(child_id, ConnectionGroup())
         
         if connection_type == "child":
-            self.connections[child_id]["child"] = websocket
+            group.child = websocket
             logger.info(f"Child connection added for {child_id}")
         else:
-            self.connections[child_id]["caretakers"].append(websocket)
+            group.caretakers.append(websocket)
             logger.info(f"Caretaker connection added for {child_id}")
+        
+        self.touch(websocket)
             
         # Send initial connection confirmation
-        await websocket.send_text(json.dumps({
+        await websocket.send_text(dumps_text({
             "type": "connection_confirmed",
             "child_id": child_id,
             "role": connection_type,
             "timestamp": datetime.utcnow().isoformat()
         }))
     
+    def touch(self, websocket: WebSocket):
+        """Record activity on a websocket so it is not reaped as idle."""
+        self.last_activity[websocket] = time.monotonic()
+    
     async def remove_connection(self, child_id: str, websocket: WebSocket):
         """Remove a WebSocket connection."""
+        self.last_activity.pop(websocket, None)
         if child_id not in self.connections:
             return
             
-        connections = self.connections[child_id]
+        group = self.connections[child_id]
         
         # Remove from child connection
-        if connections["child"] == websocket:
-            connections["child"] = None
+        if group.child == websocket:
+            group.child = None
             logger.info(f"Child connection removed for {child_id}")
             
         # Remove from caretaker connections
-        if websocket in connections["caretakers"]:
-            connections["caretakers"].remove(websocket)
+        if websocket in group.caretakers:
+            group.caretakers.remove(websocket)
             logger.info(f"Caretaker connection removed for {child_id}")
             
         # Clean up if no connections left
-        if not connections["child"] and not connections["caretakers"]:
+        if group.is_empty():
             del self.connections[child_id]
+            self._discard_pending_frame(child_id)
             logger.info(f"All connections removed for {child_id}")
     
     async def broadcast_to_caretakers(self, child_id: str, message: Dict[str, Any]):
@@ -67,22 +227,85 @@ class GameManager:
         if child_id not in self.connections:
             return
             
-        caretakers = self.connections[child_id]["caretakers"]
-        message_str = json.dumps(message)
+        caretakers = self.connections[child_id].caretakers
+        message_str = dumps_text(message)
         
         # Send to all caretakers
         disconnected_caretakers = []
+        started = time.perf_counter()
         for caretaker_ws in caretakers:
             try:
                 await caretaker_ws.send_text(message_str)
             except Exception as e:
-                logger.error(f"Failed to send message to caretaker: {str(e)}")
+                if should_log(logger, logging.ERROR, "caretaker.send_failed"):
+                    logger.error(f"Failed to send message to caretaker of {child_id}: {str(e)}")
                 disconnected_caretakers.append(caretaker_ws)
+        game_broadcast_duration_seconds.observe(time.perf_counter() - started)
+        if disconnected_caretakers:
+            game_dropped_sockets_total.labels("send_failed").inc(len(disconnected_caretakers))
         
         # Remove disconnected caretakers
         for ws in disconnected_caretakers:
-            if ws in caretakers:
-                caretakers.remove(ws)
+            await self.remove_connection(child_id, ws)
+    
+    async def coalesce_game_event(self, child_id: str, message: Dict[str, Any]):
+        """Queue a game event for caretakers, merging high-frequency drag events into frames."""
+        event = message.get("event") or {}
+        if self.tick_interval <= 0 or event.get("type") not in COALESCED_EVENT_TYPES:
+            # Discrete events (taps, errors, surprises) go out immediately, after
+            # any pending frame so caretakers see events in order.
+            await self.flush_game_events(child_id)
+            await self.broadcast_to_caretakers(child_id, message)
+            return
+        
+        # Keep only the latest position per shape
+        frame = self.pending_frames.setdefault(child_id, {})
+        frame[self._shape_key(event)] = message
+        
+        if child_id not in self.flush_tasks:
+            self.flush_tasks[child_id] = asyncio.create_task(self._flush_after_tick(child_id))
+    
+    async def flush_game_events(self, child_id: str):
+        """Send the pending coalesced frame for a child to its caretakers."""
+        task = self.flush_tasks.pop(child_id, None)
+        if task and task is not asyncio.current_task():
+            task.cancel()
+        
+        frame = self.pending_frames.pop(child_id, None)
+        if not frame:
+            return
+        
+        frame_message = {
+            "type": "game_event_frame",
+            "child_id": child_id,
+            "events": [message.get("event") for message in frame.values()],
+            "timestamp": datetime.utcnow().isoformat()
+        }
+        await self.broadcast_to_caretakers(child_id, frame_message)
+        logger.debug(f"Flushed frame of {len(frame)} events for {child_id}")
+    
+    async def _flush_after_tick(self, child_id: str):
+        """Flush a child's pending frame once the current tick has elapsed."""
+        await asyncio.sleep(self.tick_interval)
+        await self.flush_game_events(child_id)
+    
+    def _discard_pending_frame(self, child_id: str):
+        """Drop any pending frame and scheduled flush for a child."""
+        self.pending_frames.pop(child_id, None)
+        task = self.flush_tasks.pop(child_id, None)
+        if task:
+            task.cancel()
+    
+    @staticmethod
+    def _shape_key(event: Dict[str, Any]) -> str:
+        """Identify the shape a high-frequency event refers to."""
+        shape = event.get("shape")
+        if isinstance(shape, dict):
+            shape_id = shape.get("id") or shape.get("shape_id")
+            if shape_id is None:
+                shape_id = f"{shape.get('shape')}:{shape.get('color')}"
+            return str(shape_id)
+        return str(event.get("shape_id", shape))
     
     async def send_control_to_child(self, child_id: str, control_message: Dict[str, Any]):
         """Send a control message to the child's game session."""
@@ -90,33 +313,39 @@ class GameManager:
             logger.warning(f"No connection found for child {child_id}")
             return
             
-        child_ws = self.connections[child_id]["child"]
+        child_ws = self.connections[child_id].child
         if not child_ws:
             logger.warning(f"No child connection found for {child_id}")
             return
             
         try:
-            await child_ws.send_text(json.dumps(control_message))
-            logger.info(f"Control message sent to child {child_id}: {control_message}")
+            await child_ws.send_text(dumps_text(control_message))
+            if should_log(logger, logging.DEBUG, "control.sent"):
+                logger.debug(f"Control message sent to child {child_id}: {summarize(control_message)}")
         except Exception as e:
             logger.error(f"Failed to send control message to child {child_id}: {str(e)}")
+            game_dropped_sockets_total.labels("send_failed").inc()
             # Remove broken connection
-            self.connections[child_id]["child"] = None
+            await self.remove_connection(child_id, child_ws)
     
     async def start_game_session(self, child_id: str, game_config: Dict[str, Any]) -> str:
-        """Start a new game session."""
-        session_id = str(uuid.uuid4())
+        """Start a new game session, ending any session the child still has open."""
+        previous_id = self.child_sessions.get(child_id)
+        if previous_id is not None:
+            # Otherwise the old session would stay "active" with nothing pointing at it
+            await self.end_game_session(previous_id, {"reason": "replaced"})
         
-        session_data = {
-            "session_id": session_id,
-            "child_id": child_id,
-            "config": game_config,
-            "started_at": datetime.utcnow().isoformat(),
-            "events": [],
-            "status": "active"
-        }
+        session_id = str(uuid.uuid4())
         
-        self.active_sessions[session_id] = session_data
+        session = GameSession(
+            session_id=session_id,
+            child_id=child_id,
+            config=game_config,
+            started_at=time.monotonic()
+        )
+        self.active_sessions[session_id] = session
+        self.child_sessions[child_id] = session_id
+        self._set_status(session, "active")
         
         # Send session start message to child
         start_message = {
@@ -142,18 +371,39 @@ class GameManager:
         logger.info(f"Game session {session_id} started for child {child_id}")
         return session_id
     
+    async def update_session_config(self, session_id: str, updates: Dict[str, Any]):
+        """Merge late-arriving config members into a running session and push them out."""
+        session = self.active_sessions.get(session_id)
+        if session is None:
+            logger.warning(f"Session {session_id} not found")
+            return
+        session.config.update(updates)
+        
+        update_message = {
+            "type": "config_update",
+            "session_id": session_id,
+            "child_id": session.child_id,
+            "config": updates,
+            "timestamp": datetime.utcnow().isoformat()
+        }
+        await self.send_control_to_child(session.child_id, update_message)
+        await self.broadcast_to_caretakers(session.child_id, update_message)
+    
     async def end_game_session(self, session_id: str, session_summary: Dict[str, Any]):
         """End a game session."""
         if session_id not in self.active_sessions:
             logger.warning(f"Session {session_id} not found")
             return
             
-        session_data = self.active_sessions[session_id]
-        session_data["status"] = "completed"
-        session_data["ended_at"] = datetime.utcnow().isoformat()
-        session_data["summary"] = session_summary
+        session = self.active_sessions[session_id]
+        self._set_status(session, "completed")
+        session.ended_at = time.monotonic()
+        session.summary = session_summary
+        heapq.heappush(self.expiry_heap, (session.ended_at, session_id))
         
-        child_id = session_data["child_id"]
+        child_id = session.child_id
+        if self.child_sessions.get(child_id) == session_id:
+            del self.child_sessions[child_id]
         
         # Send session end message to child
         end_message = {
@@ -187,19 +437,20 @@ class GameManager:
             logger.warning(f"Trying to log event for non-existent session {session_id}")
             return
             
-        session_data = self.active_sessions[session_id]
-        event["timestamp"] = datetime.utcnow().isoformat()
-        session_data["events"].append(event)
+        session = self.active_sessions[session_id]
+        now = time.monotonic()
+        session.events.append(now, event)
+        timestamp = format_timestamp(now)
         
-        child_id = session_data["child_id"]
+        child_id = session.child_id
         
         # Broadcast event to caretakers with real-time updates
         caretaker_message = {
             "type": "game_event",
             "session_id": session_id,
             "child_id": child_id,
-            "event": event,
-            "timestamp": event["timestamp"]
+            "event": {**event, "timestamp": timestamp},
+            "timestamp": timestamp
         }
         
         await self.broadcast_to_caretakers(child_id, caretaker_message)
@@ -215,18 +466,25 @@ class GameManager:
         await self.send_control_to_child(child_id, control_message)
         
         # Log the control action
-        logger.info(f"Caretaker control sent to {child_id}: {control_data}")
+        if should_log(logger, logging.INFO, "control.caretaker"):
+            logger.info(f"Caretaker control sent to {child_id}: {control_data.get('action')}")
     
     def get_active_sessions(self) -> List[Dict[str, Any]]:
         """Get all active game sessions."""
         return [
-            session for session in self.active_sessions.values()
-            if session["status"] == "active"
+            self.active_sessions[session_id].to_dict()
+            for session_id in self.sessions_by_status.get("active", ())
         ]
     
+    def get_child_session(self, child_id: str) -> Optional[Dict[str, Any]]:
+        """Get the current active session for a child, if any."""
+        session_id = self.child_sessions.get(child_id)
+        return self.get_session_data(session_id) if session_id else None
+    
     def get_session_data(self, session_id: str) -> Optional[Dict[str, Any]]:
         """Get session data by session ID."""
-        return self.active_sessions.get(session_id)
+        session = self.active_sessions.get(session_id)
+        return session.to_dict() if session else None
     
     async def handle_surprise_trigger(self, child_id: str, surprise_type: str):
         """Handle surprise element triggers during gameplay."""
@@ -268,19 +526,128 @@ class GameManager:
         
         await self.broadcast_to_caretakers(child_id, caretaker_message)
     
-    async def cleanup_old_sessions(self, hours_old: int = 24):
+    async def cleanup_old_sessions(self, hours_old: int = SESSION_RETENTION_HOURS):
         """Clean up old completed sessions."""
-        current_time = datetime.utcnow()
-        sessions_to_remove = []
-        
-        for session_id, session_data in self.active_sessions.items():
-            if session_data["status"] == "completed":
-                session_end = datetime.fromisoformat(session_data.get("ended_at", session_data["started_at"]))
-                if (current_time - session_end).total_seconds() > hours_old * 3600:
-                    sessions_to_remove.append(session_id)
-        
-        for session_id in sessions_to_remove:
+        cutoff = time.monotonic() - hours_old * 3600
+        removed = 0
+        
+        # Completed sessions pop off the heap in end-time order
+        while self.expiry_heap and self.expiry_heap[0][0] < cutoff:
+            ended_at, session_id = heapq.heappop(self.expiry_heap)
+            session = self.active_sessions.get(session_id)
+            if session is None or session.status != "completed" or session.ended_at != ended_at:
+                continue
+            
+            self._set_status(session, None)
             del self.active_sessions[session_id]
+            removed += 1
             logger.info(f"Cleaned up old session {session_id}")
         
-        return len(sessions_to_remove)
\ No newline at end of file
+        return removed
+    
+    def _set_status(self, session: GameSession, status: Optional[str]):
+        """Move a session between status index buckets; None drops it from the index."""
+        bucket = self.sessions_by_status.get(session.status)
+        if bucket is not None:
+            bucket.discard(session.session_id)
+        if status is not None:
+            session.status = status
+            self.sessions_by_status.setdefault(status, set()).add(session.session_id)
+    
+    async def ping_connections(self) -> int:
+        """Ping every connection; returns the number of dead sockets removed."""
+        ping_message = dumps_text({
+            "type": "ping",
+            "timestamp": datetime.utcnow().isoformat()
+        })
+        dead = []
+        for child_id, group in list(self.connections.items()):
+            for websocket in group.sockets():
+                try:
+                    await websocket.send_text(ping_message)
+                except Exception as e:
+                    logger.warning(f"Ping failed for {child_id}: {str(e)}")
+                    dead.append((child_id, websocket))
+        
+        for child_id, websocket in dead:
+            await self.remove_connection(child_id, websocket)
+        if dead:
+            game_dropped_sockets_total.labels("ping_failed").inc(len(dead))
+        return len(dead)
+    
+    async def close_idle_connections(self, idle_timeout: float = IDLE_TIMEOUT_SECONDS) -> int:
+        """Close connections that have been silent longer than idle_timeout seconds."""
+        cutoff = time.monotonic() - idle_timeout
+        idle = []
+        for child_id, group in list(self.connections.items()):
+            for websocket in group.sockets():
+                if self.last_activity.get(websocket, 0.0) < cutoff:
+                    idle.append((child_id, websocket))
+        
+        for child_id, websocket in idle:
+            try:
+                await websocket.close(code=1001)
+            except Exception as e:
+                logger.debug(f"Closing idle socket for {child_id} failed: {str(e)}")
+            await self.remove_connection(child_id, websocket)
+            logger.info(f"Closed idle connection for {child_id}")
+        if idle:
+            game_dropped_sockets_total.labels("idle").inc(len(idle))
+        return len(idle)
+    
+    async def end_orphaned_sessions(self) -> int:
+        """End active sessions whose child is no longer connected."""
+        orphaned = []
+        for session_id in self.sessions_by_status.get("active", ()):
+            group = self.connections.get(self.active_sessions[session_id].child_id)
+            if not (group and group.child):
+                orphaned.append(session_id)
+        for session_id in orphaned:
+            await self.end_game_session(session_id, {"reason": "child_disconnected"})
+        return len(orphaned)
+    
+    async def supervise_once(self, idle_timeout: float = IDLE_TIMEOUT_SECONDS,
+                             hours_old: int = SESSION_RETENTION_HOURS) -> Dict[str, int]:
+        """Run one supervisor sweep and report how many resources were reclaimed."""
+        reclaimed = {
+            "dead_connections": await self.ping_connections(),
+            "idle_connections": await self.close_idle_connections(idle_timeout),
+            "orphaned_sessions": await self.end_orphaned_sessions(),
+            "expired_sessions": await self.cleanup_old_sessions(hours_old)
+        }
+        if any(reclaimed.values()):
+            logger.info(f"Supervisor reclaimed: {reclaimed}")
+        return reclaimed
+    
+    async def run_supervisor(self, interval: float = SUPERVISOR_INTERVAL_SECONDS,
+                             idle_timeout: float = IDLE_TIMEOUT_SECONDS, hours_old: int = SESSION_RETENTION_HOURS):
+        """Periodically sweep connections and sessions until cancelled."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.supervise_once(idle_timeout, hours_old)
+            except Exception as e:
+                logger.error(f"Supervisor sweep failed: {str(e)}")
+    
+    def start_supervisor(self, interval: Optional[float] = None, idle_timeout: Optional[float] = None,
+                         hours_old: Optional[int] = None):
+        """Start the background supervisor task if it is not already running; unset arguments come from settings."""
+        if self.supervisor_task and not self.supervisor_task.done():
+            return
+        interval = self.supervisor_interval if interval is None else interval
+        idle_timeout = self.idle_timeout if idle_timeout is None else idle_timeout
+        hours_old = self.session_retention_hours if hours_old is None else hours_old
+        self.supervisor_task = asyncio.create_task(self.run_supervisor(interval, idle_timeout, hours_old))
+        logger.info("Game manager supervisor started")
+    
+    async def stop_supervisor(self):
+        """Stop the background supervisor task."""
+        if not self.supervisor_task:
+            return
+        self.supervisor_task.cancel()
+        try:
+            await self.supervisor_task
+        except asyncio.CancelledError:
+            pass
+        self.supervisor_task = None
+        logger.info("Game manager supervisor stopped")
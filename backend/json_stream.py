@@ -0,0 +1,72 @@
+import json
+from typing import Any, List, Tuple
+
+class IncrementalObjectParser:
+    """Parses a JSON object arriving in chunks, yielding each top-level member once complete.
+
+    Model output may be wrapped in a markdown code fence; anything before the
+    first '{' is skipped and anything after the closing '}' is ignored. Only
+    top-level members are surfaced, so `level_config` is available as soon
+    as its closing brace arrives even while later members are still streaming.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.position = 0          # next character to scan
+        self.depth = 0             # nesting depth; 1 means inside the top-level object
+        self.in_string = False
+        self.escaped = False
+        self.member_start = None   # buffer index where the current top-level member begins
+        self.started = False
+        self.finished = False
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        """Add text; returns (key, value) for members completed by this chunk."""
+        if self.finished:
+            return []
+        self.buffer += chunk
+        members = []
+        buffer = self.buffer
+        index = self.position
+        while index < len(buffer):
+            char = buffer[index]
+            if not self.started:
+                if char == "{":
+                    self.started = True
+                    self.depth = 1
+                    self.member_start = index + 1
+            elif self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == "\\":
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+            elif char == '"':
+                self.in_string = True
+            elif char in "{[":
+                self.depth += 1
+            elif char in "}]":
+                self.depth -= 1
+                if self.depth == 0:
+                    members.extend(self._member(index))
+                    self.finished = True
+                    break
+            elif char == "," and self.depth == 1:
+                members.extend(self._member(index))
+                self.member_start = index + 1
+            index += 1
+        self.position = index
+        return members
+
+    def _member(self, end: int) -> List[Tuple[str, Any]]:
+        text = self.buffer[self.member_start:end].strip()
+        if not text:
+            return []
+        key, value = json.loads("{" + text + "}").popitem()
+        return [(key, value)]
+
+    def close(self):
+        """Raise if the stream ended before the object was complete."""
+        if not self.finished:
+            raise ValueError("Incomplete JSON object in stream")
@@ -0,0 +1,180 @@
+import atexit
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+import time
+from typing import Any, Dict, Optional
+from serialization import dumps_text
+from settings import get_settings
+
+settings = get_settings()
+
+# Root level and output format ("text" or "json")
+LOG_LEVEL = settings.log_level
+LOG_FORMAT = settings.log_format
+
+# Per-module levels; LOG_LEVELS="game_manager=DEBUG,sqlalchemy.engine=INFO" overrides these
+DEFAULT_MODULE_LEVELS = {
+    "sqlalchemy.engine": "WARNING",
+    "httpx": "WARNING",
+    "ai_agent": "INFO",
+    "game_manager": "INFO",
+}
+
+# Records waiting for the writer thread; beyond this they are dropped, never blocking the caller
+LOG_QUEUE_SIZE = settings.log_queue_size
+
+# Longest payload rendered into a log line before it is truncated
+MAX_PAYLOAD_CHARS = settings.log_max_payload_chars
+
+# Per-message logs: at most LOG_SAMPLE_BURST records per key every LOG_SAMPLE_INTERVAL seconds
+LOG_SAMPLE_BURST = settings.log_sample_burst
+LOG_SAMPLE_INTERVAL = settings.log_sample_interval
+
+# Keys whose values never reach the logs
+REDACTED_KEYS = {"password", "token", "access_token", "authorization", "api_key", "secret", "signature", "card_number", "cvv"}
+
+_STANDARD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+def truncate(value: Any, limit: int = MAX_PAYLOAD_CHARS) -> str:
+    """Render a value for a log line, cut to `limit` characters."""
+    text = value if isinstance(value, str) else repr(value)
+    if len(text) <= limit:
+        return text
+    return f"{text[:limit]}...(+{len(text) - limit} chars)"
+
+def redact(value: Any) -> Any:
+    """Copy of a payload with sensitive keys masked, recursing into dicts and lists."""
+    if isinstance(value, dict):
+        return {
+            key: "***" if str(key).lower() in REDACTED_KEYS else redact(item)
+            for key, item in value.items()
+        }
+    if isinstance(value, list):
+        return [redact(item) for item in value]
+    return value
+
+def summarize(payload: Any, limit: int = MAX_PAYLOAD_CHARS) -> str:
+    """Redacted, truncated rendering of a payload for logging."""
+    return truncate(redact(payload), limit)
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, including any `extra` fields on the record."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage()
+        }
+        for key, value in record.__dict__.items():
+            if key not in _STANDARD_ATTRS and not key.startswith("_"):
+                entry[key] = redact(value)
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return dumps_text(entry)
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops records when the writer falls behind instead of blocking."""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+class LogSampler:
+    """Rate-limits repetitive log lines per key.
+
+    Each key gets a burst of `burst` records per `interval` seconds; anything
+    past that is counted and reported as a single line once the key is let
+    through again.
+    """
+
+    def __init__(self, burst: int = LOG_SAMPLE_BURST, interval: float = LOG_SAMPLE_INTERVAL):
+        self.burst = burst
+        self.interval = interval
+        self.windows: Dict[str, list] = {}  # key -> [window_start, count, suppressed]
+        self.lock = threading.Lock()
+
+    def allow(self, key: str) -> bool:
+        now = time.monotonic()
+        with self.lock:
+            window = self.windows.get(key)
+            if window is None or now - window[0] >= self.interval:
+                suppressed = window[2] if window else 0
+                self.windows[key] = [now, 1, 0]
+                if suppressed:
+                    logging.getLogger("logging_config").info(f"Suppressed {suppressed} '{key}' log records")
+                return True
+            if window[1] < self.burst:
+                window[1] += 1
+                return True
+            window[2] += 1
+            return False
+
+# Shared sampler for per-message logging
+log_sampler = LogSampler()
+
+def should_log(logger: logging.Logger, level: int, key: str) -> bool:
+    """True if the record is enabled for the logger and within the key's sampling budget.
+
+    Check before formatting hot-path messages so suppressed records cost
+    neither f-string formatting nor a trip through the handlers.
+    """
+    return logger.isEnabledFor(level) and log_sampler.allow(key)
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+def parse_module_levels(spec: str) -> Dict[str, str]:
+    """Parse "module=LEVEL,other=LEVEL" into a dict."""
+    levels = {}
+    for part in spec.split(","):
+        if "=" in part:
+            name, level = part.split("=", 1)
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+def setup_logging(level: str = LOG_LEVEL, log_format: str = LOG_FORMAT):
+    """Route all logging through a queue to a background writer thread.
+
+    Safe to call more than once; later calls are no-ops.
+    """
+    global _listener
+    if _listener is not None:
+        return _listener
+
+    stream_handler = logging.StreamHandler(sys.stderr)
+    if log_format == "json":
+        stream_handler.setFormatter(JsonFormatter())
+    else:
+        stream_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+
+    log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    root = logging.getLogger()
+    root.handlers = [DroppingQueueHandler(log_queue)]
+    root.setLevel(level)
+
+    module_levels = dict(DEFAULT_MODULE_LEVELS)
+    module_levels.update(parse_module_levels(settings.log_levels))
+    for name, module_level in module_levels.items():
+        logging.getLogger(name).setLevel(module_level)
+
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+    return _listener
+
+def stop_logging():
+    """Flush queued records and stop the writer thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
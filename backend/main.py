@@ -1,51 +1,105 @@
-from fastapi import FastAPI, HTTPException, Depends, status, WebSocket, WebSocketDisconnect, Path, Body
+from fastapi import FastAPI, HTTPException, Depends, status, WebSocket, WebSocketDisconnect, Path, Body, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel
 from typing import List, Optional
-import os
-from dotenv import load_dotenv
+import copy
 import json
+import uuid
 from datetime import datetime
 import asyncio
 import logging
+import time
+from contextlib import asynccontextmanager
 
-# Load environment variables
-load_dotenv()
+# Validated settings for the APP_ENV profile (including .env); every module shares this instance
+from settings import get_settings
+settings = get_settings()
+
+# Configure logging before the other modules start emitting records
+from logging_config import setup_logging, should_log, summarize, truncate
+setup_logging()
 
 # Import custom modules
-from database import engine, SessionLocal, get_db
+from sqlalchemy import update
+from sqlalchemy.orm import joinedload
+from database import SessionLocal, get_db, dispose_engine
 from models import User, ChildProfile, SessionLog, DiagnosticReport, LicenseUsage
 from auth import verify_token, create_access_token, hash_password, verify_password
-from ai_agent import generate_game_config
-from payments import create_razorpay_order, verify_razorpay_payment
+from ai_agent import stream_game_config, AI_CONFIG_DEADLINE_SECONDS, FALLBACK_CONFIG
+from payments import (
+    create_razorpay_order, verify_razorpay_payment, pricing_catalog, process_dummy_payment, get_dummy_payment_manager,
+    close_payment_gateway, normalize_payment_type, calculate_amount, OrderNotPayableError
+)
+# Aliased: the route handlers below share these names
+from payments import (
+    create_subscription_order as build_subscription_order,
+    create_license_upgrade_order as build_license_upgrade_order,
+    create_report_unlock_order as build_report_unlock_order
+)
 from game_manager import GameManager
+from fulfillment import fulfillment_queue
+from cache import get_response_cache
+from serialization import FastJSONResponse
+from metrics import registry, MetricsMiddleware, CONTENT_TYPE, game_connections, game_active_sessions
+from profiling import PROFILING_ENABLED, ProfilingMiddleware, profile_store
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    logger.info(f"Starting with the {settings.environment} settings profile")
+    # Choosing the cache backend may ping Redis; do it off the loop, before the first request
+    await asyncio.to_thread(get_response_cache)
+    # Heartbeats, idle-socket reaping and session cleanup for long-running workers
+    game_manager.start_supervisor()
+    # Applies license upgrades and report unlocks for verified payments
+    fulfillment_queue.start_worker()
+    try:
+        yield
+    finally:
+        await game_manager.stop_supervisor()
+        await fulfillment_queue.stop_worker()
+        await close_payment_gateway()
+        dispose_engine()
+
 # Initialize FastAPI app
 app = FastAPI(
     title="NeuroNest API",
     description="Autism Screening Application with GPT-4 Integration",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=FastJSONResponse,
+    lifespan=lifespan
 )
 
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["http://localhost:3000", "https://neuronest.vercel.app"],
+    allow_origins=settings.cors_origins,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
 )
 
+# Request latency and status per route template
+app.add_middleware(MetricsMiddleware)
+
+# Opt-in profiling and slow-request capture (PROFILING_ENABLED)
+if PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+
 # Security
 security = HTTPBearer()
 
 # Game manager instance
-game_manager = GameManager()
+game_manager = GameManager(settings=settings)
+
+# Connection and session gauges are read from the game manager at scrape time
+game_connections.set_function(lambda: {
+    ("child",): sum(1 for group in game_manager.connections.values() if group.child),
+    ("caretaker",): sum(len(group.caretakers) for group in game_manager.connections.values())
+})
+game_active_sessions.set_function(lambda: len(game_manager.sessions_by_status.get("active", ())))
 
 # Pydantic models
 class UserCreate(BaseModel):
@@ -74,31 +128,73 @@ class SessionData(BaseModel):
     behavioral_notes: Optional[str] = None
 
 class PaymentOrder(BaseModel):
-    amount: int
+    # The amount is always taken from the pricing catalog, never from the client
     currency: str = "INR"
-    child_id: str
+    child_id: Optional[str] = None
+    subscription_type: Optional[str] = None
     report_type: str
 
 # Helper functions
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db = Depends(get_db)):
+def load_user_from_token(credentials: HTTPAuthorizationCredentials, db, *options):
+    """Resolve the bearer token to a User, applying any loader options to the query."""
     try:
         payload = verify_token(credentials.credentials)
         email = payload.get("email")
         if email is None:
             raise HTTPException(status_code=401, detail="Invalid token")
         
-        user = db.query(User).filter(User.email == email).first()
+        user = db.query(User).options(*options).filter(User.email == email).first()
         if user is None:
             raise HTTPException(status_code=401, detail="User not found")
         return user
     except Exception as e:
         raise HTTPException(status_code=401, detail="Invalid token")
 
+def load_owned_child(db, user: User, child_id: str) -> ChildProfile:
+    """One of `user`'s children by id; 404 for a malformed id or someone else's child."""
+    try:
+        parsed = uuid.UUID(child_id)
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Child not found")
+    child = db.query(ChildProfile).filter(ChildProfile.id == parsed, ChildProfile.user_id == user.id).first()
+    if not child:
+        raise HTTPException(status_code=404, detail="Child not found")
+    return child
+
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db = Depends(get_db)):
+    return load_user_from_token(credentials, db)
+
 # Routes
 @app.get("/")
 async def root():
     return {"message": "NeuroNest API is running", "version": "1.0.0"}
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics(request: Request):
+    # Scrapers authenticate with METRICS_TOKEN when it is configured
+    if settings.metrics_token and request.headers.get("authorization") != f"Bearer {settings.metrics_token}":
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+    return Response(content=registry.render(), media_type=CONTENT_TYPE)
+
+def require_profiling_access(request: Request):
+    """Profile captures are only served while profiling is enabled, behind PROFILING_TOKEN if set."""
+    if not PROFILING_ENABLED:
+        raise HTTPException(status_code=404, detail="Profiling is disabled")
+    if settings.profiling_token and request.headers.get("authorization") != f"Bearer {settings.profiling_token}":
+        raise HTTPException(status_code=401, detail="Invalid profiling token")
+
+@app.get("/debug/profiles", include_in_schema=False, dependencies=[Depends(require_profiling_access)])
+async def list_profiles(limit: int = Query(50, ge=1, le=200)):
+    captures = await asyncio.to_thread(profile_store.list, limit)
+    return {"captures": captures}
+
+@app.get("/debug/profiles/{capture_id}", include_in_schema=False, dependencies=[Depends(require_profiling_access)])
+async def get_profile(capture_id: str):
+    capture = await asyncio.to_thread(profile_store.get, capture_id)
+    if capture is None:
+        raise HTTPException(status_code=404, detail="Capture not found")
+    return capture
+
 @app.post("/auth/register")
 async def register(user_data: UserCreate, db = Depends(get_db)):
     try:
@@ -167,12 +263,25 @@ async def login(user_data: UserLogin, db = Depends(get_db)):
         raise HTTPException(status_code=500, detail="Login failed")
 
 @app.get("/user/profile")
-async def get_user_profile(current_user: User = Depends(get_current_user), db = Depends(get_db)):
+async def get_user_profile(request: Request, credentials: HTTPAuthorizationCredentials = Depends(security), db = Depends(get_db)):
+    # The token is resolved to a user before anything is served; repeat views then
+    # come from the response cache, keyed by the user id
+    current_user = load_user_from_token(credentials, db)
+    cache_key = f"profile:{current_user.id}"
+    entry = await get_response_cache().get(cache_key)
+    if entry is not None:
+        return get_response_cache().respond(request, entry)
+    
+    # License and children joined in a single query
+    current_user = db.query(User).options(
+        joinedload(User.license_usage),
+        joinedload(User.child_profiles)
+    ).filter(User.id == current_user.id).one()
     try:
-        license_usage = db.query(LicenseUsage).filter(LicenseUsage.user_id == current_user.id).first()
-        child_profiles = db.query(ChildProfile).filter(ChildProfile.user_id == current_user.id).all()
+        license_usage = current_user.license_usage
+        child_profiles = current_user.child_profiles
         
-        return {
+        profile = {
             "user": {
                 "id": str(current_user.id),
                 "email": current_user.email,
@@ -198,17 +307,33 @@ async def get_user_profile(current_user: User = Depends(get_current_user), db =
     except Exception as e:
         logger.error(f"Profile fetch error: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to fetch profile")
+    
+    entry = await get_response_cache().set(cache_key, profile, [f"user:{current_user.id}"])
+    return get_response_cache().respond(request, entry)
 
 @app.post("/children/create")
 async def create_child_profile(child_data: ChildProfileCreate, current_user: User = Depends(get_current_user), db = Depends(get_db)):
     try:
-        # Check license usage
-        license_usage = db.query(LicenseUsage).filter(LicenseUsage.user_id == current_user.id).first()
-        if license_usage and license_usage.used_slots >= license_usage.total_slots:
-            raise HTTPException(status_code=400, detail="License limit reached")
+        # Claim a license slot atomically; the WHERE clause makes concurrent
+        # requests unable to push used_slots past total_slots.
+        claimed = db.execute(
+            update(LicenseUsage)
+            .where(
+                LicenseUsage.user_id == current_user.id,
+                LicenseUsage.used_slots < LicenseUsage.total_slots
+            )
+            .values(used_slots=LicenseUsage.used_slots + 1)
+            .returning(LicenseUsage.used_slots)
+        ).first()
+        if claimed is None:
+            # Users without a license record are not slot-limited
+            if db.query(LicenseUsage.id).filter(LicenseUsage.user_id == current_user.id).first():
+                db.rollback()
+                raise HTTPException(status_code=400, detail="License limit reached")
         
-        # Create child profile
+        # Create child profile in the same transaction as the slot claim
         new_child = ChildProfile(
+            id=uuid.uuid4(),
             user_id=current_user.id,
             name=child_data.name,
             age=child_data.age,
@@ -216,15 +341,7 @@ async def create_child_profile(child_data: ChildProfileCreate, current_user: Use
             special_interest=child_data.special_interest
         )
         db.add(new_child)
-        db.commit()
-        db.refresh(new_child)
-        
-        # Update license usage
-        if license_usage:
-            license_usage.used_slots += 1
-            db.commit()
-        
-        return {
+        response = {
             "message": "Child profile created successfully",
             "child": {
                 "id": str(new_child.id),
@@ -234,7 +351,16 @@ async def create_child_profile(child_data: ChildProfileCreate, current_user: Use
                 "special_interest": new_child.special_interest
             }
         }
+        db.commit()
+        
+        # Profile lists children and license usage
+        await get_response_cache().invalidate(f"user:{current_user.id}")
+        
+        return response
+    except HTTPException:
+        raise
     except Exception as e:
+        db.rollback()
         logger.error(f"Child profile creation error: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to create child profile")
 
@@ -255,6 +381,9 @@ async def log_session(session_data: SessionData, current_user: User = Depends(ge
         db.commit()
         db.refresh(session_log)
         
+        # Reports for this child now include the new session
+        await get_response_cache().invalidate(f"child:{session_log.child_id}")
+        
         # Generate AI analysis
         session_summary = {
             "level": session_data.level,
@@ -278,24 +407,23 @@ async def log_session(session_data: SessionData, current_user: User = Depends(ge
         raise HTTPException(status_code=500, detail="Failed to log session")
 
 @app.get("/reports/{child_id}")
-async def get_child_reports(child_id: str, current_user: User = Depends(get_current_user), db = Depends(get_db)):
+async def get_child_reports(child_id: str, request: Request, credentials: HTTPAuthorizationCredentials = Depends(security), db = Depends(get_db)):
+    # Ownership is checked before anything is served from the cache
+    current_user = load_user_from_token(credentials, db)
+    child = load_owned_child(db, current_user, child_id)
+    cache_key = f"reports:{child.id}"
+    entry = await get_response_cache().get(cache_key)
+    if entry is not None:
+        return get_response_cache().respond(request, entry)
+    
     try:
-        # Verify child belongs to user
-        child = db.query(ChildProfile).filter(
-            ChildProfile.id == child_id,
-            ChildProfile.user_id == current_user.id
-        ).first()
-        
-        if not child:
-            raise HTTPException(status_code=404, detail="Child not found")
-        
         # Get all session logs for this child
-        session_logs = db.query(SessionLog).filter(SessionLog.child_id == child_id).all()
+        session_logs = db.query(SessionLog).filter(SessionLog.child_id == child.id).all()
         
         # Get diagnostic reports
-        diagnostic_reports = db.query(DiagnosticReport).filter(DiagnosticReport.child_id == child_id).all()
+        diagnostic_reports = db.query(DiagnosticReport).filter(DiagnosticReport.child_id == child.id).all()
         
-        return {
+        reports = {
             "child": {
                 "id": str(child.id),
                 "name": child.name,
@@ -304,37 +432,46 @@ async def get_child_reports(child_id: str, current_user: User = Depends(get_curr
             },
             "sessions": [
                 {
-                    "id": str(session.id),
+                    "id": session.id,
                     "level": session.level,
                     "completion_time": session.completion_time,
                     "errors": session.errors,
                     "reaction_time": session.reaction_time,
                     "surprise_triggered": session.surprise_triggered,
                     "abandoned": session.abandoned,
-                    "created_at": session.created_at.isoformat()
+                    "created_at": session.created_at
                 }
                 for session in session_logs
             ],
             "reports": [
                 {
-                    "id": str(report.id),
+                    "id": report.id,
                     "report_data": report.report_json,
                     "diagnosis": report.diagnosis,
-                    "confirmed_at": report.confirmed_at.isoformat() if report.confirmed_at else None
+                    "confirmed_at": report.confirmed_at
                 }
                 for report in diagnostic_reports
             ]
         }
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Reports fetch error: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to fetch reports")
+    
+    entry = await get_response_cache().set(cache_key, reports, [f"child:{child.id}"])
+    return get_response_cache().respond(request, entry)
 
 @app.get("/children/{child_id}")
-async def get_child(child_id: str, current_user: User = Depends(get_current_user), db = Depends(get_db)):
-    child = db.query(ChildProfile).filter(ChildProfile.id == child_id, ChildProfile.user_id == current_user.id).first()
-    if not child:
-        raise HTTPException(status_code=404, detail="Child not found")
-    return {
+async def get_child(child_id: str, request: Request, credentials: HTTPAuthorizationCredentials = Depends(security), db = Depends(get_db)):
+    current_user = load_user_from_token(credentials, db)
+    child = load_owned_child(db, current_user, child_id)
+    cache_key = f"child:{child.id}"
+    entry = await get_response_cache().get(cache_key)
+    if entry is not None:
+        return get_response_cache().respond(request, entry)
+    
+    entry = await get_response_cache().set(cache_key, {
         "id": str(child.id),
         "name": child.name,
         "age": child.age,
@@ -342,12 +479,38 @@ async def get_child(child_id: str, current_user: User = Depends(get_current_user
         "special_interest": child.special_interest,
         "diagnosis_status": child.diagnosis_status,
         "created_at": child.created_at
-    }
+    }, [f"user:{current_user.id}", f"child:{child.id}"])
+    return get_response_cache().respond(request, entry)
 
+def owned_child_id(db, user: User, child_id: Optional[str]) -> uuid.UUID:
+    """The id of one of `user`'s children, for orders that unlock its report; 400 otherwise."""
+    try:
+        parsed = uuid.UUID(str(child_id))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="A valid child_id is required")
+    if not db.query(ChildProfile.id).filter(ChildProfile.id == parsed, ChildProfile.user_id == user.id).first():
+        raise HTTPException(status_code=400, detail="Child not found")
+    return parsed
+
+# Payment routes that only do blocking ledger work are plain functions, so
+# FastAPI runs them in its threadpool instead of on the event loop
 @app.post("/payments/create-order")
-async def create_payment_order(order_data: PaymentOrder, current_user: User = Depends(get_current_user)):
+def create_payment_order(order_data: PaymentOrder, current_user: User = Depends(get_current_user),
+                               db = Depends(get_db)):
+    payment_type = normalize_payment_type(order_data.report_type)
+    child_id = owned_child_id(db, current_user, order_data.child_id) if payment_type == "report_unlock" else None
+    try:
+        amount = calculate_amount(payment_type, str(current_user.role), order_data.subscription_type, order_data.currency)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     try:
-        order = create_razorpay_order(order_data.amount, order_data.currency)
+        order = create_razorpay_order(
+            amount,
+            order_data.currency,
+            user_id=current_user.id,
+            payment_type=payment_type,
+            child_id=child_id
+        )
         return {
             "order_id": order["id"],
             "amount": order["amount"],
@@ -362,18 +525,19 @@ async def create_payment_order(order_data: PaymentOrder, current_user: User = De
 async def process_payment(payment_data: dict, current_user: User = Depends(get_current_user)):
     """Process a dummy payment."""
     try:
-        from payments import process_dummy_payment
-        result = process_dummy_payment(
+        result = await process_dummy_payment(
             payment_data["order_id"],
             payment_data.get("payment_method", "card")
         )
         return result
+    except OrderNotPayableError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         logger.error(f"Payment processing error: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to process payment")
 
 @app.post("/payments/verify")
-async def verify_payment(payment_data: dict, current_user: User = Depends(get_current_user)):
+def verify_payment(payment_data: dict, current_user: User = Depends(get_current_user)):
     try:
         is_valid = verify_razorpay_payment(
             payment_data["order_id"],
@@ -381,38 +545,51 @@ async def verify_payment(payment_data: dict, current_user: User = Depends(get_cu
             payment_data.get("signature", "")
         )
         
-        if is_valid:
-            return {"message": "Payment verified successfully"}
-        else:
+        if not is_valid:
             raise HTTPException(status_code=400, detail="Payment verification failed")
+        # Fulfillment happens in the background worker; checkout returns right away
+        fulfillment_queue.enqueue(payment_data["payment_id"])
+        return {"message": "Payment verified successfully"}
+    except HTTPException:
+        raise
+    except ValueError as e:
+        # Not a captured payment in the ledger
+        logger.warning(f"Payment verification rejected: {str(e)}")
+        raise HTTPException(status_code=400, detail="Payment verification failed")
     except Exception as e:
         logger.error(f"Payment verification error: {str(e)}")
         raise HTTPException(status_code=500, detail="Payment verification failed")
 
 @app.get("/payments/pricing")
-async def get_pricing_info(current_user: User = Depends(get_current_user)):
-    """Get pricing information for different services."""
+async def get_pricing_info(request: Request):
+    """Get pricing information for different services.
+    
+    Pricing is public and precompiled, so the body is served as-is with a strong
+    ETag that lets clients and proxies revalidate or skip the request.
+    """
     try:
-        from payments import PRICING
-        return {
-            "pricing": PRICING,
-            "currency": "USD",
-            "message": "Dummy payment system - all payments are simulated"
+        pricing_catalog.refresh_if_changed()
+        headers = {
+            "ETag": pricing_catalog.etag,
+            "Cache-Control": "public, max-age=300, stale-while-revalidate=3600"
         }
+        if_none_match = request.headers.get("if-none-match", "")
+        if pricing_catalog.etag in [tag.strip() for tag in if_none_match.split(",")]:
+            return Response(status_code=304, headers=headers)
+        return Response(content=pricing_catalog.body, media_type="application/json", headers=headers)
     except Exception as e:
         logger.error(f"Pricing fetch error: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to fetch pricing")
 
 @app.post("/payments/create-subscription-order")
-async def create_subscription_order(
+def create_subscription_order(
     subscription_type: str = Body(...),
     currency: str = Body("USD"),
     current_user: User = Depends(get_current_user)
 ):
     """Create order for subscription upgrade."""
     try:
-        from payments import create_subscription_order
-        order = create_subscription_order(str(current_user.role), subscription_type, currency)
+        order = build_subscription_order(str(current_user.role), subscription_type, currency, user_id=current_user.id)
         return {
             "order_id": order["id"],
             "amount": order["amount"],
@@ -424,14 +601,13 @@ async def create_subscription_order(
         raise HTTPException(status_code=500, detail="Failed to create subscription order")
 
 @app.post("/payments/create-license-upgrade-order")
-async def create_license_upgrade_order(
-    currency: str = Body("USD"),
+def create_license_upgrade_order(
+    currency: str = Body("USD", embed=True),
     current_user: User = Depends(get_current_user)
 ):
     """Create order for license upgrade."""
     try:
-        from payments import create_license_upgrade_order
-        order = create_license_upgrade_order(str(current_user.role), currency)
+        order = build_license_upgrade_order(str(current_user.role), currency, user_id=current_user.id)
         return {
             "order_id": order["id"],
             "amount": order["amount"],
@@ -443,15 +619,16 @@ async def create_license_upgrade_order(
         raise HTTPException(status_code=500, detail="Failed to create license upgrade order")
 
 @app.post("/payments/create-report-unlock-order")
-async def create_report_unlock_order(
+def create_report_unlock_order(
     child_id: str = Body(...),
     currency: str = Body("USD"),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    db = Depends(get_db)
 ):
     """Create order for report unlock."""
+    child_uuid = owned_child_id(db, current_user, child_id)
     try:
-        from payments import create_report_unlock_order
-        order = create_report_unlock_order(child_id, currency)
+        order = build_report_unlock_order(child_uuid, currency, user_id=current_user.id)
         return {
             "order_id": order["id"],
             "amount": order["amount"],
@@ -463,14 +640,19 @@ async def create_report_unlock_order(
         raise HTTPException(status_code=500, detail="Failed to create report unlock order")
 
 @app.get("/payments/history")
-async def get_payment_history(current_user: User = Depends(get_current_user)):
+def get_payment_history(
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    current_user: User = Depends(get_current_user)
+):
     """Get payment history for the current user."""
     try:
-        from payments import dummy_payment_manager
-        payments = dummy_payment_manager.get_payment_history()
+        history = get_dummy_payment_manager().get_payment_history(current_user.id, limit, offset)
         return {
-            "payments": payments,
-            "total_payments": len(payments)
+            "payments": history["payments"],
+            "total_payments": history["total"],
+            "limit": limit,
+            "offset": offset
         }
     except Exception as e:
         logger.error(f"Payment history fetch error: {str(e)}")
@@ -478,25 +660,77 @@ async def get_payment_history(current_user: User = Depends(get_current_user)):
 
 @app.websocket("/ws/{child_id}")
 async def websocket_endpoint(websocket: WebSocket, child_id: str):
-    import logging
-    logging.info(f"WebSocket connection attempt for child {child_id}")
+    """Game channel for one child.
+
+    `?type=caretaker` joins as a monitor; anything else (the default) is the
+    child's own connection, which starts the game session.
+    """
     await websocket.accept()
-    logging.info(f"WebSocket accepted for child {child_id}")
-    await game_manager.add_connection(child_id, websocket)
+    connection_type = websocket.query_params.get("type", "child")
+    logger.info(f"WebSocket accepted for child {child_id} ({connection_type})")
+    await game_manager.add_connection(child_id, websocket, connection_type)
+
+    # Only the child's own connection starts a game session; caretakers just monitor
+    if connection_type == "child" and not await start_child_session(websocket, child_id):
+        await game_manager.remove_connection(child_id, websocket)
+        return
 
-    # Start game session for the child connection
-    from models import ChildProfile, SessionLog
-    from database import SessionLocal
+    try:
+        while True:
+            data = await websocket.receive_text()
+            game_manager.touch(websocket)
+            try:
+                message = json.loads(data)
+                message_type = message["type"]
+            except (ValueError, KeyError, TypeError):
+                # A malformed frame (bad JSON, not an object, no type) is dropped, not fatal
+                if should_log(logger, logging.WARNING, "ws.malformed"):
+                    logger.warning(f"Ignoring malformed WebSocket frame from {child_id}: {truncate(data, 100)}")
+                continue
+            if should_log(logger, logging.DEBUG, "ws.message"):
+                logger.debug(f"Received WebSocket message from {child_id}: {message_type}")
+            
+            if message_type == "pong":
+                continue
+            elif message_type == "game_event":
+                # Drag events are merged into per-tick frames; discrete events pass straight through
+                await game_manager.coalesce_game_event(child_id, message)
+            elif message_type == "control_command":
+                if should_log(logger, logging.DEBUG, "ws.control_command"):
+                    logger.debug(f"Control command received for {child_id}: {summarize(message.get('control'))}")
+                await game_manager.send_control_to_child(child_id, message)
+            elif message_type in ["session_started", "game_paused", "game_resumed", "session_ended"]:
+                # Route session state messages to caretakers
+                await game_manager.broadcast_to_caretakers(child_id, message)
+                logger.info(f"Session state message broadcasted to caretakers for {child_id}: {message_type}")
+            elif should_log(logger, logging.WARNING, "ws.unhandled"):
+                logger.warning(f"Unhandled message type from {child_id}: {truncate(message_type, 50)}")
+    except WebSocketDisconnect:
+        logger.info(f"WebSocket disconnected for {child_id}")
+        await game_manager.remove_connection(child_id, websocket)
+
+async def start_child_session(websocket: WebSocket, child_id: str) -> bool:
+    """Generate a game config for the child and start its session.
+    
+    Returns False if the child does not exist and the socket was closed.
+    """
     db = SessionLocal()
+    session_id = None
     try:
-        child = db.query(ChildProfile).filter(ChildProfile.id == child_id).first()
+        try:
+            child_uuid = uuid.UUID(child_id)
+        except ValueError:
+            child_uuid = None
+        child = db.query(ChildProfile).filter(ChildProfile.id == child_uuid).first() if child_uuid else None
         if not child:
-            import logging
-            logging.error(f"Child with id {child_id} not found. Closing WebSocket.")
+            logger.error(f"Child with id {child_id} not found. Closing WebSocket.")
             await websocket.close()
-            return
+            return False
         
-        previous_sessions = db.query(SessionLog).filter(SessionLog.child_id == child_id).all()
+        # Oldest first: the difficulty engine rolls up the most recent sessions
+        previous_sessions = (
+            db.query(SessionLog).filter(SessionLog.child_id == child_uuid).order_by(SessionLog.created_at).all()
+        )
         # Convert previous_sessions to plain dicts (avoid SQLAlchemy InstanceState)
         previous_sessions_dicts = [
             {
@@ -521,37 +755,30 @@ async def websocket_endpoint(websocket: WebSocket, child_id: str):
             "special_interest": child.special_interest
         }
         
-        # Generate game config with fallback
-        try:
-            from ai_agent import generate_game_config
-            game_config = generate_game_config(child_profile, previous_sessions_dicts)
-        except Exception as e:
-            import logging
-            logging.error(f"AI config generation failed, using fallback: {e}")
-            # Fallback config
-            game_config = {
-                "level_config": {
-                    "difficulty": 2,
-                    "shapes": ["circle", "square", "triangle"],
-                    "colors": ["red", "blue", "green", "yellow"],
-                    "sounds": True,
-                    "animation_speed": 1.0,
-                    "surprise_elements": ["color_change", "size_change"]
-                },
-                "assessment_focus": ["attention", "motor_skills", "pattern_recognition"],
-                "session_duration": 10,
-                "break_intervals": 3,
-                "motivation_elements": ["celebration_sounds", "progress_indicators"]
-            }
+        # Stream the config: the child starts playing as soon as level_config is complete,
+        # and the remaining members follow as a config_update
+        deadline = time.monotonic() + AI_CONFIG_DEADLINE_SECONDS
+        game_config = {}
+        async for key, value in stream_game_config(child_profile, previous_sessions_dicts, deadline,
+                                                   owner=str(child.user_id)):
+            game_config[key] = value
+            if key == "level_config" and session_id is None:
+                session_id = await game_manager.start_game_session(child_id, {"level_config": value})
         
-        # Always start the game session
-        logging.info(f"Starting game session for child {child_id} with config: {game_config}")
-        await game_manager.start_game_session(child_id, game_config)
-        logging.info(f"Game session started successfully for child {child_id}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Game config for child {child_id}: {summarize(game_config)}")
+        if session_id is None:
+            game_config.setdefault("level_config", copy.deepcopy(FALLBACK_CONFIG["level_config"]))
+            session_id = await game_manager.start_game_session(child_id, game_config)
+        else:
+            remaining = {key: value for key, value in game_config.items() if key != "level_config"}
+            if remaining:
+                await game_manager.update_session_config(session_id, remaining)
         
     except Exception as e:
-        import logging
-        logging.error(f"Failed to start game session: {e}")
+        logger.error(f"Failed to start game session: {e}")
+        if session_id is not None:
+            return True
         # Send a basic session start even if everything else fails
         try:
             fallback_config = {
@@ -566,31 +793,10 @@ async def websocket_endpoint(websocket: WebSocket, child_id: str):
             }
             await game_manager.start_game_session(child_id, fallback_config)
         except Exception as fallback_error:
-            logging.error(f"Even fallback session start failed: {fallback_error}")
+            logger.error(f"Even fallback session start failed: {fallback_error}")
     finally:
         db.close()
-
-    try:
-        while True:
-            data = await websocket.receive_text()
-            message = json.loads(data)
-            logging.info(f"Received WebSocket message from {child_id}: {message['type']}")
-            
-            if message["type"] == "game_event":
-                await game_manager.broadcast_to_caretakers(child_id, message)
-                logging.info(f"Game event broadcasted to caretakers for {child_id}")
-            elif message["type"] == "control_command":
-                logging.info(f"Control command received for {child_id}: {message}")
-                await game_manager.send_control_to_child(child_id, message)
-            elif message["type"] in ["session_started", "game_paused", "game_resumed", "session_ended"]:
-                # Route session state messages to caretakers
-                await game_manager.broadcast_to_caretakers(child_id, message)
-                logging.info(f"Session state message broadcasted to caretakers for {child_id}: {message['type']}")
-            else:
-                logging.info(f"Unhandled message type: {message['type']}")
-    except WebSocketDisconnect:
-        logging.info(f"WebSocket disconnected for {child_id}")
-        await game_manager.remove_connection(child_id, websocket)
+    return True
 
 @app.post("/ai/game-config")
 async def ai_game_config(
@@ -613,4 +819,6 @@ async def ai_game_config(
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    # Worker processes import the app themselves
+    uvicorn.run(app if settings.workers == 1 else "main:app", host=settings.host, port=settings.port,
+                workers=settings.workers)
\ No newline at end of file
@@ -0,0 +1,354 @@
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Latency buckets in seconds, from sub-millisecond DB queries to slow AI calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+def _format_labels(labelnames: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class _Metric:
+    """Base for labelled metrics; children are created once per label combination."""
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.children: Dict[Tuple[str, ...], object] = {}
+        self.lock = threading.Lock()
+        if not self.labelnames:
+            self.children[()] = self._new_child()
+
+    def labels(self, *values):
+        """Child metric for the given label values (created on first use)."""
+        key = tuple(str(value) for value in values)
+        child = self.children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            with self.lock:
+                child = self.children.setdefault(key, self._new_child())
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+class _Value:
+    """A single float guarded by a lock that is only contended across threads."""
+    __slots__ = ("value", "lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self.lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self.lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        with self.lock:
+            self.value -= amount
+
+    def set(self, value: float):
+        self.value = float(value)
+
+class Counter(_Metric):
+    """Monotonically increasing count."""
+    kind = "counter"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1.0):
+        self.children[()].inc(amount)
+
+    def samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.value)}"
+            for key, child in list(self.children.items())
+        ]
+
+class Gauge(_Metric):
+    """Value that can go up and down, or be read from a callback at scrape time."""
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                 function: Optional[Callable[[], Any]] = None):
+        super().__init__(name, documentation, labelnames)
+        self.function = function
+
+    def _new_child(self):
+        return _Value()
+
+    def set(self, value: float):
+        self.children[()].set(value)
+
+    def inc(self, amount: float = 1.0):
+        self.children[()].inc(amount)
+
+    def dec(self, amount: float = 1.0):
+        self.children[()].dec(amount)
+
+    def set_function(self, function: Callable[[], Any]):
+        self.function = function
+
+    def samples(self) -> List[str]:
+        if self.function is not None:
+            value = self.function()
+            # Labelled gauges return {label_values: value} from their callback
+            if isinstance(value, dict):
+                return [
+                    f"{self.name}{_format_labels(self.labelnames, tuple(str(v) for v in key))} {_format_value(float(item))}"
+                    for key, item in value.items()
+                ]
+            return [f"{self.name} {_format_value(float(value))}"]
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.value)}"
+            for key, child in list(self.children.items())
+        ]
+
+class _HistogramValue:
+    """Bucket counts plus sum for one label combination."""
+    __slots__ = ("upper_bounds", "counts", "sum", "lock")
+
+    def __init__(self, upper_bounds: Tuple[float, ...]):
+        self.upper_bounds = upper_bounds
+        self.counts = [0] * (len(upper_bounds) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect_left(self.upper_bounds, value)
+        with self.lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    def time(self) -> "_Timer":
+        return _Timer(self)
+
+class _Timer:
+    """Context manager observing the elapsed time of its block."""
+    __slots__ = ("target", "started")
+
+    def __init__(self, target):
+        self.target = target
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.target.observe(time.perf_counter() - self.started)
+
+class Histogram(_Metric):
+    """Distribution of observed values in cumulative buckets."""
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.upper_bounds = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramValue(self.upper_bounds)
+
+    def observe(self, value: float):
+        self.children[()].observe(value)
+
+    def time(self) -> _Timer:
+        return self.children[()].time()
+
+    def samples(self) -> List[str]:
+        lines = []
+        for key, child in list(self.children.items()):
+            with child.lock:
+                counts = list(child.counts)
+                total = child.sum
+            cumulative = 0
+            for bound, count in zip(self.upper_bounds + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="' + _format_value(bound) + '"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+class MetricsRegistry:
+    """Holds metrics and renders them in the Prometheus text exposition format.
+
+    Values are per process; with several uvicorn workers each one reports
+    its own series, so scrape them individually or aggregate downstream.
+    """
+
+    def __init__(self):
+        self.metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self.metrics:
+            raise ValueError(f"Metric {metric.name} already registered")
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+              function: Optional[Callable[[], float]] = None) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames, function))
+
+    def histogram(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in self.metrics.values()) + "\n"
+
+# Global metrics registry
+registry = MetricsRegistry()
+
+# HTTP
+http_requests_total = registry.counter(
+    "http_requests_total", "HTTP requests by route template and status", ("method", "route", "status")
+)
+http_request_duration_seconds = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template", ("method", "route")
+)
+
+# Database
+db_query_duration_seconds = registry.histogram(
+    "db_query_duration_seconds", "SQL statement latency by statement type", ("operation",)
+)
+
+# AI config generation
+ai_request_duration_seconds = registry.histogram(
+    "ai_request_duration_seconds", "Game config generation latency by provider and outcome", ("provider", "outcome")
+)
+ai_config_fallbacks_total = registry.counter(
+    "ai_config_fallbacks_total", "Game configs served from the fallback instead of the AI provider", ("reason",)
+)
+ai_config_validations_total = registry.counter(
+    "ai_config_validations_total", "Provider configs by validation result (valid, repaired, rejected)", ("result",)
+)
+ai_config_repairs_total = registry.counter(
+    "ai_config_repairs_total", "Individual repairs applied to provider configs", ("repair",)
+)
+ai_config_source_total = registry.counter(
+    "ai_config_source_total", "Game configs by source (engine or llm) and the policy's reason", ("source", "reason")
+)
+ai_config_batch_size = registry.histogram(
+    "ai_config_batch_size", "Children per batched config generation call", buckets=(1, 2, 4, 8, 16, 32)
+)
+
+# Outbound AI rate limiting
+ai_scheduler_queue_wait_seconds = registry.histogram(
+    "ai_scheduler_queue_wait_seconds", "Time AI requests waited for quota before being sent", ("priority",)
+)
+ai_scheduler_queue_depth = registry.gauge("ai_scheduler_queue_depth", "AI requests waiting for quota", ("priority",))
+ai_scheduler_rejected_total = registry.counter(
+    "ai_scheduler_rejected_total", "AI requests not admitted within their deadline", ("priority", "reason")
+)
+
+# Circuit breakers
+circuit_breaker_state = registry.gauge(
+    "circuit_breaker_state", "Breaker state: 0 closed, 1 half-open, 2 open", ("breaker",)
+)
+circuit_breaker_transitions_total = registry.counter(
+    "circuit_breaker_transitions_total", "Breaker state changes by new state", ("breaker", "state")
+)
+circuit_breaker_timeout_seconds = registry.gauge(
+    "circuit_breaker_timeout_seconds", "Adaptive per-call timeout currently applied", ("breaker",)
+)
+
+# Game manager
+game_connections = registry.gauge("game_connections", "Open WebSocket connections", ("type",))
+game_active_sessions = registry.gauge("game_active_sessions", "Game sessions currently active")
+game_broadcast_duration_seconds = registry.histogram(
+    "game_broadcast_duration_seconds", "Time to fan a message out to a child's caretakers"
+)
+game_dropped_sockets_total = registry.counter(
+    "game_dropped_sockets_total", "WebSockets removed after a failed send or idle timeout", ("reason",)
+)
+
+# Payments
+payment_processing_duration_seconds = registry.histogram(
+    "payment_processing_duration_seconds", "Payment gateway charge latency", ("outcome",)
+)
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency and status per route template.
+
+    Routes are labelled by their template (e.g. /children/{child_id}) so
+    label cardinality stays bounded; unmatched paths share one label.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            route = scope.get("route")
+            route_path = getattr(route, "path", "unmatched")
+            method = scope.get("method", "")
+            http_request_duration_seconds.labels(method, route_path).observe(elapsed)
+            http_requests_total.labels(method, route_path, status_code).inc()
+
+def instrument_engine(engine):
+    """Time every SQL statement executed through the engine."""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_started"].pop()
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "UNKNOWN"
+        db_query_duration_seconds.labels(operation).observe(time.perf_counter() - started)
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("query_started"):
+            conn.info["query_started"].pop()
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, Float, Boolean, DateTime, ForeignKey, Text, JSON
+from sqlalchemy import Column, String, Integer, Float, Boolean, DateTime, ForeignKey, Text, JSON, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -88,19 +88,46 @@ class LicenseUsage(Base):
 
 class PaymentHistory(Base):
     __tablename__ = "payment_history"
+    __table_args__ = (
+        # Per-user history pages, newest first (also serves plain user_id lookups)
+        Index("ix_payment_history_user_created", "user_id", "created_at"),
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
-    order_id = Column(String, nullable=False)
-    payment_id = Column(String)
+    order_id = Column(String, nullable=False, unique=True, index=True)
+    payment_id = Column(String, index=True)
     amount = Column(Integer, nullable=False)  # Amount in smallest currency unit (paise for INR)
     currency = Column(String, default="INR")
     status = Column(String, default="pending")  # 'pending', 'completed', 'failed'
-    payment_type = Column(String)  # 'report_unlock', 'license_upgrade'
+    payment_type = Column(String)  # 'report_unlock', 'license_upgrade', 'premium_subscription'
+    receipt = Column(String)  # e.g. 'report_unlock_<child_id>'
+    child_id = Column(UUID(as_uuid=True), ForeignKey("child_profiles.id"))  # Child a report unlock is for
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+
+class FulfillmentEvent(Base):
+    __tablename__ = "fulfillment_events"
+    __table_args__ = (
+        # Worker polls for due pending events
+        Index("ix_fulfillment_events_status_available", "status", "available_at"),
+    )
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    payment_id = Column(String, nullable=False, unique=True)  # Idempotency key
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
+    payment_type = Column(String)
+    receipt = Column(String)
+    child_id = Column(UUID(as_uuid=True))
+    status = Column(String, default="pending")  # 'pending', 'done', 'failed'
+    attempts = Column(Integer, default=0)
+    last_error = Column(Text)
+    available_at = Column(DateTime, default=datetime.utcnow)  # Next attempt not before
     created_at = Column(DateTime, default=datetime.utcnow)
+    processed_at = Column(DateTime)
 
 
 # At the end of your models.py file
 def register_models():
     """Ensure all models are imported and registered"""
-    return [User, ChildProfile, SessionLog, DiagnosticReport, LicenseUsage, PaymentHistory]
\ No newline at end of file
+    return [User, ChildProfile, SessionLog, DiagnosticReport, LicenseUsage, PaymentHistory, FulfillmentEvent]
\ No newline at end of file
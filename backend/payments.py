@@ -1,20 +1,30 @@
 import os
 import uuid
 import time
-from typing import Dict, Any, Optional
-from dotenv import load_dotenv
+import json
+import random
+import asyncio
+import hashlib
+from abc import ABC, abstractmethod
+from decimal import Decimal
+from types import MappingProxyType
+from typing import Dict, Any, Mapping, Optional, Tuple
 import logging
 from datetime import datetime, timedelta
-
-load_dotenv()
+from database import SessionLocal
+from models import PaymentHistory
+from metrics import payment_processing_duration_seconds
+from settings import Settings, get_settings
 
 logger = logging.getLogger(__name__)
 
+settings = get_settings()
+
 # Dummy payment configuration
 DUMMY_PAYMENT_CONFIG = {
     "enabled": True,
-    "success_rate": 0.95,  # 95% success rate
-    "processing_delay": 2,  # 2 seconds processing delay
+    "success_rate": settings.payment_success_rate,  # 95% by default
+    "processing_delay": settings.payment_processing_delay_seconds,  # 2 seconds by default
     "currency": "USD"
 }
 
@@ -56,60 +66,217 @@ PRICING = {
     }
 }
 
+# Items whose price depends on a variant (user role or subscription period)
+VARIANT_ITEMS = {"license_upgrade", "premium_subscription"}
+
+# Payment types sent by clients, mapped to the type fulfillment applies
+PAYMENT_TYPE_ALIASES = {
+    "parent_upgrade": "license_upgrade",
+    "doctor_upgrade": "license_upgrade",
+    "full": "report_unlock",
+}
+
+def normalize_payment_type(payment_type: Optional[str]) -> Optional[str]:
+    """Map client plan names onto the payment types fulfillment knows."""
+    return PAYMENT_TYPE_ALIASES.get(payment_type, payment_type)
+
+# How often to check PRICING_FILE for changes, in seconds
+PRICING_RELOAD_CHECK_SECONDS = 30
+
+class PricingCatalog:
+    """Pricing compiled once into an immutable minor-unit lookup table.
+    
+    Prices are keyed by (item_type, variant, currency) and stored as integers in
+    the smallest currency unit. The JSON body and strong ETag served by
+    /payments/pricing are precomputed alongside. If PRICING_FILE points at a
+    JSON file with the PRICING layout, it replaces the built-in prices and is
+    reloaded when it changes.
+    """
+    
+    def __init__(self, pricing: Dict[str, Any], pricing_file: Optional[str] = None):
+        self.pricing_file = pricing_file
+        self.file_mtime: Optional[float] = None
+        self.next_check = 0.0
+        self.compile(self._read_file() or pricing)
+    
+    def compile(self, pricing: Dict[str, Any]):
+        """Build the lookup table, response body and ETag, then swap them in."""
+        table: Dict[Tuple[str, Optional[str], str], int] = {}
+        for item_type, prices in pricing.items():
+            variants = prices.items() if item_type in VARIANT_ITEMS else [(None, prices)]
+            for variant, by_currency in variants:
+                for currency, amount in by_currency.items():
+                    # Decimal avoids float truncation (e.g. 0.29 * 100 == 28.999...)
+                    table[(item_type, variant, currency)] = int(Decimal(str(amount)) * 100)
+        
+        body = json.dumps({
+            "pricing": pricing,
+            "currency": "USD",
+            "message": "Dummy payment system - all payments are simulated"
+        }, separators=(",", ":"), sort_keys=True).encode()
+        
+        # Assign together so readers never see a table from one version and a body from another
+        self.table, self.body, self.etag = (
+            MappingProxyType(table),
+            body,
+            f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+        )
+    
+    def amount(self, item_type: str, variant: Optional[str], currency: str) -> Optional[int]:
+        """Price in minor units, or None if there is no such price."""
+        return self.table.get((item_type, variant, currency))
+    
+    def lowest(self, item_type: str, currency: str) -> Optional[int]:
+        """Cheapest price of an item across its variants, or None if it has none in `currency`."""
+        prices = [amount for (item, _, cur), amount in self.table.items() if item == item_type and cur == currency]
+        return min(prices) if prices else None
+    
+    def reload(self, pricing: Optional[Dict[str, Any]] = None):
+        """Recompile from the given pricing, or from PRICING_FILE if configured."""
+        pricing = pricing or self._read_file()
+        if pricing:
+            self.compile(pricing)
+            logger.info(f"Pricing catalog reloaded ({self.etag})")
+    
+    def refresh_if_changed(self):
+        """Reload PRICING_FILE if it changed; checks the file at most every few seconds."""
+        if not self.pricing_file or time.monotonic() < self.next_check:
+            return
+        self.next_check = time.monotonic() + PRICING_RELOAD_CHECK_SECONDS
+        try:
+            mtime = os.path.getmtime(self.pricing_file)
+        except OSError:
+            return
+        if mtime != self.file_mtime:
+            self.reload()
+    
+    def _read_file(self) -> Optional[Dict[str, Any]]:
+        if not self.pricing_file:
+            return None
+        try:
+            self.file_mtime = os.path.getmtime(self.pricing_file)
+            with open(self.pricing_file) as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.error(f"Failed to load pricing file {self.pricing_file}: {e}")
+            return None
+
+# Global pricing catalog, compiled at import
+pricing_catalog = PricingCatalog(PRICING, settings.pricing_file)
+
+class PaymentGateway(ABC):
+    """Interface for the gateway that actually charges an order."""
+    
+    @abstractmethod
+    async def charge(self, order: Dict[str, Any], payment_method: str) -> bool:
+        """Charge an order; returns True if the payment was captured."""
+    
+    async def close(self):
+        """Release any connections held by the gateway."""
+        pass
+
+class SimulatedGateway(PaymentGateway):
+    """Gateway that simulates processing delay and failures without blocking the event loop."""
+    
+    def __init__(self, success_rate: float = DUMMY_PAYMENT_CONFIG["success_rate"],
+                 processing_delay: float = DUMMY_PAYMENT_CONFIG["processing_delay"]):
+        self.success_rate = success_rate
+        self.processing_delay = processing_delay
+    
+    async def charge(self, order: Dict[str, Any], payment_method: str) -> bool:
+        await asyncio.sleep(self.processing_delay)
+        return random.random() < self.success_rate
+
+class HTTPPaymentGateway(PaymentGateway):
+    """Base class for real gateway clients sharing one pooled HTTP client.
+    
+    Subclasses implement charge() using self.client, which keeps connections
+    to the gateway alive across payments.
+    """
+    
+    def __init__(self, base_url: str, auth: Optional[Any] = None, max_connections: int = 20, timeout: float = 10.0):
+        # httpx is only needed once a real gateway is configured; keep it off the import path
+        import httpx
+        self.client = httpx.AsyncClient(
+            base_url=base_url,
+            auth=auth,
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        )
+    
+    async def close(self):
+        await self.client.aclose()
+
+class OrderNotPayableError(ValueError):
+    """The order does not exist or has already been processed."""
+
+# Ledger statuses (PaymentHistory.status) and the status reported to clients
+LEDGER_TO_PAYMENT_STATUS = {"completed": "captured", "failed": "failed"}
+
 class DummyPaymentManager:
-    """Dummy payment manager that simulates real payment processing."""
+    """Dummy payment manager that simulates real payment processing.
     
-    def __init__(self):
-        self.payments = {}  # Store payment history
-        self.orders = {}    # Store order history
+    Orders and payments are persisted to the PaymentHistory ledger, one row per
+    order, so they survive restarts and are shared across workers.
+    """
+    
+    def __init__(self, gateway: Optional[PaymentGateway] = None, session_factory=SessionLocal,
+                 settings: Settings = settings):
+        self.gateway = gateway or SimulatedGateway(settings.payment_success_rate, settings.payment_processing_delay_seconds)
+        self.session_factory = session_factory
         
-    def create_order(self, amount: int, currency: str = "USD", receipt: Optional[str] = None) -> Dict[str, Any]:
+    def create_order(self, amount: int, currency: str = "USD", receipt: Optional[str] = None,
+                     user_id: Optional[Any] = None, payment_type: Optional[str] = None,
+                     child_id: Optional[uuid.UUID] = None) -> Dict[str, Any]:
         """Create a dummy payment order."""
+        if user_id is None:
+            raise ValueError("user_id is required to create an order")
+        payment_type = normalize_payment_type(payment_type)
+        if payment_type == "report_unlock" and child_id is None:
+            raise ValueError("child_id is required to unlock a report")
+        
         order_id = f"order_{uuid.uuid4().hex[:12]}"
+        entry = PaymentHistory(
+            user_id=user_id,
+            order_id=order_id,
+            amount=amount,
+            currency=currency,
+            status="pending",
+            payment_type=payment_type,
+            receipt=receipt if receipt else f"dummy_order_{int(time.time())}",
+            child_id=child_id
+        )
         
-        order = {
-            "id": order_id,
-            "amount": amount,
-            "currency": currency,
-            "receipt": receipt if receipt else f"dummy_order_{int(time.time())}",
-            "status": "created",
-            "created_at": datetime.now().isoformat(),
-            "key": "dummy_key_12345"  # Dummy key for frontend
-        }
+        db = self.session_factory()
+        try:
+            db.add(entry)
+            db.commit()
+            order = self._order_to_dict(entry)
+        finally:
+            db.close()
         
-        self.orders[order_id] = order
         logger.info(f"Dummy order created: {order_id} for {amount} {currency}")
-        
         return order
     
-    def process_payment(self, order_id: str, payment_method: str = "card") -> Dict[str, Any]:
-        """Process a dummy payment."""
-        if order_id not in self.orders:
-            raise Exception("Order not found")
-        
-        order = self.orders[order_id]
+    async def process_payment(self, order_id: str, payment_method: str = "card") -> Dict[str, Any]:
+        """Process a dummy payment through the configured gateway.
         
-        # Simulate processing delay
-        time.sleep(DUMMY_PAYMENT_CONFIG["processing_delay"])
+        Only pending orders are charged; raises OrderNotPayableError otherwise.
+        Ledger reads and writes run in a worker thread.
+        """
+        order = await asyncio.to_thread(self._pending_order, order_id)
         
-        # Simulate success/failure based on success rate
-        import random
-        success = random.random() < DUMMY_PAYMENT_CONFIG["success_rate"]
+        # The gateway awaits its processing delay instead of blocking the event loop
+        started = time.perf_counter()
+        try:
+            success = await self.gateway.charge(order, payment_method)
+        except Exception:
+            payment_processing_duration_seconds.labels("error").observe(time.perf_counter() - started)
+            raise
+        payment_processing_duration_seconds.labels("success" if success else "failed").observe(time.perf_counter() - started)
         
         payment_id = f"pay_{uuid.uuid4().hex[:12]}"
-        
-        payment = {
-            "id": payment_id,
-            "order_id": order_id,
-            "amount": order["amount"],
-            "currency": order["currency"],
-            "status": "captured" if success else "failed",
-            "method": payment_method,
-            "created_at": datetime.now().isoformat(),
-            "processed_at": datetime.now().isoformat()
-        }
-        
-        self.payments[payment_id] = payment
+        await asyncio.to_thread(self._record_payment, order_id, payment_id, success)
         
         if success:
             logger.info(f"Dummy payment successful: {payment_id}")
@@ -130,27 +297,63 @@ class DummyPaymentManager:
                 "error": "Payment failed - insufficient funds"
             }
     
+    def _pending_order(self, order_id: str) -> Dict[str, Any]:
+        db = self.session_factory()
+        try:
+            entry = db.query(PaymentHistory).filter(PaymentHistory.order_id == order_id).first()
+            if entry is None:
+                raise OrderNotPayableError(f"Order {order_id} not found")
+            if entry.status != "pending":
+                raise OrderNotPayableError(f"Order {order_id} was already processed")
+            return self._order_to_dict(entry)
+        finally:
+            db.close()
+    
+    def _record_payment(self, order_id: str, payment_id: str, success: bool):
+        """Record the outcome on the order, only if it is still pending."""
+        db = self.session_factory()
+        try:
+            # A concurrent call may have processed the order while this one was charging
+            updated = db.query(PaymentHistory).filter(
+                PaymentHistory.order_id == order_id,
+                PaymentHistory.status == "pending"
+            ).update(
+                {"payment_id": payment_id, "status": "completed" if success else "failed"},
+                synchronize_session=False
+            )
+            db.commit()
+        finally:
+            db.close()
+        if not updated:
+            logger.error(f"Payment {payment_id} for order {order_id} discarded: order already processed")
+            raise OrderNotPayableError(f"Order {order_id} was already processed")
+    
     def verify_payment(self, order_id: str, payment_id: str, signature: Optional[str] = None) -> bool:
         """Verify a dummy payment (always returns True for valid payments)."""
-        if payment_id not in self.payments:
-            return False
-        
-        payment = self.payments[payment_id]
-        return payment["status"] == "captured"
+        db = self.session_factory()
+        try:
+            entry = db.query(PaymentHistory).filter(
+                PaymentHistory.payment_id == payment_id,
+                PaymentHistory.order_id == order_id
+            ).first()
+            return entry is not None and entry.status == "completed"
+        finally:
+            db.close()
     
     def get_payment_details(self, payment_id: str) -> Dict[str, Any]:
         """Get dummy payment details."""
-        if payment_id not in self.payments:
-            raise Exception("Payment not found")
-        
-        return self.payments[payment_id]
+        db = self.session_factory()
+        try:
+            entry = db.query(PaymentHistory).filter(PaymentHistory.payment_id == payment_id).first()
+            if entry is None:
+                raise Exception("Payment not found")
+            return self._payment_to_dict(entry)
+        finally:
+            db.close()
     
     def refund_payment(self, payment_id: str, amount: Optional[int] = None) -> Dict[str, Any]:
         """Refund a dummy payment."""
-        if payment_id not in self.payments:
-            raise Exception("Payment not found")
-        
-        payment = self.payments[payment_id]
+        payment = self.get_payment_details(payment_id)
         refund_amount = amount if amount is not None else payment["amount"]
         
         refund_id = f"refund_{uuid.uuid4().hex[:12]}"
@@ -167,97 +370,156 @@ class DummyPaymentManager:
         logger.info(f"Dummy refund processed: {refund_id}")
         return refund
     
-    def get_payment_history(self) -> list:
-        """Get all payment history."""
-        return list(self.payments.values())
+    def get_payment_history(self, user_id: Any, limit: int = 20, offset: int = 0) -> Dict[str, Any]:
+        """Get one page of a user's payments, newest first, plus the user's total."""
+        db = self.session_factory()
+        try:
+            query = db.query(PaymentHistory).filter(
+                PaymentHistory.user_id == user_id,
+                PaymentHistory.payment_id.isnot(None)
+            )
+            entries = query.order_by(PaymentHistory.created_at.desc()).offset(offset).limit(limit).all()
+            return {
+                "payments": [self._payment_to_dict(entry) for entry in entries],
+                "total": query.count()
+            }
+        finally:
+            db.close()
+    
+    def get_order_history(self, user_id: Any, limit: int = 20, offset: int = 0) -> list:
+        """Get one page of a user's orders, newest first."""
+        db = self.session_factory()
+        try:
+            entries = (
+                db.query(PaymentHistory)
+                .filter(PaymentHistory.user_id == user_id)
+                .order_by(PaymentHistory.created_at.desc())
+                .offset(offset)
+                .limit(limit)
+                .all()
+            )
+            return [self._order_to_dict(entry) for entry in entries]
+        finally:
+            db.close()
+    
+    @staticmethod
+    def _order_to_dict(entry: PaymentHistory) -> Dict[str, Any]:
+        return {
+            "id": entry.order_id,
+            "amount": entry.amount,
+            "currency": entry.currency,
+            "receipt": entry.receipt,
+            "status": "created" if entry.status == "pending" else entry.status,
+            "created_at": entry.created_at.isoformat() if entry.created_at else None,
+            "key": "dummy_key_12345"  # Dummy key for frontend
+        }
     
-    def get_order_history(self) -> list:
-        """Get all order history."""
-        return list(self.orders.values())
+    @staticmethod
+    def _payment_to_dict(entry: PaymentHistory) -> Dict[str, Any]:
+        return {
+            "id": entry.payment_id,
+            "order_id": entry.order_id,
+            "amount": entry.amount,
+            "currency": entry.currency,
+            "status": LEDGER_TO_PAYMENT_STATUS.get(entry.status, entry.status),
+            "payment_type": entry.payment_type,
+            "created_at": entry.created_at.isoformat() if entry.created_at else None
+        }
+
+_dummy_payment_manager: Optional[DummyPaymentManager] = None
 
-# Global dummy payment manager instance
-dummy_payment_manager = DummyPaymentManager()
+def get_dummy_payment_manager() -> DummyPaymentManager:
+    """The global dummy payment manager, created on first use."""
+    global _dummy_payment_manager
+    if _dummy_payment_manager is None:
+        _dummy_payment_manager = DummyPaymentManager()
+        logger.info("Dummy payment system initialized successfully")
+    return _dummy_payment_manager
+
+async def close_payment_gateway():
+    """Release gateway connections, if the payment manager was ever created."""
+    if _dummy_payment_manager is not None:
+        await _dummy_payment_manager.gateway.close()
 
 # Convenience functions
-def create_dummy_order(amount: int, currency: str = "USD", receipt: Optional[str] = None) -> Dict[str, Any]:
+def create_dummy_order(amount: int, currency: str = "USD", receipt: Optional[str] = None,
+                       user_id: Optional[Any] = None, payment_type: Optional[str] = None,
+                       child_id: Optional[uuid.UUID] = None) -> Dict[str, Any]:
     """Create a dummy payment order."""
-    return dummy_payment_manager.create_order(amount, currency, receipt)
+    return get_dummy_payment_manager().create_order(amount, currency, receipt, user_id, payment_type, child_id)
 
-def process_dummy_payment(order_id: str, payment_method: str = "card") -> Dict[str, Any]:
+async def process_dummy_payment(order_id: str, payment_method: str = "card") -> Dict[str, Any]:
     """Process a dummy payment."""
-    return dummy_payment_manager.process_payment(order_id, payment_method)
+    return await get_dummy_payment_manager().process_payment(order_id, payment_method)
 
 def verify_dummy_payment(order_id: str, payment_id: str, signature: Optional[str] = None) -> bool:
     """Verify a dummy payment."""
-    return dummy_payment_manager.verify_payment(order_id, payment_id, signature)
+    return get_dummy_payment_manager().verify_payment(order_id, payment_id, signature)
 
 def get_dummy_payment_details(payment_id: str) -> Dict[str, Any]:
     """Get dummy payment details."""
-    return dummy_payment_manager.get_payment_details(payment_id)
+    return get_dummy_payment_manager().get_payment_details(payment_id)
 
 def refund_dummy_payment(payment_id: str, amount: Optional[int] = None) -> Dict[str, Any]:
     """Refund a dummy payment."""
-    return dummy_payment_manager.refund_payment(payment_id, amount)
+    return get_dummy_payment_manager().refund_payment(payment_id, amount)
 
 def get_pricing(item_type: str, user_role: str = None, subscription_type: str = None, currency: str = "USD") -> float:
     """Get pricing for different services."""
-    try:
-        if item_type == "report_unlock":
-            return PRICING["report_unlock"][currency]
-        elif item_type == "license_upgrade" and user_role:
-            return PRICING["license_upgrade"][user_role][currency]
-        elif item_type == "premium_subscription" and subscription_type:
-            return PRICING["premium_subscription"][subscription_type][currency]
-        elif item_type == "game_session":
-            return PRICING["game_session"][currency]
-        else:
-            raise ValueError("Invalid pricing request")
-    except KeyError:
-        logger.error(f"Pricing not found for {item_type}, {user_role}, {subscription_type}, {currency}")
-        return 0.0
+    return calculate_amount(item_type, user_role, subscription_type, currency) / 100
 
 def calculate_amount(item_type: str, user_role: str = None, subscription_type: str = None, currency: str = "USD") -> int:
-    """Calculate amount in smallest currency unit (cents for USD)."""
-    base_amount = get_pricing(item_type, user_role, subscription_type, currency)
-    
-    if currency == "USD":
-        return int(base_amount * 100)  # Convert to cents
-    elif currency == "INR":
-        return int(base_amount * 100)  # Convert to paise
-    elif currency == "EUR":
-        return int(base_amount * 100)  # Convert to cents
+    """Calculate amount in smallest currency unit (cents for USD).
+    
+    Raises ValueError if the catalog has no price for the request.
+    """
+    if item_type == "license_upgrade" and user_role:
+        variant = user_role
+    elif item_type == "premium_subscription" and subscription_type:
+        variant = subscription_type
+    elif item_type in ("report_unlock", "game_session"):
+        variant = None
     else:
-        return int(base_amount * 100)  # Default conversion
+        raise ValueError("Invalid pricing request")
+    
+    amount = pricing_catalog.amount(item_type, variant, currency)
+    if amount is None:
+        # Never fall back to a free order
+        raise ValueError(f"No price for {item_type} ({variant or 'default'}) in {currency}")
+    return amount
 
 # Specific order creation functions
-def create_subscription_order(user_role: str, subscription_type: str, currency: str = "USD") -> Dict[str, Any]:
+def create_subscription_order(user_role: str, subscription_type: str, currency: str = "USD",
+                              user_id: Optional[Any] = None) -> Dict[str, Any]:
     """Create order for subscription upgrade."""
     amount = calculate_amount("premium_subscription", subscription_type=subscription_type, currency=currency)
     receipt = f"subscription_{user_role}_{subscription_type}"
-    return create_dummy_order(amount, currency, receipt)
+    return create_dummy_order(amount, currency, receipt, user_id, "premium_subscription")
 
-def create_license_upgrade_order(user_role: str, currency: str = "USD") -> Dict[str, Any]:
+def create_license_upgrade_order(user_role: str, currency: str = "USD", user_id: Optional[Any] = None) -> Dict[str, Any]:
     """Create order for license upgrade."""
     amount = calculate_amount("license_upgrade", user_role=user_role, currency=currency)
     receipt = f"license_upgrade_{user_role}"
-    return create_dummy_order(amount, currency, receipt)
+    return create_dummy_order(amount, currency, receipt, user_id, "license_upgrade")
 
-def create_report_unlock_order(child_id: str, currency: str = "USD") -> Dict[str, Any]:
+def create_report_unlock_order(child_id: uuid.UUID, currency: str = "USD", user_id: Optional[Any] = None) -> Dict[str, Any]:
     """Create order for report unlock."""
     amount = calculate_amount("report_unlock", currency=currency)
     receipt = f"report_unlock_{child_id}"
-    return create_dummy_order(amount, currency, receipt)
+    return create_dummy_order(amount, currency, receipt, user_id, "report_unlock", child_id)
 
-def create_game_session_order(child_id: str, currency: str = "USD") -> Dict[str, Any]:
+def create_game_session_order(child_id: str, currency: str = "USD", user_id: Optional[Any] = None) -> Dict[str, Any]:
     """Create order for game session."""
     amount = calculate_amount("game_session", currency=currency)
     receipt = f"game_session_{child_id}"
-    return create_dummy_order(amount, currency, receipt)
+    return create_dummy_order(amount, currency, receipt, user_id, "game_session")
 
 # Backward compatibility functions (for existing code)
-def create_razorpay_order(amount: int, currency: str = "USD", receipt: Optional[str] = None) -> Dict[str, Any]:
+def create_razorpay_order(amount: int, currency: str = "USD", receipt: Optional[str] = None,
+                          user_id: Optional[Any] = None, payment_type: Optional[str] = None,
+                          child_id: Optional[uuid.UUID] = None) -> Dict[str, Any]:
     """Create a dummy order (replaces Razorpay)."""
-    return create_dummy_order(amount, currency, receipt)
+    return create_dummy_order(amount, currency, receipt, user_id, payment_type, child_id)
 
 def verify_razorpay_payment(order_id: str, payment_id: str, signature: str) -> bool:
     """Verify a dummy payment (replaces Razorpay)."""
@@ -270,10 +532,11 @@ def get_payment_details(payment_id: str) -> Dict[str, Any]:
 # Payment manager for backward compatibility
 class PaymentManager:
     def __init__(self):
-        self.client = dummy_payment_manager
+        self.client = get_dummy_payment_manager()
         
-    def create_order(self, amount: int, currency: str = "USD", receipt: Optional[str] = None) -> Dict[str, Any]:
-        return create_dummy_order(amount, currency, receipt)
+    def create_order(self, amount: int, currency: str = "USD", receipt: Optional[str] = None,
+                     user_id: Optional[Any] = None) -> Dict[str, Any]:
+        return create_dummy_order(amount, currency, receipt, user_id)
     
     def verify_payment(self, order_id: str, payment_id: str, signature: Optional[str] = None) -> bool:
         return verify_dummy_payment(order_id, payment_id, signature)
@@ -284,7 +547,19 @@ class PaymentManager:
     def refund_payment(self, payment_id: str, amount: Optional[int] = None) -> Dict[str, Any]:
         return refund_dummy_payment(payment_id, amount)
 
-# Global payment manager instance
-payment_manager = PaymentManager()
+_payment_manager: Optional[PaymentManager] = None
+
+def get_payment_manager() -> PaymentManager:
+    """The global payment manager, created on first use."""
+    global _payment_manager
+    if _payment_manager is None:
+        _payment_manager = PaymentManager()
+    return _payment_manager
 
-logger.info("Dummy payment system initialized successfully")
\ No newline at end of file
+def __getattr__(name):
+    # The module-level instances are created on first access
+    if name == "dummy_payment_manager":
+        return get_dummy_payment_manager()
+    if name == "payment_manager":
+        return get_payment_manager()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
@@ -0,0 +1,253 @@
+import asyncio
+import contextvars
+import io
+import json
+import logging
+import os
+import random
+import re
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+from settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+# Profiling is opt-in; nothing below runs unless PROFILING_ENABLED is set
+PROFILING_ENABLED = settings.profiling_enabled
+
+# Fraction of requests profiled without being asked to (0.0 - 1.0)
+PROFILE_SAMPLE_RATE = settings.profile_sample_rate
+
+# Requests (or WebSocket handshakes) slower than this are written to PROFILE_DIR
+PROFILE_SLOW_MS = settings.profile_slow_ms
+
+PROFILE_DIR = settings.profile_dir
+
+# Oldest captures are deleted beyond this count
+PROFILE_MAX_CAPTURES = settings.profile_max_captures
+
+# Header that asks for a request to be profiled and always captured
+PROFILE_HEADER = b"x-profile"
+
+# Longest SQL statement stored in a capture
+MAX_STATEMENT_CHARS = 2000
+
+CAPTURE_ID_PATTERN = re.compile(r"^[0-9]+-[0-9a-f]{8}$")
+
+try:
+    from pyinstrument import Profiler as _Pyinstrument
+except ImportError:
+    _Pyinstrument = None
+
+# SQL statements executed on behalf of the request being captured
+current_queries: contextvars.ContextVar[Optional[List[Dict[str, Any]]]] = contextvars.ContextVar(
+    "current_queries", default=None
+)
+
+class RequestProfiler:
+    """Wraps pyinstrument when installed (async-aware), otherwise cProfile.
+
+    cProfile sees every coroutine on the event loop while enabled and none
+    of the work handed to the threadpool, so treat its output as a hint;
+    the SQL timings in the capture are exact either way.
+    """
+
+    def __init__(self):
+        if _Pyinstrument is not None:
+            self.profiler = _Pyinstrument(async_mode="enabled")
+            self.kind = "pyinstrument"
+        else:
+            import cProfile
+            self.profiler = cProfile.Profile()
+            self.kind = "cprofile"
+
+    def start(self):
+        if self.kind == "pyinstrument":
+            self.profiler.start()
+        else:
+            self.profiler.enable()
+
+    def stop(self) -> str:
+        """Stop profiling and return a text report."""
+        if self.kind == "pyinstrument":
+            self.profiler.stop()
+            return self.profiler.output_text(unicode=False, color=False)
+        import pstats
+        self.profiler.disable()
+        output = io.StringIO()
+        pstats.Stats(self.profiler, stream=output).sort_stats("cumulative").print_stats(40)
+        return output.getvalue()
+
+class ProfileStore:
+    """Reads and writes capture files in a local directory."""
+
+    def __init__(self, directory: str = PROFILE_DIR, max_captures: int = PROFILE_MAX_CAPTURES):
+        self.directory = directory
+        self.max_captures = max_captures
+
+    def save(self, capture: Dict[str, Any]):
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"{capture['id']}.json")
+        with open(path, "w") as f:
+            json.dump(capture, f)
+        self.prune()
+
+    def prune(self):
+        files = sorted(name for name in os.listdir(self.directory) if name.endswith(".json"))
+        for name in files[:-self.max_captures] if self.max_captures else files:
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+
+    def list(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """Summaries of the most recent captures, newest first."""
+        if not os.path.isdir(self.directory):
+            return []
+        summaries = []
+        for name in sorted(os.listdir(self.directory), reverse=True)[:limit]:
+            capture = self.get(name[:-len(".json")])
+            if capture is not None:
+                summaries.append({key: capture.get(key) for key in (
+                    "id", "type", "method", "path", "route", "status", "duration_ms",
+                    "sql_count", "sql_ms", "profiled", "created_at"
+                )})
+        return summaries
+
+    def get(self, capture_id: str) -> Optional[Dict[str, Any]]:
+        if not CAPTURE_ID_PATTERN.match(capture_id):
+            return None
+        try:
+            with open(os.path.join(self.directory, f"{capture_id}.json")) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+# Global capture store
+profile_store = ProfileStore()
+
+class ProfilingMiddleware:
+    """Opt-in profiling for HTTP requests and WebSocket handshakes.
+
+    A request is profiled when it sends `X-Profile: 1` or is picked by
+    PROFILE_SAMPLE_RATE. SQL statements are recorded for every request while
+    profiling is enabled. A capture is written when the request took longer
+    than PROFILE_SLOW_MS, or when the header asked for it. For WebSockets the
+    measured window runs from connect until the handler first waits for a
+    client message, i.e. accept plus session setup.
+    """
+
+    def __init__(self, app, store: ProfileStore = profile_store,
+                 sample_rate: float = PROFILE_SAMPLE_RATE, slow_ms: float = PROFILE_SLOW_MS):
+        self.app = app
+        self.store = store
+        self.sample_rate = sample_rate
+        self.slow_ms = slow_ms
+        # Only one profiler can run at a time in a process
+        self.profiler_busy = False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        requested = dict(scope.get("headers") or []).get(PROFILE_HEADER, b"") in (b"1", b"true")
+        profiler = None
+        if (requested or (self.sample_rate and random.random() < self.sample_rate)) and not self.profiler_busy:
+            self.profiler_busy = True
+            profiler = RequestProfiler()
+
+        queries: List[Dict[str, Any]] = []
+        token = current_queries.set(queries)
+        state = {"status": None, "done": False, "receives": 0}
+        started = time.perf_counter()
+
+        async def complete():
+            """Stop measuring and write a capture if the request qualifies."""
+            state["done"] = True
+            duration_ms = (time.perf_counter() - started) * 1000
+            current_queries.set(None)
+            profile_text = None
+            if profiler is not None:
+                profile_text = profiler.stop()
+                self.profiler_busy = False
+            if requested or duration_ms >= self.slow_ms:
+                capture = self._build_capture(scope, state["status"], duration_ms, queries, profile_text)
+                try:
+                    await asyncio.to_thread(self.store.save, capture)
+                    logger.info(f"Profile capture {capture['id']} written for {capture['path']} ({duration_ms:.0f} ms)")
+                except Exception as e:
+                    logger.error(f"Failed to write profile capture: {str(e)}")
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                state["status"] = message["status"]
+            elif message["type"] == "websocket.accept":
+                state["status"] = 101
+            elif message["type"] == "websocket.close" and state["status"] is None:
+                state["status"] = 403
+            await send(message)
+
+        async def receive_wrapper():
+            # The second receive on a WebSocket means setup is done and the handler is idle
+            state["receives"] += 1
+            if scope["type"] == "websocket" and state["receives"] == 2 and not state["done"]:
+                await complete()
+            return await receive()
+
+        if profiler is not None:
+            profiler.start()
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        finally:
+            if not state["done"]:
+                await complete()
+            current_queries.reset(token)
+
+    @staticmethod
+    def _build_capture(scope, status, duration_ms, queries, profile_text) -> Dict[str, Any]:
+        route = scope.get("route")
+        return {
+            "id": f"{int(time.time() * 1000)}-{uuid.uuid4().hex[:8]}",
+            "type": scope["type"],
+            "method": scope.get("method", "WEBSOCKET"),
+            "path": scope.get("path"),
+            "route": getattr(route, "path", None),
+            "status": status,
+            "duration_ms": round(duration_ms, 3),
+            "sql_count": len(queries),
+            "sql_ms": round(sum(query["duration_ms"] for query in queries), 3),
+            "sql": queries,
+            "profiled": profile_text is not None,
+            "profile": profile_text,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+        }
+
+def capture_queries(engine):
+    """Record statements and timings into the active capture, if any."""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if current_queries.get() is not None:
+            conn.info.setdefault("capture_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        queries = current_queries.get()
+        if queries is None or not conn.info.get("capture_started"):
+            return
+        # Parameters are left out so captures never hold user data
+        queries.append({
+            "statement": statement[:MAX_STATEMENT_CHARS],
+            "duration_ms": round((time.perf_counter() - conn.info["capture_started"].pop()) * 1000, 3)
+        })
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("capture_started"):
+            conn.info["capture_started"].pop()
@@ -0,0 +1,181 @@
+import asyncio
+import time
+from collections import OrderedDict, deque
+from typing import Callable, Deque, Dict, Optional
+from metrics import ai_scheduler_queue_wait_seconds, ai_scheduler_queue_depth, ai_scheduler_rejected_total
+from settings import get_settings
+
+settings = get_settings()
+
+# Outbound AI quotas; 0 disables that limit. Set these to the API key's per-minute quotas.
+AI_REQUESTS_PER_MINUTE = settings.ai_requests_per_minute
+AI_TOKENS_PER_MINUTE = settings.ai_tokens_per_minute
+# Share of each quota that may be spent in a single burst
+AI_RATE_BURST_FRACTION = settings.ai_rate_burst_fraction
+
+# Priorities, highest first
+INTERACTIVE = 0  # a child is waiting for the config
+BACKGROUND = 1   # prefetch and other work nobody is waiting on
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BACKGROUND: "background"}
+
+class TokenBucket:
+    """Token bucket sized so that no `period`-long window ever exceeds `quota`.
+
+    The bucket holds up to `burst` tokens and refills at (quota - burst) per
+    period: a full burst plus one period of refill adds up to exactly the
+    quota, however the quota is measured.
+    """
+
+    def __init__(self, quota: float, period: float = 60.0, burst_fraction: float = AI_RATE_BURST_FRACTION,
+                 clock: Callable[[], float] = time.monotonic):
+        self.capacity = max(1.0, quota * burst_fraction)
+        self.rate = max(quota - self.capacity, 1.0) / period  # tokens per second
+        self.tokens = self.capacity
+        self.clock = clock
+        self.updated = clock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` tokens are available (0 if they are now)."""
+        self._refill()
+        amount = min(amount, self.capacity)
+        return max(0.0, (amount - self.tokens) / self.rate)
+
+    def consume(self, amount: float):
+        self._refill()
+        self.tokens -= min(amount, self.capacity)
+
+    def refund(self, amount: float):
+        """Return tokens taken by consume() that were never used."""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + min(amount, self.capacity))
+
+class _Waiter:
+    __slots__ = ("tokens", "priority", "future", "enqueued")
+
+    def __init__(self, tokens: int, priority: int, future: asyncio.Future, enqueued: float):
+        self.tokens = tokens
+        self.priority = priority
+        self.future = future
+        self.enqueued = enqueued
+
+class AIScheduler:
+    """Admits outbound AI requests within requests/minute and tokens/minute quotas.
+
+    Waiting requests are served by priority, and within a priority round-robin
+    across owners (the clinic user), so one clinic's burst cannot starve the
+    others. A request that cannot be admitted before its deadline is rejected
+    and the caller serves its fallback instead of hitting the API for a 429.
+
+    Runs on the event loop; not thread-safe.
+    """
+
+    def __init__(self, requests_per_minute: int = AI_REQUESTS_PER_MINUTE,
+                 tokens_per_minute: int = AI_TOKENS_PER_MINUTE, period: float = 60.0,
+                 burst_fraction: float = AI_RATE_BURST_FRACTION, clock: Callable[[], float] = time.monotonic):
+        self.clock = clock
+        self.buckets = []
+        if requests_per_minute:
+            self.request_bucket = TokenBucket(requests_per_minute, period, burst_fraction, clock)
+            self.buckets.append((self.request_bucket, lambda waiter: 1))
+        if tokens_per_minute:
+            self.token_bucket = TokenBucket(tokens_per_minute, period, burst_fraction, clock)
+            self.buckets.append((self.token_bucket, lambda waiter: waiter.tokens))
+        # priority -> owner -> waiters; owners rotate to the back once served
+        self.queues: Dict[int, "OrderedDict[str, Deque[_Waiter]]"] = {
+            priority: OrderedDict() for priority in PRIORITY_NAMES
+        }
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.buckets)
+
+    def depth(self, priority: int) -> int:
+        return sum(len(waiters) for waiters in self.queues[priority].values())
+
+    async def acquire(self, tokens: int, priority: int = INTERACTIVE, owner: Optional[str] = None,
+                      deadline: Optional[float] = None) -> bool:
+        """Wait for quota for one request of about `tokens` tokens; False if the deadline passes first.
+
+        `deadline` is a value of this scheduler's clock (time.monotonic() by default).
+        """
+        if not self.enabled:
+            return True
+        loop = asyncio.get_running_loop()
+        waiter = _Waiter(tokens, priority, loop.create_future(), self.clock())
+        self.queues[priority].setdefault(owner or "", deque()).append(waiter)
+        self._pump()
+        timeout = None if deadline is None else max(0.0, deadline - self.clock())
+        admitted = False
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), timeout)
+            admitted = True
+        except asyncio.TimeoutError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Admitted in the same loop turn the deadline fired; the quota is already spent
+                admitted = True
+            else:
+                ai_scheduler_rejected_total.labels(PRIORITY_NAMES[priority], "deadline").inc()
+        finally:
+            # Leaves the queue whether admitted, timed out or cancelled (the child disconnected)
+            if not waiter.future.done():
+                waiter.future.cancel()
+                self._pump()
+            elif not admitted and not waiter.future.cancelled():
+                # Admitted, but the caller was cancelled before it could use the quota
+                self._refund(waiter)
+        return admitted
+
+    def _refund(self, waiter: _Waiter):
+        for bucket, cost in self.buckets:
+            bucket.refund(cost(waiter))
+        self._pump()
+
+    def _next_waiter(self) -> Optional[_Waiter]:
+        for priority in sorted(self.queues):
+            owners = self.queues[priority]
+            while owners:
+                owner, waiters = next(iter(owners.items()))
+                while waiters and waiters[0].future.done():
+                    waiters.popleft()
+                if waiters:
+                    return waiters[0]
+                del owners[owner]
+        return None
+
+    def _pump(self):
+        """Admit waiting requests while the buckets allow, then sleep until the next one fits."""
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        while True:
+            waiter = self._next_waiter()
+            if waiter is None:
+                return
+            wait = max(bucket.wait_time(cost(waiter)) for bucket, cost in self.buckets)
+            if wait > 0:
+                self.timer = asyncio.get_running_loop().call_later(wait, self._pump)
+                return
+            for bucket, cost in self.buckets:
+                bucket.consume(cost(waiter))
+            owners = self.queues[waiter.priority]
+            owner, waiters = owners.popitem(last=False)
+            waiters.popleft()
+            if waiters:
+                owners[owner] = waiters
+            ai_scheduler_queue_wait_seconds.labels(PRIORITY_NAMES[waiter.priority]).observe(
+                self.clock() - waiter.enqueued
+            )
+            waiter.future.set_result(True)
+
+# Global scheduler for outbound AI requests
+ai_scheduler = AIScheduler()
+
+ai_scheduler_queue_depth.set_function(
+    lambda: {(name,): ai_scheduler.depth(priority) for priority, name in PRIORITY_NAMES.items()}
+)
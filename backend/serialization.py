@@ -0,0 +1,79 @@
+import json
+import logging
+import uuid
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Any
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # Optional speed-up; stdlib json is used without it
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+def _default(obj: Any) -> Any:
+    """Encode types JSON does not know about natively."""
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    if isinstance(obj, (datetime, date, time)):
+        return obj.isoformat()
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+class StdlibSerializer:
+    """Serializer built on the standard library json module."""
+    name = "json"
+    
+    def dumps(self, obj: Any) -> bytes:
+        return json.dumps(obj, default=_default, separators=(",", ":"), ensure_ascii=False).encode()
+    
+    def loads(self, data: Any) -> Any:
+        return json.loads(data)
+
+class OrjsonSerializer:
+    """Serializer built on orjson, which encodes UUID and datetime natively."""
+    name = "orjson"
+    
+    def dumps(self, obj: Any) -> bytes:
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    
+    def loads(self, data: Any) -> Any:
+        return orjson.loads(data)
+
+SERIALIZERS = {"json": StdlibSerializer}
+if orjson is not None:
+    SERIALIZERS["orjson"] = OrjsonSerializer
+
+# Serializer shared by HTTP responses, WebSocket frames and the response cache
+serializer = OrjsonSerializer() if orjson is not None else StdlibSerializer()
+
+def set_serializer(name: str):
+    """Switch the shared serializer ("orjson" or "json")."""
+    global serializer
+    if name not in SERIALIZERS:
+        raise ValueError(f"Unknown or unavailable serializer: {name}")
+    serializer = SERIALIZERS[name]()
+    logger.info(f"JSON serializer set to {name}")
+
+def dumps(obj: Any) -> bytes:
+    """Serialize to compact UTF-8 JSON bytes."""
+    return serializer.dumps(obj)
+
+def dumps_text(obj: Any) -> str:
+    """Serialize to a JSON string, e.g. for WebSocket text frames."""
+    return serializer.dumps(obj).decode()
+
+def loads(data: Any) -> Any:
+    """Parse JSON from bytes or str."""
+    return serializer.loads(data)
+
+class FastJSONResponse(JSONResponse):
+    """Default response class rendering through the shared serializer."""
+    
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
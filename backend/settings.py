@@ -0,0 +1,209 @@
+import os
+import threading
+from typing import Any, Dict, List, Literal, Mapping, Optional
+from dotenv import load_dotenv
+from pydantic import BaseModel, ConfigDict, Field, ValidationError, field_validator, model_validator
+
+# Profile applied when APP_ENV is not set
+DEFAULT_ENVIRONMENT = "development"
+
+# Placeholder secrets that must never reach production
+INSECURE_SECRET_KEYS = {"your-secret-key-here-change-in-production", "your-super-secret-key-change-this-in-production"}
+
+# Per-environment defaults, keyed by environment variable. Anything set in the
+# environment wins, so tuning a deployment is a config change, not a code change.
+PROFILES: Dict[str, Dict[str, Any]] = {
+    "development": {
+        "DEBUG": True,
+    },
+    "test": {
+        "DEBUG": True,
+        "AI_PROVIDER": "local",
+        "PAYMENT_PROCESSING_DELAY_SECONDS": 0,
+        "LOG_LEVEL": "WARNING",
+    },
+    "staging": {
+        "LOG_FORMAT": "json",
+        "DB_POOL_PRE_PING": True,
+    },
+    "production": {
+        "LOG_FORMAT": "json",
+        "DB_POOL_SIZE": 20,
+        "DB_MAX_OVERFLOW": 10,
+        "DB_POOL_PRE_PING": True,
+        "DB_POOL_RECYCLE_SECONDS": 1800,
+        "AI_BATCH_MAX_SIZE": 8,
+    },
+}
+
+class SettingsError(ValueError):
+    """The environment does not describe a valid configuration."""
+
+class Settings(BaseModel):
+    """Validated application settings.
+
+    Each field is read from the environment variable named by its alias;
+    fields missing there come from the APP_ENV profile, then the default.
+    """
+    model_config = ConfigDict(frozen=True, extra="ignore", populate_by_name=True)
+
+    environment: Literal["development", "test", "staging", "production"] = Field(DEFAULT_ENVIRONMENT, alias="APP_ENV")
+    debug: bool = Field(False, alias="DEBUG")
+
+    # Server
+    host: str = Field("0.0.0.0", alias="HOST")
+    port: int = Field(8000, alias="PORT", ge=1, le=65535)
+    # Game connections, the in-memory cache, AI rate buckets and the config batcher
+    # live in each process, so more than one worker needs Redis and sticky WebSockets
+    workers: int = Field(1, alias="WORKERS", ge=1)
+    sticky_sessions: bool = Field(False, alias="STICKY_SESSIONS")
+    cors_origins: List[str] = Field(["http://localhost:3000", "https://neuronest.vercel.app"], alias="ALLOWED_ORIGINS")
+    metrics_token: Optional[str] = Field(None, alias="METRICS_TOKEN")
+
+    # Database; pool settings are ignored for SQLite
+    database_url: Optional[str] = Field(None, alias="DATABASE_URL")
+    sql_echo: bool = Field(False, alias="SQL_ECHO")
+    db_pool_size: int = Field(5, alias="DB_POOL_SIZE", ge=1)
+    db_max_overflow: int = Field(10, alias="DB_MAX_OVERFLOW", ge=0)
+    db_pool_timeout: float = Field(30.0, alias="DB_POOL_TIMEOUT_SECONDS", gt=0)
+    db_pool_recycle: int = Field(-1, alias="DB_POOL_RECYCLE_SECONDS", ge=-1)
+    db_pool_pre_ping: bool = Field(False, alias="DB_POOL_PRE_PING")
+
+    # Auth
+    secret_key: str = Field("your-secret-key-here-change-in-production", alias="SECRET_KEY", min_length=1)
+    algorithm: str = Field("HS256", alias="ALGORITHM")
+    access_token_expire_minutes: int = Field(30, alias="ACCESS_TOKEN_EXPIRE_MINUTES", ge=1)
+
+    # AI provider
+    ai_provider: Literal["gemini", "local"] = Field("gemini", alias="AI_PROVIDER")
+    gemini_api_key: Optional[str] = Field(None, alias="GEMINI_API_KEY")
+    gemini_api_url: str = Field(
+        "https://generativelanguage.googleapis.com/v1beta/models/gemini-1.5-flash:generateContent",
+        alias="GEMINI_API_URL"
+    )
+    gemini_streaming: bool = Field(True, alias="GEMINI_STREAMING")
+    gemini_timeout_seconds: float = Field(20.0, alias="GEMINI_TIMEOUT_SECONDS", gt=0)
+    ai_breaker_failure_rate: float = Field(0.5, alias="AI_BREAKER_FAILURE_RATE", gt=0, le=1)
+    ai_breaker_reset_seconds: float = Field(30.0, alias="AI_BREAKER_RESET_SECONDS", gt=0)
+    ai_min_timeout_seconds: float = Field(2.0, alias="AI_MIN_TIMEOUT_SECONDS", gt=0)
+    ai_max_concurrency: int = Field(32, alias="AI_MAX_CONCURRENCY", ge=1)
+    ai_config_deadline_seconds: float = Field(8.0, alias="AI_CONFIG_DEADLINE_SECONDS", gt=0)
+    ai_batch_max_size: int = Field(1, alias="AI_BATCH_MAX_SIZE", ge=1)
+    ai_batch_window_ms: float = Field(150.0, alias="AI_BATCH_WINDOW_MS", ge=0)
+    ai_requests_per_minute: int = Field(0, alias="AI_REQUESTS_PER_MINUTE", ge=0)
+    ai_tokens_per_minute: int = Field(0, alias="AI_TOKENS_PER_MINUTE", ge=0)
+    ai_rate_burst_fraction: float = Field(0.1, alias="AI_RATE_BURST_FRACTION", gt=0, le=1)
+    difficulty_engine_mode: Literal["fast_path", "off"] = Field("fast_path", alias="DIFFICULTY_ENGINE_MODE")
+    difficulty_engine_min_confidence: float = Field(0.6, alias="DIFFICULTY_ENGINE_MIN_CONFIDENCE", ge=0, le=1)
+    difficulty_engine_llm_every: int = Field(5, alias="DIFFICULTY_ENGINE_LLM_EVERY", ge=0)
+
+    # Game sessions and caretaker broadcasts
+    game_tick_rate: float = Field(20.0, alias="GAME_TICK_RATE", ge=0)
+    game_supervisor_interval_seconds: float = Field(30.0, alias="GAME_SUPERVISOR_INTERVAL_SECONDS", gt=0)
+    game_idle_timeout_seconds: float = Field(120.0, alias="GAME_IDLE_TIMEOUT_SECONDS", gt=0)
+    game_session_retention_hours: int = Field(24, alias="GAME_SESSION_RETENTION_HOURS", ge=1)
+    game_max_session_events: int = Field(5000, alias="GAME_MAX_SESSION_EVENTS", ge=1)
+
+    # Response cache
+    response_cache_ttl: int = Field(300, alias="RESPONSE_CACHE_TTL", ge=0)
+    response_cache_max_entries: int = Field(10000, alias="RESPONSE_CACHE_MAX_ENTRIES", ge=1)
+    redis_host: Optional[str] = Field(None, alias="REDIS_HOST")
+    redis_port: int = Field(6379, alias="REDIS_PORT", ge=1, le=65535)
+    redis_password: Optional[str] = Field(None, alias="REDIS_PASSWORD")
+
+    # Payments
+    pricing_file: Optional[str] = Field(None, alias="PRICING_FILE")
+    payment_success_rate: float = Field(0.95, alias="PAYMENT_SUCCESS_RATE", ge=0, le=1)
+    payment_processing_delay_seconds: float = Field(2.0, alias="PAYMENT_PROCESSING_DELAY_SECONDS", ge=0)
+    fulfillment_poll_interval_seconds: float = Field(5.0, alias="FULFILLMENT_POLL_INTERVAL_SECONDS", gt=0)
+
+    # Logging
+    log_level: Literal["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"] = Field("INFO", alias="LOG_LEVEL")
+    log_format: Literal["text", "json"] = Field("text", alias="LOG_FORMAT")
+    log_levels: str = Field("", alias="LOG_LEVELS")
+    log_queue_size: int = Field(10000, alias="LOG_QUEUE_SIZE", ge=1)
+    log_max_payload_chars: int = Field(200, alias="LOG_MAX_PAYLOAD_CHARS", ge=1)
+    log_sample_burst: int = Field(5, alias="LOG_SAMPLE_BURST", ge=1)
+    log_sample_interval: float = Field(10.0, alias="LOG_SAMPLE_INTERVAL", gt=0)
+
+    # Profiling
+    profiling_enabled: bool = Field(False, alias="PROFILING_ENABLED")
+    profiling_token: Optional[str] = Field(None, alias="PROFILING_TOKEN")
+    profile_sample_rate: float = Field(0.0, alias="PROFILE_SAMPLE_RATE", ge=0, le=1)
+    profile_slow_ms: float = Field(500.0, alias="PROFILE_SLOW_MS", ge=0)
+    profile_dir: str = Field(os.path.join(os.path.dirname(os.path.abspath(__file__)), "profiles"), alias="PROFILE_DIR")
+    profile_max_captures: int = Field(200, alias="PROFILE_MAX_CAPTURES", ge=1)
+
+    @field_validator("cors_origins", mode="before")
+    @classmethod
+    def split_origins(cls, value):
+        if isinstance(value, str):
+            return [origin.strip() for origin in value.split(",") if origin.strip()]
+        return value
+
+    @field_validator("environment", "ai_provider", "difficulty_engine_mode", "log_format", mode="before")
+    @classmethod
+    def lower(cls, value):
+        return value.lower() if isinstance(value, str) else value
+
+    @field_validator("log_level", mode="before")
+    @classmethod
+    def upper(cls, value):
+        return value.upper() if isinstance(value, str) else value
+
+    @model_validator(mode="after")
+    def check_workers(self):
+        if self.workers > 1 and not (self.redis_host and self.sticky_sessions):
+            raise ValueError(
+                "WORKERS > 1 requires REDIS_HOST and STICKY_SESSIONS=true; "
+                "game sockets and rate limits are held per process"
+            )
+        return self
+
+    @model_validator(mode="after")
+    def check_production(self):
+        if self.environment == "production":
+            if self.secret_key in INSECURE_SECRET_KEYS:
+                raise ValueError("SECRET_KEY must be set in production")
+            if self.debug:
+                raise ValueError("DEBUG must be off in production")
+        return self
+
+    @property
+    def ai_batch_window_seconds(self) -> float:
+        return self.ai_batch_window_ms / 1000
+
+def load_settings(environ: Optional[Mapping[str, str]] = None) -> Settings:
+    """Build settings from `environ` (default os.environ) over the APP_ENV profile."""
+    environ = os.environ if environ is None else environ
+    environment = (environ.get("APP_ENV") or DEFAULT_ENVIRONMENT).lower()
+    if environment not in PROFILES:
+        raise SettingsError(f"Unknown APP_ENV {environment!r}; expected one of {', '.join(PROFILES)}")
+
+    values = dict(PROFILES[environment])
+    for field in Settings.model_fields.values():
+        # Empty variables (KEY= in .env files) count as unset
+        if environ.get(field.alias):
+            values[field.alias] = environ[field.alias]
+    values["APP_ENV"] = environment
+    try:
+        return Settings.model_validate(values)
+    except ValidationError as e:
+        problems = "; ".join(
+            f"{error['loc'][0] if error['loc'] else 'settings'}: {error['msg']}" for error in e.errors()
+        )
+        raise SettingsError(f"Invalid configuration ({environment}): {problems}") from None
+
+_settings: Optional[Settings] = None
+_settings_lock = threading.Lock()
+
+def get_settings() -> Settings:
+    """The process-wide settings, loaded from the environment (and .env) on first use."""
+    global _settings
+    if _settings is None:
+        with _settings_lock:
+            if _settings is None:
+                # Variables already in the environment win over the .env file
+                load_dotenv()
+                _settings = load_settings()
+    return _settings
@@ -0,0 +1,62 @@
+import os
+import sys
+import tempfile
+import uuid
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+# Settings are read once per process, so the test environment is fixed before any app import
+_tmpdir = tempfile.TemporaryDirectory()
+os.environ["APP_ENV"] = "test"
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmpdir.name, 'tests.db')}"
+os.environ["PAYMENT_SUCCESS_RATE"] = "1"
+os.environ.pop("REDIS_HOST", None)
+
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.ext.compiler import compiles
+
+@compiles(UUID, "sqlite")
+def compile_uuid(type_, compiler, **kw):
+    return "CHAR(32)"
+
+import database
+import main as app_module
+from auth import create_access_token
+from models import User, LicenseUsage, ChildProfile
+
+database.Base.metadata.create_all(bind=database.engine)
+
+@pytest.fixture
+def db():
+    session = database.SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+@pytest.fixture
+def client():
+    from fastapi.testclient import TestClient
+    with TestClient(app_module.app) as test_client:
+        yield test_client
+
+@pytest.fixture
+def make_user(db):
+    """Create a user with a license and `children` child profiles; returns (user, auth headers, child ids)."""
+    def make(role="parent", total_slots=10, children=0):
+        user = User(email=f"test-{uuid.uuid4().hex[:8]}@example.com", password="x", role=role)
+        db.add(user)
+        db.flush()
+        db.add(LicenseUsage(user_id=user.id, role=role, total_slots=total_slots, used_slots=children))
+        child_ids = []
+        for i in range(children):
+            child = ChildProfile(id=uuid.uuid4(), user_id=user.id, name=f"Child {i}", age=6, gender="other")
+            db.add(child)
+            child_ids.append(str(child.id))
+        db.commit()
+        headers = {"Authorization": f"Bearer {create_access_token({'email': user.email})}"}
+        return user, headers, child_ids
+    return make
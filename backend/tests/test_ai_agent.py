@@ -0,0 +1,93 @@
+import asyncio
+
+import pytest
+
+import ai_agent
+from ai_agent import AIAgent, ConfigBatcher, RuleBasedProvider
+from circuit_breaker import CircuitBreaker, HALF_OPEN
+
+class CountingProvider(RuleBasedProvider):
+    def __init__(self):
+        self.requests = []
+
+    def generate_config(self, child_profile, previous_sessions, timeout=None):
+        self.requests.append(child_profile["id"])
+        return super().generate_config(child_profile, previous_sessions, timeout)
+
+class RecordingScheduler:
+    def __init__(self, refused=()):
+        self.refused = set(refused)
+        self.owners = []
+
+    async def acquire(self, tokens, priority=0, owner=None, deadline=None):
+        self.owners.append(owner)
+        return owner not in self.refused
+
+def make_agent(name):
+    provider = CountingProvider()
+    return AIAgent(provider, CircuitBreaker(name, minimum_calls=1)), provider
+
+def profile(child_id):
+    return {"id": child_id, "age": 6}
+
+@pytest.fixture
+def scheduler(monkeypatch):
+    scheduler = RecordingScheduler(refused={"clinic-b"})
+    monkeypatch.setattr(ai_agent, "ai_scheduler", scheduler)
+    return scheduler
+
+def run_batch(agent, requests):
+    async def scenario():
+        batcher = ConfigBatcher(max_size=len(requests), window=1.0, agent=agent)
+        return await asyncio.gather(*(
+            batcher.submit(profile(child_id), [], owner=owner) for child_id, owner in requests
+        ))
+    return asyncio.run(scenario())
+
+def test_batch_takes_quota_per_owner(scheduler):
+    agent, provider = make_agent("test_batch_owners")
+    configs = run_batch(agent, [("a1", "clinic-a"), ("b1", "clinic-b"), ("a2", "clinic-a")])
+
+    assert sorted(scheduler.owners) == ["clinic-a", "clinic-b"]
+    # clinic-b had no quota, so only clinic-a's children reach the provider
+    assert provider.requests == ["a1", "a2"]
+    assert len(configs) == 3 and all(configs)
+
+def test_open_breaker_batch_uses_no_quota(scheduler):
+    agent, provider = make_agent("test_batch_open")
+    agent.breaker.record_failure()
+
+    configs = run_batch(agent, [("a1", "clinic-a"), ("a2", "clinic-a")])
+    assert scheduler.owners == []
+    assert provider.requests == []
+    assert len(configs) == 2 and all(configs)
+
+def test_open_breaker_stream_uses_no_quota(monkeypatch, scheduler):
+    agent, provider = make_agent("test_stream_open")
+    agent.breaker.record_failure()
+    monkeypatch.setattr(ai_agent, "_ai_provider", provider)
+    monkeypatch.setattr(ai_agent, "_ai_breaker", agent.breaker)
+    monkeypatch.setattr(ai_agent, "engine_config", lambda *args: None)
+
+    async def scenario():
+        return dict([item async for item in ai_agent.stream_game_config(profile("a1"), [], owner="clinic-a")])
+
+    assert asyncio.run(scenario())
+    assert scheduler.owners == []
+    assert provider.requests == []
+
+def test_refused_quota_frees_half_open_probe(monkeypatch, scheduler):
+    agent, provider = make_agent("test_stream_probe")
+    agent.breaker.record_failure()
+    agent.breaker.opened_at -= agent.breaker.open_duration
+    monkeypatch.setattr(ai_agent, "_ai_provider", provider)
+    monkeypatch.setattr(ai_agent, "_ai_breaker", agent.breaker)
+    monkeypatch.setattr(ai_agent, "engine_config", lambda *args: None)
+
+    async def scenario():
+        return dict([item async for item in ai_agent.stream_game_config(profile("b1"), [], owner="clinic-b")])
+
+    assert asyncio.run(scenario())
+    assert agent.breaker.state == HALF_OPEN
+    # The probe slot went unused, so the next caller may still probe
+    assert agent.breaker.allow_request()
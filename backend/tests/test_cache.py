@@ -0,0 +1,58 @@
+import asyncio
+import os
+import subprocess
+import sys
+
+from cache import CacheEntry, MemoryCacheBackend, create_response_cache
+from settings import load_settings
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def entry():
+    return CacheEntry(body=b"{}", etag='"x"', last_modified=0.0)
+
+def test_evicted_keys_leave_their_tags():
+    async def scenario():
+        backend = MemoryCacheBackend(max_entries=2)
+        for i in range(100):
+            await backend.set(f"key-{i}", entry(), [f"user:{i}", "shared"], ttl=60)
+        return backend
+
+    backend = asyncio.run(scenario())
+    assert list(backend.entries) == ["key-98", "key-99"]
+    assert set(backend.tags) == {"user:98", "user:99", "shared"}
+    assert backend.tags["shared"] == {"key-98", "key-99"}
+
+def test_expired_keys_leave_their_tags():
+    async def scenario():
+        backend = MemoryCacheBackend()
+        await backend.set("key", entry(), ["user:1"], ttl=-1)
+        return backend, await backend.get("key")
+
+    backend, cached = asyncio.run(scenario())
+    assert cached is None
+    assert backend.entries == {} and backend.tags == {}
+
+def test_replaced_entry_drops_old_tags():
+    async def scenario():
+        backend = MemoryCacheBackend()
+        await backend.set("key", entry(), ["user:1"], ttl=60)
+        await backend.set("key", entry(), ["user:2"], ttl=60)
+        return backend, await backend.invalidate("user:1")
+
+    backend, removed = asyncio.run(scenario())
+    assert removed == 0
+    assert backend.tags == {"user:2": {"key"}}
+
+def test_unreachable_redis_falls_back_to_memory():
+    settings = load_settings({"APP_ENV": "test", "REDIS_HOST": "127.0.0.1", "REDIS_PORT": "1"})
+    cache = create_response_cache(settings)
+    assert isinstance(cache.backend, MemoryCacheBackend)
+
+def test_importing_the_app_does_not_build_the_cache():
+    # An unreachable Redis would make any connection attempt at import visible
+    environ = {**os.environ, "REDIS_HOST": "127.0.0.1", "REDIS_PORT": "1"}
+    result = subprocess.run([sys.executable, "-c", "import main, cache; print(cache._response_cache is None)"],
+                            cwd=BACKEND_DIR, env=environ, capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip().endswith("True")
@@ -0,0 +1,32 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi.testclient import TestClient
+
+import main as app_module
+from models import ChildProfile, LicenseUsage
+
+REQUESTS = 20
+SLOTS = 5
+
+def test_concurrent_creates_never_oversubscribe_the_license(db, make_user):
+    user, headers, _ = make_user(role="doctor", total_slots=SLOTS)
+    barrier = threading.Barrier(REQUESTS)
+
+    def create(i):
+        # A client per thread, so each request runs on its own event loop and session
+        client = TestClient(app_module.app)
+        barrier.wait()
+        return client.post("/children/create", headers=headers, json={
+            "name": f"Child {i}", "age": 6, "gender": "other", "special_interest": "shapes"
+        }).status_code
+
+    with ThreadPoolExecutor(REQUESTS) as pool:
+        statuses = list(pool.map(create, range(REQUESTS)))
+
+    license_usage = db.query(LicenseUsage).filter(LicenseUsage.user_id == user.id).one()
+    children = db.query(ChildProfile).filter(ChildProfile.user_id == user.id).count()
+    assert statuses.count(200) == SLOTS
+    assert statuses.count(400) == REQUESTS - SLOTS
+    assert children == SLOTS
+    assert license_usage.used_slots == SLOTS
@@ -0,0 +1,44 @@
+from ai_agent import AIAgent, GeminiProvider
+from circuit_breaker import CircuitBreaker, CLOSED, HALF_OPEN
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+def half_open_breaker(name):
+    clock = FakeClock()
+    breaker = CircuitBreaker(name, minimum_calls=1, reset_timeout=10, clock=clock)
+    straggler_started = clock()
+    breaker.record_failure(clock())
+    clock.now += 10
+    assert breaker.allow_request()
+    assert breaker.state == HALF_OPEN
+    return breaker, clock, straggler_started
+
+def test_straggler_success_does_not_close_half_open_breaker():
+    breaker, clock, straggler_started = half_open_breaker("test_straggler")
+    breaker.record_success(0.5, straggler_started)
+    assert breaker.state == HALF_OPEN
+
+    breaker.record_success(0.5, clock())
+    assert breaker.state == CLOSED
+
+def test_straggler_failure_does_not_reopen_half_open_breaker():
+    breaker, clock, straggler_started = half_open_breaker("test_straggler_failure")
+    breaker.record_failure(straggler_started)
+    assert breaker.state == HALF_OPEN
+
+def test_missing_api_key_is_not_a_probe_success():
+    breaker, _, _ = half_open_breaker("test_no_api_key")
+    agent = AIAgent(GeminiProvider(api_key=None), breaker)
+
+    # allow_request() above took the probe slot, as the async callers do
+    config = agent.generate_game_config({"age": 6}, [], admitted=True)
+    assert config
+    assert breaker.state == HALF_OPEN
+    assert len(breaker.latencies) == 0
+    # The probe slot was freed for a real call
+    assert breaker.allow_request()
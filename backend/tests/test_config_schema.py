@@ -0,0 +1,67 @@
+import json
+
+import pytest
+
+import ai_agent
+import config_schema
+from ai_agent import GeminiProvider
+from config_schema import FALLBACK_CONFIG, ConfigRepairError, validate_config
+
+EMPTY_VOCABULARY = {
+    **FALLBACK_CONFIG,
+    "level_config": {**FALLBACK_CONFIG["level_config"], "shapes": [], "colors": []}
+}
+
+def test_empty_vocabulary_lists_get_the_defaults():
+    config, repairs = validate_config(json.dumps(EMPTY_VOCABULARY))
+    assert config["level_config"]["shapes"] == FALLBACK_CONFIG["level_config"]["shapes"]
+    assert config["level_config"]["colors"] == FALLBACK_CONFIG["level_config"]["colors"]
+    assert {"shapes:default", "colors:default"} <= set(repairs)
+
+def test_config_invalid_after_repair_is_a_repair_error(monkeypatch):
+    monkeypatch.setattr(config_schema, "repair_config", lambda data: ({"level_config": {}}, []))
+    with pytest.raises(ConfigRepairError):
+        validate_config({"session_duration": "soon"})
+
+class StreamResponse:
+    def __init__(self, text):
+        self.lines = [f"data: {json.dumps({'candidates': [{'content': {'parts': [{'text': text}]}}]})}"]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def raise_for_status(self):
+        pass
+
+    def iter_lines(self, decode_unicode=False):
+        return iter(self.lines)
+
+class StreamSession:
+    def __init__(self, text):
+        self.text = text
+
+    def post(self, *args, **kwargs):
+        return StreamResponse(self.text)
+
+def test_streamed_members_are_validated():
+    provider = GeminiProvider(api_key="test", streaming=True)
+    provider.http = StreamSession(json.dumps(EMPTY_VOCABULARY))
+
+    config = dict(provider.stream_config({"age": 6}, []))
+    assert config["level_config"]["shapes"]
+    assert config["level_config"]["colors"]
+    config_schema.GameConfig.model_validate(config)
+
+def test_truncated_stream_is_reported(monkeypatch):
+    recorded = []
+    monkeypatch.setattr(ai_agent, "record_validation", recorded.extend)
+    provider = GeminiProvider(api_key="test", streaming=True)
+    # Cut off inside the last member, before the object closes
+    provider.http = StreamSession(json.dumps(FALLBACK_CONFIG)[:-5])
+
+    config = dict(provider.stream_config({"age": 6}, []))
+    assert set(config) == set(FALLBACK_CONFIG)
+    assert "json:truncated" in recorded
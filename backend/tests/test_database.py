@@ -0,0 +1,37 @@
+import os
+import shutil
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def run_backend(code, cwd=BACKEND_DIR, **env):
+    environ = {key: value for key, value in os.environ.items() if key != "DATABASE_URL"}
+    environ.update(env)
+    return subprocess.run([sys.executable, "-c", code], cwd=cwd, env=environ,
+                          capture_output=True, text=True, timeout=60)
+
+def test_database_imports_without_url_and_fails_on_first_use():
+    result = run_backend(
+        "import database\n"
+        "try:\n"
+        "    database.get_engine()\n"
+        "except ValueError as e:\n"
+        "    print(e)\n",
+        # Empty, so a developer's .env cannot fill it in
+        APP_ENV="test", DATABASE_URL=""
+    )
+    assert result.returncode == 0, result.stderr
+    assert "DATABASE_URL" in result.stdout
+
+def test_settings_read_env_file_without_main(tmp_path):
+    # .env is found next to settings.py, so run a copy of it beside a test .env
+    shutil.copy(os.path.join(BACKEND_DIR, "settings.py"), tmp_path)
+    (tmp_path / ".env").write_text("DATABASE_URL=sqlite:///from-dotenv.db\n")
+    result = run_backend(
+        "from settings import get_settings\n"
+        "print(get_settings().database_url)\n",
+        cwd=tmp_path, APP_ENV="test"
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "sqlite:///from-dotenv.db"
@@ -0,0 +1,102 @@
+import uuid
+
+from fulfillment import fulfillment_queue
+from models import DiagnosticReport, FulfillmentEvent, LicenseUsage, PaymentHistory
+from payments import calculate_amount
+
+def checkout(client, headers, **order):
+    """Create, pay and verify an order; returns the verified payment id."""
+    response = client.post("/payments/create-order", json={"currency": "INR", **order}, headers=headers)
+    assert response.status_code == 200, response.text
+    order_id = response.json()["order_id"]
+    payment = client.post("/payments/process", json={"order_id": order_id}, headers=headers).json()
+    assert payment["status"] == "captured"
+    response = client.post("/payments/verify", json={"order_id": order_id, "payment_id": payment["payment_id"]}, headers=headers)
+    assert response.status_code == 200, response.text
+    fulfillment_queue.drain()
+    return payment["payment_id"]
+
+def event_for(db, payment_id):
+    db.expire_all()
+    return db.query(FulfillmentEvent).filter(FulfillmentEvent.payment_id == payment_id).one()
+
+def test_frontend_upgrade_plans_upgrade_the_license(client, db, make_user):
+    for role in ("parent", "doctor"):
+        user, headers, _ = make_user(role=role, total_slots=5)
+        payment_id = checkout(client, headers, report_type=f"{role}_upgrade", child_id=None)
+
+        assert event_for(db, payment_id).status == "done"
+        license_usage = db.query(LicenseUsage).filter(LicenseUsage.user_id == user.id).one()
+        assert license_usage.upgraded
+        assert license_usage.total_slots == {"parent": 25, "doctor": 50}[role]
+
+def test_report_unlock_uses_the_child_on_the_order(client, db, make_user):
+    _, headers, child_ids = make_user(children=1)
+    child_id = uuid.UUID(child_ids[0])
+    db.add(DiagnosticReport(child_id=child_id, report_json={}))
+    db.commit()
+
+    payment_id = checkout(client, headers, report_type="report_unlock", child_id=child_ids[0])
+
+    assert event_for(db, payment_id).status == "done"
+    report = db.query(DiagnosticReport).filter(DiagnosticReport.child_id == child_id).one()
+    assert report.payment_status == "paid"
+
+def test_report_unlock_without_an_owned_child_is_rejected(client, make_user):
+    _, headers, _ = make_user()
+    _, _, other_children = make_user(children=1)
+    for child_id in ("report-unlock", other_children[0], None):
+        response = client.post("/payments/create-order", json={
+            "report_type": "report_unlock", "child_id": child_id
+        }, headers=headers)
+        assert response.status_code == 400
+
+def test_verifying_an_unknown_payment_is_a_client_error(client, make_user):
+    _, headers, _ = make_user()
+    response = client.post("/payments/verify", json={"order_id": "order_missing", "payment_id": "pay_missing"},
+                           headers=headers)
+    assert response.status_code == 400
+
+def test_report_unlock_event_without_child_fails_without_retrying(db, make_user):
+    user, _, _ = make_user()
+    event = FulfillmentEvent(payment_id=f"pay_{uuid.uuid4().hex[:12]}", user_id=user.id,
+                             payment_type="report_unlock", receipt="dummy_order_1")
+    db.add(event)
+    db.commit()
+
+    fulfillment_queue.drain()
+
+    event = event_for(db, event.payment_id)
+    assert event.status == "failed"
+    assert event.attempts == 1
+
+def test_order_amount_comes_from_the_catalog(client, make_user):
+    _, headers, _ = make_user(role="parent")
+    response = client.post("/payments/create-order", json={
+        "amount": 1, "currency": "INR", "report_type": "parent_upgrade"
+    }, headers=headers)
+    assert response.status_code == 200
+    assert response.json()["amount"] == calculate_amount("license_upgrade", user_role="parent", currency="INR")
+
+def test_order_without_a_catalog_price_is_rejected(client, make_user):
+    _, headers, _ = make_user()
+    for order in ({"report_type": "premium_subscription"}, {"report_type": "gift_card"},
+                  {"report_type": "parent_upgrade", "currency": "XYZ"}):
+        response = client.post("/payments/create-order", json=order, headers=headers)
+        assert response.status_code == 400, order
+
+def test_underpaid_upgrade_is_not_fulfilled(client, db, make_user):
+    user, headers, _ = make_user(role="parent", total_slots=5)
+    order_id = client.post("/payments/create-order", json={"currency": "INR", "report_type": "parent_upgrade"},
+                           headers=headers).json()["order_id"]
+    # A ledger row that records less than the price, e.g. written before prices were enforced
+    db.query(PaymentHistory).filter(PaymentHistory.order_id == order_id).update({"amount": 1})
+    db.commit()
+    payment = client.post("/payments/process", json={"order_id": order_id}, headers=headers).json()
+    client.post("/payments/verify", json={"order_id": order_id, "payment_id": payment["payment_id"]}, headers=headers)
+    fulfillment_queue.drain()
+
+    assert event_for(db, payment["payment_id"]).status == "failed"
+    license_usage = db.query(LicenseUsage).filter(LicenseUsage.user_id == user.id).one()
+    assert not license_usage.upgraded
+    assert license_usage.total_slots == 5
@@ -0,0 +1,66 @@
+import asyncio
+
+from game_manager import GameManager
+
+class RecordingSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def send_text(self, text):
+        self.sent.append(text)
+
+def drag_message(shape_id, x):
+    return {"type": "game_event", "event": {"type": "shape_moved", "shape": {"id": shape_id}, "x": x, "y": 0}}
+
+def test_drag_events_are_merged_into_one_frame_per_tick():
+    async def scenario():
+        manager = GameManager(tick_rate=20)
+        caretaker = RecordingSocket()
+        await manager.add_connection("child-1", caretaker, "caretaker")
+        caretaker.sent.clear()
+
+        # Two shapes dragged at 100 events each within a single tick
+        for x in range(100):
+            await manager.coalesce_game_event("child-1", drag_message("shape_0", x))
+            await manager.coalesce_game_event("child-1", drag_message("shape_1", x))
+        assert caretaker.sent == []
+
+        await asyncio.sleep(manager.tick_interval * 2)
+        return caretaker.sent
+
+    sent = asyncio.run(scenario())
+    assert len(sent) == 1
+    assert '"game_event_frame"' in sent[0]
+    assert sent[0].count('"shape_moved"') == 2
+    assert '"x":99' in sent[0].replace(" ", "")
+
+def test_discrete_event_flushes_pending_frame_first():
+    async def scenario():
+        manager = GameManager(tick_rate=20)
+        caretaker = RecordingSocket()
+        await manager.add_connection("child-1", caretaker, "caretaker")
+        caretaker.sent.clear()
+
+        for x in range(10):
+            await manager.coalesce_game_event("child-1", drag_message("shape_0", x))
+        await manager.coalesce_game_event("child-1", {"type": "game_event", "event": {"type": "interaction"}})
+        await asyncio.sleep(manager.tick_interval * 2)
+        return caretaker.sent
+
+    sent = asyncio.run(scenario())
+    assert len(sent) == 2
+    assert '"game_event_frame"' in sent[0]
+    assert '"interaction"' in sent[1]
+
+def test_new_session_ends_the_previous_one():
+    async def scenario():
+        manager = GameManager(tick_rate=20)
+        first = await manager.start_game_session("child-1", {})
+        second = await manager.start_game_session("child-1", {})
+        return manager, first, second
+
+    manager, first, second = asyncio.run(scenario())
+    assert manager.child_sessions == {"child-1": second}
+    assert manager.sessions_by_status["active"] == {second}
+    assert manager.active_sessions[first].status == "completed"
+    assert manager.active_sessions[first].summary == {"reason": "replaced"}
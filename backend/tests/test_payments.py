@@ -0,0 +1,86 @@
+import asyncio
+
+import pytest
+
+from models import PaymentHistory
+from fulfillment import fulfillment_queue
+from payments import DummyPaymentManager, OrderNotPayableError, PaymentGateway
+
+ORDER_ENDPOINTS = [
+    ("/payments/create-subscription-order", lambda child_ids: {"subscription_type": "monthly"}),
+    ("/payments/create-license-upgrade-order", lambda child_ids: {"currency": "USD"}),
+    ("/payments/create-report-unlock-order", lambda child_ids: {"child_id": child_ids[0]}),
+]
+
+@pytest.mark.parametrize("path, body", ORDER_ENDPOINTS)
+def test_order_endpoints_create_orders(client, make_user, path, body):
+    _, headers, child_ids = make_user(children=1)
+    response = client.post(path, json=body(child_ids), headers=headers)
+    assert response.status_code == 200, response.text
+    order = response.json()
+    assert order["order_id"].startswith("order_")
+    assert order["amount"] > 0
+
+class FixedGateway(PaymentGateway):
+    def __init__(self, result):
+        self.result = result
+
+    async def charge(self, order, payment_method):
+        return self.result
+
+def test_processed_order_cannot_be_processed_again(client, db, make_user):
+    _, headers, _ = make_user()
+    order_id = client.post("/payments/create-license-upgrade-order", json={"currency": "USD"}, headers=headers).json()["order_id"]
+
+    first = client.post("/payments/process", json={"order_id": order_id}, headers=headers)
+    assert first.status_code == 200
+    second = client.post("/payments/process", json={"order_id": order_id}, headers=headers)
+    assert second.status_code == 409
+
+    entry = db.query(PaymentHistory).filter(PaymentHistory.order_id == order_id).one()
+    assert entry.status == "completed"
+    assert entry.payment_id == first.json()["payment_id"]
+
+def test_late_capture_does_not_overwrite_the_first(db, make_user):
+    user, _, _ = make_user()
+    order = DummyPaymentManager(FixedGateway(True)).create_order(100, user_id=user.id, payment_type="license_upgrade")
+    asyncio.run(DummyPaymentManager(FixedGateway(True)).process_payment(order["id"]))
+
+    # A concurrent call that read the order while it was pending, then failed its charge
+    with pytest.raises(OrderNotPayableError):
+        DummyPaymentManager(FixedGateway(False))._record_payment(order["id"], "pay_late", False)
+
+    entry = db.query(PaymentHistory).filter(PaymentHistory.order_id == order["id"]).one()
+    assert entry.status == "completed"
+    assert entry.payment_id != "pay_late"
+
+def test_payment_routes_keep_ledger_work_off_the_event_loop(client, make_user, monkeypatch):
+    _, headers, child_ids = make_user(children=1)
+    on_loop = []
+
+    def record(original):
+        def wrapper(*args, **kwargs):
+            try:
+                asyncio.get_running_loop()
+                on_loop.append(original.__name__)
+            except RuntimeError:
+                pass
+            return original(*args, **kwargs)
+        wrapper.__name__ = original.__name__
+        return wrapper
+
+    monkeypatch.setattr(DummyPaymentManager, "create_order", record(DummyPaymentManager.create_order))
+    monkeypatch.setattr(DummyPaymentManager, "verify_payment", record(DummyPaymentManager.verify_payment))
+    monkeypatch.setattr(DummyPaymentManager, "get_payment_history", record(DummyPaymentManager.get_payment_history))
+    monkeypatch.setattr(fulfillment_queue, "enqueue", record(fulfillment_queue.enqueue))
+
+    for path, body in ORDER_ENDPOINTS:
+        assert client.post(path, json=body(child_ids), headers=headers).status_code == 200
+    order_id = client.post("/payments/create-order", json={"report_type": "parent_upgrade"},
+                           headers=headers).json()["order_id"]
+    payment = client.post("/payments/process", json={"order_id": order_id}, headers=headers).json()
+    assert client.post("/payments/verify", json={"order_id": order_id, "payment_id": payment["payment_id"]},
+                       headers=headers).status_code == 200
+    assert client.get("/payments/history", headers=headers).status_code == 200
+
+    assert on_loop == []
@@ -0,0 +1,52 @@
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+import database
+
+# The token's user, then license and children in one joined query
+EXPECTED_QUERIES = 2
+# Cached views still resolve the token's user first
+CACHED_QUERIES = 1
+
+@contextmanager
+def count_queries():
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(database.engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(database.engine, "before_cursor_execute", record)
+
+def test_profile_is_one_joined_query_then_cached(client, make_user):
+    _, headers, _ = make_user(children=5)
+
+    with count_queries() as statements:
+        response = client.get("/user/profile", headers=headers)
+    assert response.status_code == 200
+    assert len(response.json()["children"]) == 5
+    assert len(statements) == EXPECTED_QUERIES, statements
+
+    with count_queries() as statements:
+        response = client.get("/user/profile", headers=headers)
+    assert response.status_code == 200
+    assert len(statements) == CACHED_QUERIES, statements
+
+def test_cached_child_is_only_served_to_its_owner(client, make_user):
+    _, owner_headers, (child_id,) = make_user(children=1)
+    _, other_headers, _ = make_user()
+
+    assert client.get(f"/children/{child_id}", headers=owner_headers).status_code == 200
+    assert client.get(f"/reports/{child_id}", headers=owner_headers).status_code == 200
+    # The owner's responses are cached now; another user still gets a 404
+    assert client.get(f"/children/{child_id}", headers=other_headers).status_code == 404
+    assert client.get(f"/reports/{child_id}", headers=other_headers).status_code == 404
+
+def test_malformed_child_id_is_not_found(client, make_user):
+    _, headers, _ = make_user()
+    assert client.get("/children/not-a-uuid", headers=headers).status_code == 404
+    assert client.get("/reports/not-a-uuid", headers=headers).status_code == 404
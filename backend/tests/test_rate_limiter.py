@@ -0,0 +1,59 @@
+import asyncio
+
+import rate_limiter
+from rate_limiter import AIScheduler
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+def make_scheduler(clock):
+    # One request per minute, all of it available as a burst
+    return AIScheduler(requests_per_minute=1, tokens_per_minute=0, burst_fraction=1.0, clock=clock)
+
+def test_admission_racing_the_deadline_keeps_the_quota(monkeypatch):
+    clock = FakeClock()
+    scheduler = make_scheduler(clock)
+    scheduler.request_bucket.consume(1)
+    timeouts = []
+
+    async def admitted_then_timed_out(future, timeout):
+        # The dispatcher admits the waiter in the same loop turn the deadline fires
+        timeouts.append(timeout)
+        clock.now += 60
+        scheduler._pump()
+        raise asyncio.TimeoutError
+
+    monkeypatch.setattr(rate_limiter.asyncio, "wait_for", admitted_then_timed_out)
+
+    async def scenario():
+        return await scheduler.acquire(10, deadline=clock() + 0.5)
+
+    assert asyncio.run(scenario()) is True
+    # The deadline is measured on the scheduler's clock, not time.monotonic()
+    assert timeouts == [0.5]
+    assert scheduler.request_bucket.tokens == 0
+
+def test_cancelled_after_admission_never_loses_the_quota():
+    clock = FakeClock()
+    scheduler = make_scheduler(clock)
+    scheduler.request_bucket.consume(1)
+
+    async def scenario():
+        task = asyncio.create_task(scheduler.acquire(10, deadline=clock() + 30))
+        await asyncio.sleep(0)
+        clock.now += 60
+        scheduler._pump()
+        # The caller goes away before it resumes to use the admission
+        task.cancel()
+        try:
+            return await task
+        except asyncio.CancelledError:
+            return False
+
+    admitted = asyncio.run(scenario())
+    # Either the caller still got the admission, or the quota went back to the bucket
+    assert scheduler.request_bucket.tokens == (0 if admitted else 1)
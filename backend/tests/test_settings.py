@@ -0,0 +1,21 @@
+import pytest
+
+from settings import SettingsError, load_settings
+
+PRODUCTION = {"APP_ENV": "production", "SECRET_KEY": "a-real-secret", "DEBUG": "false"}
+
+def test_production_runs_one_worker_by_default():
+    assert load_settings(PRODUCTION).workers == 1
+
+@pytest.mark.parametrize("extra", [
+    {},
+    {"REDIS_HOST": "redis"},
+    {"STICKY_SESSIONS": "true"},
+])
+def test_multiple_workers_need_shared_state(extra):
+    with pytest.raises(SettingsError, match="WORKERS"):
+        load_settings({**PRODUCTION, "WORKERS": "4", **extra})
+
+def test_multiple_workers_with_redis_and_sticky_sessions():
+    settings = load_settings({**PRODUCTION, "WORKERS": "4", "REDIS_HOST": "redis", "STICKY_SESSIONS": "true"})
+    assert settings.workers == 4
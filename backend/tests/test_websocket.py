@@ -0,0 +1,43 @@
+import json
+import uuid
+
+import pytest
+from starlette.websockets import WebSocketDisconnect
+
+import main as app_module
+
+@pytest.fixture
+def started_sessions(monkeypatch):
+    started = []
+
+    async def start_child_session(websocket, child_id):
+        started.append(child_id)
+        return True
+
+    monkeypatch.setattr(app_module, "start_child_session", start_child_session)
+    return started
+
+def test_caretaker_connection_does_not_start_a_session(client, started_sessions):
+    child_id = str(uuid.uuid4())
+    with client.websocket_connect(f"/ws/{child_id}?type=caretaker") as websocket:
+        assert json.loads(websocket.receive_text())["type"] == "connection_confirmed"
+    assert started_sessions == []
+
+    with client.websocket_connect(f"/ws/{child_id}") as websocket:
+        assert json.loads(websocket.receive_text())["type"] == "connection_confirmed"
+    assert started_sessions == [child_id]
+
+def test_malformed_child_id_closes_the_socket(client):
+    with client.websocket_connect("/ws/not-a-uuid") as websocket:
+        assert json.loads(websocket.receive_text())["type"] == "connection_confirmed"
+        with pytest.raises(WebSocketDisconnect):
+            websocket.receive_text()
+
+def test_malformed_frame_keeps_the_connection(client, started_sessions):
+    with client.websocket_connect(f"/ws/{uuid.uuid4()}?type=caretaker") as websocket:
+        websocket.receive_text()
+        for frame in ["not json", "[1, 2]", '{"no": "type"}']:
+            websocket.send_text(frame)
+        websocket.send_text(json.dumps({"type": "session_ended"}))
+        # Session state messages are echoed to caretakers, so this one reaches us
+        assert json.loads(websocket.receive_text())["type"] == "session_ended"
@@ -1,6 +1,10 @@
 import React, { useEffect, useRef, forwardRef, useImperativeHandle } from 'react';
 import Phaser from 'phaser';
 
+// Minimum gap between shape_moved events sent while a shape is dragged;
+// the server merges them further into per-tick frames for caretakers
+const DRAG_EVENT_INTERVAL_MS = 50;
+
 // Game Scene Class
 class GameScene extends Phaser.Scene {
   constructor() {
@@ -178,7 +182,7 @@ class GameScene extends Phaser.Scene {
       gameShape.setScale(0.8);
       
       // Store shape data
-      gameShape.shapeData = { color, shape, originalX: x, originalY: y };
+      gameShape.shapeData = { id: `shape_${i}`, color, shape, originalX: x, originalY: y };
       
       // Add drag events
       this.setupDragEvents(gameShape);
@@ -216,6 +220,7 @@ class GameScene extends Phaser.Scene {
 
   setupDragEvents(shape) {
     let startTime;
+    let lastMoveSent = 0;
 
     this.input.on('dragstart', (pointer, gameObject) => {
       if (gameObject === shape) {
@@ -229,6 +234,17 @@ class GameScene extends Phaser.Scene {
       if (gameObject === shape) {
         gameObject.x = dragX;
         gameObject.y = dragY;
+
+        // Relay the drag to caretakers, throttled to keep the socket quiet
+        const now = Date.now();
+        if (this.onGameEvent && now - lastMoveSent >= DRAG_EVENT_INTERVAL_MS) {
+          lastMoveSent = now;
+          this.onGameEvent('shape_moved', {
+            shape: gameObject.shapeData,
+            x: Math.round(dragX),
+            y: Math.round(dragY)
+          });
+        }
       }
     });
 
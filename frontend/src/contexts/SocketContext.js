@@ -28,6 +28,11 @@ export const SocketProvider = ({ children }) => {
 
     gameSocket.onmessage = (event) => {
       const data = JSON.parse(event.data);
+      if (data.type === 'ping') {
+        // Heartbeat from the server supervisor
+        gameSocket.send(JSON.stringify({ type: 'pong' }));
+        return;
+      }
       handleGameMessage(data);
     };
 
@@ -50,6 +55,10 @@ export const SocketProvider = ({ children }) => {
       case 'game_event':
         setGameEvents(prev => [...prev, data.event]);
         break;
+      case 'game_event_frame':
+        // Coalesced high-frequency events (latest drag position per shape)
+        setGameEvents(prev => [...prev, ...data.events]);
+        break;
       case 'session_started':
         setLiveGameData({
           sessionId: data.session_id,
@@ -59,6 +68,13 @@ export const SocketProvider = ({ children }) => {
           startedAt: data.timestamp
         });
         break;
+      case 'config_update':
+        // Rest of a streamed config, after session_started carried level_config
+        setLiveGameData(prev => prev ? {
+          ...prev,
+          config: { ...prev.config, ...data.config }
+        } : null);
+        break;
       case 'session_ended':
         setLiveGameData(prev => prev ? {
           ...prev,
@@ -85,6 +85,11 @@ const GameSession = () => {
     if (socket) {
       socket.onmessage = (event) => {
         const data = JSON.parse(event.data);
+        if (data.type === 'ping') {
+          // Heartbeat from the server supervisor
+          socket.send(JSON.stringify({ type: 'pong' }));
+          return;
+        }
         handleGameMessage(data);
       };
     }
@@ -111,6 +116,11 @@ const GameSession = () => {
         setGameState('ready');
         break;
         
+      case 'config_update':
+        // Rest of a streamed config, after session_start carried level_config
+        setGameConfig(prev => ({ ...prev, ...data.config }));
+        break;
+        
       case 'connection_confirmed':
         console.log('Connection confirmed for child:', data.child_id);
         break;
@@ -252,6 +262,13 @@ const GameSession = () => {
   };
 
   const logGameEvent = (eventType, eventData) => {
+    if (eventType === 'shape_moved') {
+      // Drag positions are only streamed to caretakers, not kept in the session log
+      if (gameSocket) {
+        sendGameEvent(gameSocket, { type: eventType, ...eventData });
+      }
+      return;
+    }
     const event = {
       type: eventType,
       timestamp: new Date(),
@@ -1,5 +1,5 @@
 import React, { useState, useEffect } from 'react';
-import { useParams, useNavigate } from 'react-router-dom';
+import { useParams, useNavigate, useSearchParams } from 'react-router-dom';
 import { useAuth } from '../contexts/AuthContext';
 import { 
   CreditCard, 
@@ -19,6 +19,8 @@ import toast from 'react-hot-toast';
 
 const Payment = () => {
   const { type } = useParams(); // 'report' or 'license'
+  const [searchParams] = useSearchParams();
+  const childId = searchParams.get('child'); // report unlocks: /payment/report?child=<id>
   const navigate = useNavigate();
   const { user } = useAuth();
   
@@ -75,13 +77,22 @@ const Payment = () => {
   const createOrder = async (planType) => {
     setLoading(true);
     try {
-      const amount = pricing[planType];
-      const response = await api.post('/payments/create-order', {
-        amount: amount * 100, // Convert to paise
-        currency: 'INR',
-        child_id: type === 'report' ? 'report-unlock' : null,
-        report_type: planType
-      });
+      // The server prices the order from its catalog
+      let response;
+      if (planType === 'report_unlock') {
+        if (!childId) {
+          toast.error('Choose a child to unlock their report');
+          return null;
+        }
+        response = await api.post('/payments/create-report-unlock-order', {
+          child_id: childId,
+          currency: 'INR'
+        });
+      } else {
+        response = await api.post('/payments/create-license-upgrade-order', {
+          currency: 'INR'
+        });
+      }
       
       setOrderData(response.data);
       return response.data;
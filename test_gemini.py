@@ -17,8 +17,8 @@ def test_gemini_api():
     
     print(f"🔑 API Key found: {api_key[:10]}...")
     
-    # Test URL
-    url = "https://generativelanguage.googleapis.com/v1beta/models/gemini-1.5-flash:generateContent"
+    # Test URL (GEMINI_API_URL points this at backend/benchmarks/ai_standin.py for offline runs)
+    url = os.getenv("GEMINI_API_URL", "https://generativelanguage.googleapis.com/v1beta/models/gemini-1.5-flash:generateContent")
     
     # Simple test prompt
     data = {